@@ -0,0 +1,118 @@
+"""Admin-only operational endpoints."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from services.chat_analytics import read_rollups
+from services.database import get_db, get_read_db
+from services.neo4j_exec import read_graph_version
+from services.partitioning import partition_status
+from services.precomputed_answers import build_report
+from services.principal import Principal, parse_bearer, resolve_principal
+from services.user_import import UserImportError, detect_format, import_users
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def require_admin(authorization: Optional[str] = Header(None), db: Session = Depends(get_read_db)) -> Principal:
+    """Require a Bearer token of an active user with role ``admin``."""
+    token = parse_bearer(authorization)
+    principal = resolve_principal(db, token) if token else None
+    if principal is None or not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return principal
+
+
+@router.get("/precomputed-answers/report")
+def precomputed_answers_report(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    _: Principal = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Độ phủ (tỷ lệ câu hỏi được trả lời bằng câu trả lời tính sẵn) và độ cũ của bảng precomputed_answer."""
+    store = getattr(request.app.state, "precomputed_answers", None)
+    driver = getattr(request.app.state, "driver", None)
+    version = store.graph_version if store and store.graph_version else None
+    if version is None and driver:
+        try:
+            version = read_graph_version(driver)
+        except Exception:
+            version = None
+    return build_report(db, store, version)
+
+
+@router.get("/analytics/chat")
+def chat_analytics(
+    request: Request,
+    granularity: Literal["hour", "day"] = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    top_entities: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    _: Principal = Depends(require_admin),
+) -> Dict[str, Any]:
+    """
+    Thống kê lưu lượng chat theo giờ/ngày: intent, query_type, tỷ lệ fallback, phân bố độ trễ và entity phổ biến.
+
+    Chỉ đọc từ các bảng tổng hợp (cập nhật tăng dần trong nền), không quét tin nhắn gốc.
+    """
+    report = read_rollups(db, granularity, since, until, top_entities)
+    aggregator = getattr(request.app.state, "chat_analytics", None)
+    report["aggregator"] = aggregator.stats() if aggregator else None
+    return report
+
+
+@router.get("/retention")
+def retention_status(request: Request, _: Principal = Depends(require_admin)) -> Dict[str, Any]:
+    """Trạng thái job xóa hội thoại quá hạn: tiến độ lần chạy hiện tại (nếu có), kết quả lần chạy gần nhất."""
+    job = getattr(request.app.state, "retention", None)
+    return {"enabled": job is not None, **(job.stats() if job else {})}
+
+
+@router.get("/partitions")
+def partitions(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    _: Principal = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Các partition theo tháng của conservation_detail (ước lượng số dòng) và các partition đã lưu trữ ra file."""
+    report = partition_status(db)
+    maintainer = getattr(request.app.state, "partition_maintainer", None)
+    report["maintainer"] = maintainer.stats() if maintainer else None
+    return report
+
+
+@router.post("/users/import")
+async def import_users_bulk(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Mặc định theo Content-Type"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_admin),
+) -> Dict[str, Any]:
+    """
+    Tạo hàng loạt tài khoản từ CSV (header: email,username,password[,full_name,role]) hoặc NDJSON.
+
+    Body là nội dung file thô. Trả về báo cáo lỗi theo từng dòng (sai định dạng, trùng email/username);
+    ``dry_run=true`` chỉ kiểm tra, không tạo tài khoản.
+    """
+    try:
+        data = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be UTF-8 encoded")
+    fmt = format or detect_format(content_type=request.headers.get("content-type"))
+    try:
+        return await run_in_threadpool(import_users, db, data, fmt, dry_run)
+    except UserImportError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
@@ -1,18 +1,24 @@
 """Chatbot API routes built from the Streamlit demo logic."""
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status, Header, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from services.chatbot_service import ChatbotService, ChatbotResult
-from services.conversation_service import ConversationService
-from services.database import get_db
-from services.auth import decode_token
-from services.user_service import UserService
+from services.async_database import get_async_db, get_async_read_db
+from services.conversation_service import AsyncConversationService, ConversationService
+from services.conversation_export import iter_user_export
+from services.database import get_db, get_read_db
+from services.principal import aresolve_principal, parse_bearer, resolve_principal
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models import ConservationResponse, ConservationDetailResponse
+from models import ConservationResponse, ConservationDetailResponse, MessageSearchResponse
 from services.context_service import rewrite_question_with_context
+from services.message_search import search_messages
+from .responses import FastJSONResponse
 
 router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
 
@@ -24,13 +30,42 @@ class ChatbotRequest(BaseModel):
 
 
 class ChatbotResponse(BaseModel):
-    analysis: Dict[str, Any]
+    """Chỉ gồm các field được chọn qua tham số ``fields`` (mặc định: tất cả)."""
+    analysis: Optional[Dict[str, Any]] = None
     results: Optional[List[Dict[str, Any]]] = None
-    answer: str
+    answer: Optional[str] = None
     query_type: Optional[str] = None
     conversation_id: Optional[int] = None
 
 
+CHAT_FIELDS = ("answer", "analysis", "results", "query_type", "conversation_id")
+CONSERVATION_FIELDS = ("id", "title", "user_id", "last_update")
+DETAIL_FIELDS = ("id", "conversation_id", "role", "message", "created_at")
+# Không trả về mặc định, chỉ khi được yêu cầu trong ``fields``
+DETAIL_OPTIONAL_FIELDS = ("analysis", "latency_ms")
+
+
+def _parse_fields(fields: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    """Danh sách field từ tham số ``fields`` (phân tách bằng dấu phẩy); bỏ trống thì dùng ``default``."""
+    requested = list(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+    if not requested:
+        return list(default)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return requested
+
+
+def _fields_query(allowed: Sequence[str], default: Sequence[str]) -> Any:
+    return Query(
+        None,
+        description=f"Các field cần trả về, phân tách bằng dấu phẩy ({', '.join(allowed)}); mặc định: {', '.join(default)}",
+    )
+
+
 def _get_service(request: Request) -> ChatbotService:
     svc = getattr(request.app.state, "chatbot_service", None)
     if not svc:
@@ -44,16 +79,19 @@ def _get_service(request: Request) -> ChatbotService:
 @router.post("/message", response_model=ChatbotResponse)
 def chat_message(
     payload: ChatbotRequest,
+    fields: Optional[str] = _fields_query(CHAT_FIELDS, CHAT_FIELDS),
     db: Session = Depends(get_db),
     service: ChatbotService = Depends(_get_service),
     authorization: Optional[str] = Header(None),
-) -> ChatbotResponse:
+) -> FastJSONResponse:
     """
     Trả lời câu hỏi bằng pipeline: detect intent -> Cypher -> format.
 
     Returns both the friendly answer and the raw analysis/results
     to help client-side UIs render richer experiences.
     """
+    started = time.perf_counter()
+    selected = _parse_fields(fields, CHAT_FIELDS, CHAT_FIELDS)
     user_id = _get_user_id_from_token(db, authorization)
 
     conversation = _get_or_create_conversation(
@@ -63,21 +101,29 @@ def chat_message(
     )
 
     # Lấy history để rewrite câu hỏi cho đầy đủ ngữ cảnh
-    history_details = ConversationService.list_details(db, conversation.id) if conversation else []
+    # (tin nhắn đã lưu trữ ra file quá cũ để làm ngữ cảnh, không cần đọc lại)
+    history_details = (
+        ConversationService.list_details(db, conversation.id, include_archived=False) if conversation else []
+    )
     history_texts = [
         f"{detail.role}: {detail.message}" for detail in history_details[-10:]
     ]
-    rewritten_question, new_title = rewrite_question_with_context(
-        conversation.title if conversation else None,
-        history_texts,
-        payload.message,
-    )
+    if not history_texts and service.precomputed and service.precomputed.contains(payload.message):
+        # Câu hỏi mở đầu đã có câu trả lời tính sẵn: không cần viết lại theo ngữ cảnh
+        rewritten_question, new_title = payload.message, None
+    else:
+        rewritten_question, new_title = rewrite_question_with_context(
+            conversation.title if conversation else None,
+            history_texts,
+            payload.message,
+        )
 
     # Cập nhật title nếu có đề xuất mới
     if conversation and new_title and new_title != conversation.title:
         ConversationService.touch_conversation(db, conversation, title=new_title)
 
-    result: ChatbotResult = service.chat(rewritten_question)
+    # Không yêu cầu "results" thì service không giữ lại các dòng kết quả thô
+    result: ChatbotResult = service.chat(rewritten_question, include_results="results" in selected)
 
     # Lưu lịch sử: user hỏi + bot trả lời
     ConversationService.add_pair(
@@ -85,48 +131,43 @@ def chat_message(
         conversation=conversation,
         user_message=payload.message,
         assistant_message=result.reply,
-    )
-
-    return ChatbotResponse(
         analysis=result.analysis,
-        results=result.query_results,
-        answer=result.reply,
-        query_type=result.query_type,
-        conversation_id=conversation.id if conversation else None,
+        latency_ms=int((time.perf_counter() - started) * 1000),
     )
 
+    # Trả thẳng dict (đã đúng schema ChatbotResponse) để bỏ qua bước validate lại của FastAPI
+    response = {
+        "analysis": result.analysis,
+        "results": result.query_results,
+        "answer": result.reply,
+        "query_type": result.query_type,
+        "conversation_id": conversation.id if conversation else None,
+    }
+    return FastJSONResponse({name: response[name] for name in selected})
 
-def _get_user_id_from_token(db: Session, authorization: Optional[str]) -> Optional[int]:
-    """Parse Bearer token to get user id; returns None if missing/invalid."""
-    if not authorization:
-        return None
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            return None
-    except ValueError:
-        return None
 
-    payload = decode_token(token)
-    if not payload:
+def _get_user_id_from_token(db: Session, authorization: Optional[str]) -> Optional[int]:
+    """Parse Bearer token to get user id; returns None if missing/invalid/disabled."""
+    token = parse_bearer(authorization)
+    if not token:
         return None
-    email = payload.get("sub")
-    if not email:
+    principal = resolve_principal(db, token)
+    if principal is None or not principal.is_active:
         return None
-    user = UserService.get_user_by_email(db, email)
-    return user.id if user else None
+    return principal.id
 
 
-def _require_user_id(db: Session, authorization: Optional[str]) -> int:
-    """Strict version: require Bearer token and valid user."""
-    user_id = _get_user_id_from_token(db, authorization)
-    if not user_id:
+async def _require_user_id(db: AsyncSession, authorization: Optional[str]) -> int:
+    """Strict version: require Bearer token and valid, active user."""
+    token = parse_bearer(authorization)
+    principal = await aresolve_principal(db, token) if token else None
+    if principal is None or not principal.is_active:
         raise HTTPException(
             status_code=401,
             detail="Authentication required",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user_id
+    return principal.id
 
 
 def _get_or_create_conversation(db: Session, payload: ChatbotRequest, user_id: Optional[int]):
@@ -146,49 +187,102 @@ def _get_or_create_conversation(db: Session, payload: ChatbotRequest, user_id: O
 
 
 @router.get("/conservations", response_model=List[ConservationResponse])
-def list_conservations(
-    db: Session = Depends(get_db),
+async def list_conservations(
+    # Đọc từ primary: hội thoại vừa tạo/cập nhật ở lượt chat trước phải hiện ngay (replica có thể trễ)
+    db: AsyncSession = Depends(get_async_db),
     authorization: str = Header(...),
     skip: int = 0,
     limit: int = 20,
+    fields: Optional[str] = _fields_query(CONSERVATION_FIELDS, CONSERVATION_FIELDS),
 ):
-    """Lấy danh sách conservation (bắt buộc Bearer token, lọc theo user)."""
-    user_id = _require_user_id(db, authorization)
-    conservations = ConversationService.list_conservations(db, user_id=user_id, skip=skip, limit=limit)
-    return conservations
+    """Lấy danh sách conservation (bắt buộc Bearer token, lọc theo user); ``fields`` để chỉ lấy một số cột."""
+    selected = _parse_fields(fields, CONSERVATION_FIELDS, CONSERVATION_FIELDS)
+    user_id = await _require_user_id(db, authorization)
+    rows = await AsyncConversationService.list_conservation_rows(db, selected, user_id=user_id, skip=skip, limit=limit)
+    return FastJSONResponse(rows)
+
+
+@router.get("/conservations/search", response_model=MessageSearchResponse)
+async def search_conservation_messages(
+    q: str = Query(..., min_length=1, max_length=256, description="Từ khóa; hỗ trợ \"cụm từ\", OR, -loại trừ; không phân biệt dấu"),
+    role: Optional[str] = Query(None, pattern="^(user|assistant)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db),
+    authorization: str = Header(...),
+):
+    """Tìm kiếm toàn văn trong tin nhắn của user (bắt buộc Bearer token), xếp hạng theo độ liên quan, kèm đoạn trích."""
+    user_id = await _require_user_id(db, authorization)
+    return await search_messages(db, user_id, q, limit=limit, offset=offset, role=role)
+
+
+@router.get("/conservations/export", response_class=StreamingResponse)
+def export_conservations(
+    gzip: bool = Query(False, description="Nén gzip (tải về file .ndjson.gz)"),
+    db: Session = Depends(get_read_db),
+    authorization: str = Header(...),
+) -> StreamingResponse:
+    """
+    Xuất toàn bộ hội thoại và tin nhắn của user dưới dạng NDJSON (bắt buộc Bearer token).
+
+    Mỗi dòng một JSON có trường ``kind``: ``export`` (đầu file), ``conversation``,
+    ``message`` (ngay sau hội thoại của nó) và ``summary`` (cuối file).
+    """
+    user_id = _get_user_id_from_token(db, authorization)
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    filename = f"conversations-{user_id}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        iter_user_export(user_id, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/conservations/{conversation_id}/details", response_model=List[ConservationDetailResponse])
-def get_conservation_details(
+async def get_conservation_details(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    # Đọc từ primary: client thường gọi ngay sau lượt chat và phải thấy tin nhắn vừa ghi
+    db: AsyncSession = Depends(get_async_db),
     authorization: str = Header(...),
+    fields: Optional[str] = _fields_query(DETAIL_FIELDS + DETAIL_OPTIONAL_FIELDS, DETAIL_FIELDS),
 ):
-    """Lấy chi tiết tin nhắn của một conservation (bắt buộc Bearer token, kiểm tra sở hữu)."""
-    user_id = _require_user_id(db, authorization)
-    conversation = ConversationService.get_conversation(db, conversation_id)
+    """
+    Lấy chi tiết tin nhắn của một conservation (bắt buộc Bearer token, kiểm tra sở hữu).
+
+    ``fields`` chọn cột trả về (chỉ cột được chọn mới được đọc từ DB), ví dụ ``fields=role,message``;
+    ``analysis`` và ``latency_ms`` chỉ trả về khi được yêu cầu.
+    """
+    selected = _parse_fields(fields, DETAIL_FIELDS + DETAIL_OPTIONAL_FIELDS, DETAIL_FIELDS)
+    user_id = await _require_user_id(db, authorization)
+    conversation = await AsyncConversationService.get_conversation(db, conversation_id)
     if not conversation or conversation.user_id != user_id:
         # Không tiết lộ tồn tại nếu không sở hữu
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return ConversationService.list_details(db, conversation_id)
+    # Hội thoại dài có hàng trăm tin nhắn: đọc thẳng các cột cần thiết thay vì validate từng ORM object
+    return FastJSONResponse(await AsyncConversationService.list_detail_rows(db, conversation_id, selected))
 
 
 @router.delete("/conservations/{conversation_id}", status_code=204, response_class=Response)
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: str = Header(...),
 ) -> Response:
     """
     Xóa một conservation cùng toàn bộ tin nhắn (yêu cầu Bearer token và phải thuộc user).
     """
-    user_id = _require_user_id(db, authorization)
-    conversation = ConversationService.get_conversation(db, conversation_id)
+    user_id = await _require_user_id(db, authorization)
+    conversation = await AsyncConversationService.get_conversation(db, conversation_id)
     if not conversation or conversation.user_id != user_id:
         # Không tiết lộ nếu không sở hữu
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    ok = ConversationService.delete_conversation(db, conversation_id)
+    ok = await AsyncConversationService.delete_conversation(db, conversation_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Conversation not found")
     # Explicitly return an empty 204 response to satisfy FastAPI validation
@@ -1,12 +1,22 @@
 """Neo4j graph insights endpoints."""
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from services.neo4j_exec import connect_neo4j
+from services.graph_export import iter_nodes_ndjson, iter_relationships_ndjson
+from services.graph_explorer import (
+    GRAPH_EXPAND_DEFAULT_FANOUT,
+    GRAPH_EXPAND_MAX_DEPTH,
+    GRAPH_EXPAND_MAX_NODES,
+    GraphExplorer,
+)
+from services.graph_summary_cache import GraphSummaryCache
+from services.neo4j_exec import connect_neo4j, execute_read, quote_identifier
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
 # Alias router for admin namespace (same handlers)
@@ -18,6 +28,11 @@ class LabelStat(BaseModel):
     count: int
 
 
+class RelationshipTypeStat(BaseModel):
+    type: str
+    count: int
+
+
 class GraphPreviewNode(BaseModel):
     id: int
     labels: List[str]
@@ -38,25 +53,46 @@ class GraphSummaryResponse(BaseModel):
     node_count: int
     relationship_count: int
     relationship_types: List[str]
+    relationship_type_counts: List[RelationshipTypeStat] = []
     labels: List[LabelStat]
     sample: Optional[GraphPreview] = None
+    generated_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+    stale: bool = False
+    graph_version: Optional[str] = None
 
 
-SUMMARY_QUERY = """
-MATCH (n)
-WITH count(n) AS node_count
-MATCH ()-[r]->()
-WITH node_count, count(r) AS relationship_count, collect(DISTINCT type(r)) AS relationship_types
-RETURN node_count, relationship_count, relationship_types
-"""
+class NeighborhoodNode(BaseModel):
+    id: str
+    labels: List[str]
+    caption: Optional[str] = None
+    hop: int
+
+
+class NeighborhoodRelationship(BaseModel):
+    id: str
+    type: str
+    source_id: str
+    target_id: str
+
+
+class NeighborhoodResponse(BaseModel):
+    root_id: str
+    degree: int
+    nodes: List[NeighborhoodNode]
+    relationships: List[NeighborhoodRelationship]
+    truncated: bool
+    cached: bool
 
-LABEL_STATS_QUERY = """
-MATCH (n)
-UNWIND labels(n) AS label
-RETURN label, count(*) AS count
-ORDER BY count DESC
-LIMIT 25
-"""
+
+# Every statistic below is answered from Neo4j's count store: totals and
+# per-label / per-type counts with a literal label or type are O(1), so the
+# summary cost no longer grows with graph size.
+NODE_COUNT_QUERY = "MATCH (n) RETURN count(n) AS count"
+RELATIONSHIP_COUNT_QUERY = "MATCH ()-[r]->() RETURN count(r) AS count"
+LABELS_QUERY = "CALL db.labels() YIELD label RETURN label"
+RELATIONSHIP_TYPES_QUERY = "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+LABEL_STATS_LIMIT = 25
 
 SAMPLE_GRAPH_QUERY = """
 MATCH (n)-[r]->(m)
@@ -67,6 +103,24 @@ LIMIT 50
 """
 
 
+def build_label_count_query(labels: List[str]) -> tuple[str, Dict[str, Any]]:
+    """One UNION ALL query with a count-store lookup per label."""
+    parts = [
+        f"MATCH (n:{quote_identifier(label)}) RETURN $label_{i} AS label, count(n) AS count"
+        for i, label in enumerate(labels)
+    ]
+    return "\nUNION ALL\n".join(parts), {f"label_{i}": label for i, label in enumerate(labels)}
+
+
+def build_relationship_count_query(rel_types: List[str]) -> tuple[str, Dict[str, Any]]:
+    """One UNION ALL query with a count-store lookup per relationship type."""
+    parts = [
+        f"MATCH ()-[r:{quote_identifier(rel_type)}]->() RETURN $type_{i} AS type, count(r) AS count"
+        for i, rel_type in enumerate(rel_types)
+    ]
+    return "\nUNION ALL\n".join(parts), {f"type_{i}": rel_type for i, rel_type in enumerate(rel_types)}
+
+
 def _get_driver(request: Request):
     driver = getattr(request.app.state, "driver", None)
     if driver:
@@ -82,10 +136,7 @@ def _get_driver(request: Request):
 
 
 def _run_query(driver, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-    params = params or {}
-    with driver.session() as session:
-        result = session.run(cypher, params)
-        return [record.data() for record in result]
+    return execute_read(driver, cypher, params)
 
 
 def _build_sample(records: List[Dict[str, Any]]) -> Optional[GraphPreview]:
@@ -110,40 +161,166 @@ def _build_sample(records: List[Dict[str, Any]]) -> Optional[GraphPreview]:
     return GraphPreview(nodes=list(nodes.values()), relationships=relationships)
 
 
+def compute_graph_counts(driver) -> Dict[str, Any]:
+    """Node/relationship totals and per-label/per-type counts from the count store."""
+    node_rows = _run_query(driver, NODE_COUNT_QUERY)
+    rel_rows = _run_query(driver, RELATIONSHIP_COUNT_QUERY)
+    if not node_rows or not rel_rows:
+        raise RuntimeError("Cannot retrieve graph summary")
+
+    labels = [row["label"] for row in _run_query(driver, LABELS_QUERY)]
+    label_stats: List[LabelStat] = []
+    if labels:
+        cypher, params = build_label_count_query(labels)
+        label_stats = [LabelStat(label=row["label"], count=row["count"]) for row in _run_query(driver, cypher, params)]
+    label_stats = sorted((stat for stat in label_stats if stat.count), key=lambda stat: stat.count, reverse=True)
+
+    rel_types = [row["relationshipType"] for row in _run_query(driver, RELATIONSHIP_TYPES_QUERY)]
+    type_counts: List[RelationshipTypeStat] = []
+    if rel_types:
+        cypher, params = build_relationship_count_query(rel_types)
+        type_counts = [RelationshipTypeStat(type=row["type"], count=row["count"]) for row in _run_query(driver, cypher, params)]
+    type_counts = sorted((t for t in type_counts if t.count), key=lambda t: t.count, reverse=True)
+
+    return {
+        "node_count": node_rows[0]["count"],
+        "relationship_count": rel_rows[0]["count"],
+        "relationship_types": [t.type for t in type_counts],
+        "relationship_type_counts": [t.model_dump() for t in type_counts],
+        "labels": [label.model_dump() for label in label_stats[:LABEL_STATS_LIMIT]],
+    }
+
+
+def _compute_summary(driver) -> Dict[str, Any]:
+    """Run the statistics queries; called by the background refresher, not per request."""
+    counts = compute_graph_counts(driver)
+
+    sample_rows = _run_query(driver, SAMPLE_GRAPH_QUERY)
+    sample = _build_sample(sample_rows)
+
+    return {**counts, "sample": sample.model_dump() if sample else None}
+
+
+def get_summary_cache(app, driver) -> GraphSummaryCache:
+    """Return the app-wide summary cache, creating (and starting) it on first use."""
+    cache = getattr(app.state, "graph_summary_cache", None)
+    if cache is None:
+        cache = GraphSummaryCache(driver, _compute_summary)
+        cache.start()
+        app.state.graph_summary_cache = cache
+    return cache
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @router.get("/summary", response_model=GraphSummaryResponse)
-def graph_summary(request: Request) -> GraphSummaryResponse:
-    """Thống kê nhanh Neo4j: số node, số edge, loại quan hệ, nhãn phổ biến và mẫu subgraph nhỏ."""
+def graph_summary(request: Request, response: Response) -> GraphSummaryResponse:
+    """Thống kê nhanh Neo4j: số node, số edge, loại quan hệ, nhãn phổ biến và mẫu subgraph nhỏ.
+
+    Dữ liệu được tính sẵn trong nền và phục vụ từ bộ nhớ; hỗ trợ ETag/If-None-Match.
+    """
     driver = _get_driver(request)
+    cache = get_summary_cache(request.app, driver)
 
     try:
-        summary_rows = _run_query(driver, SUMMARY_QUERY)
-        if not summary_rows:
-            raise HTTPException(status_code=503, detail="Cannot retrieve graph summary")
-        summary = summary_rows[0]
-
-        label_rows = _run_query(driver, LABEL_STATS_QUERY)
-        labels = [LabelStat(label=row["label"], count=row["count"]) for row in label_rows]
-
-        sample_rows = _run_query(driver, SAMPLE_GRAPH_QUERY)
-        sample = _build_sample(sample_rows)
-
-        return GraphSummaryResponse(
-            node_count=summary.get("node_count", 0),
-            relationship_count=summary.get("relationship_count", 0),
-            relationship_types=summary.get("relationship_types", []),
-            labels=labels,
-            sample=sample,
-        )
-    except HTTPException:
-        raise
+        cached = cache.get()
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Neo4j query failed: {exc}",
         ) from exc
 
+    age = cached.age_seconds()
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"private, max-age={max(0, int(cache.refresh_seconds - age))}",
+        "Last-Modified": cached.generated_at.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+    }
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    return GraphSummaryResponse(
+        **cached.payload,
+        generated_at=cached.generated_at,
+        age_seconds=round(age, 3),
+        stale=cache.is_stale(cached),
+        graph_version=cached.graph_version,
+    )
+
 
 @admin_router.get("/summary", response_model=GraphSummaryResponse)
-def admin_graph_summary(request: Request) -> GraphSummaryResponse:
+def admin_graph_summary(request: Request, response: Response) -> GraphSummaryResponse:
     """Alias admin endpoint trả về thống kê đồ thị Neo4j."""
-    return graph_summary(request)
+    return graph_summary(request, response)
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@router.get("/export/nodes", response_class=StreamingResponse)
+def export_nodes(
+    request: Request,
+    label: Optional[List[str]] = Query(None, description="Lọc theo nhãn (lặp lại tham số để chọn nhiều nhãn)"),
+    limit: Optional[int] = Query(None, ge=1, description="Giới hạn số dòng (mặc định: tất cả)"),
+) -> StreamingResponse:
+    """Xuất node dạng NDJSON theo luồng từ một truy vấn duy nhất; dòng cuối ``summary`` chứa số dòng."""
+    driver = _get_driver(request)
+    return StreamingResponse(
+        iter_nodes_ndjson(driver, labels=label, limit=limit),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.get("/export/relationships", response_class=StreamingResponse)
+def export_relationships(
+    request: Request,
+    type: Optional[List[str]] = Query(None, description="Lọc theo loại quan hệ"),
+    label: Optional[List[str]] = Query(None, description="Chỉ lấy quan hệ giữa các node có nhãn này"),
+    limit: Optional[int] = Query(None, ge=1, description="Giới hạn số dòng (mặc định: tất cả)"),
+) -> StreamingResponse:
+    """Xuất quan hệ dạng NDJSON theo luồng từ một truy vấn duy nhất; dòng cuối ``summary`` chứa số dòng."""
+    driver = _get_driver(request)
+    return StreamingResponse(
+        iter_relationships_ndjson(driver, rel_types=type, labels=label, limit=limit),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+def _get_explorer(request: Request) -> GraphExplorer:
+    explorer = getattr(request.app.state, "graph_explorer", None)
+    if explorer is None:
+        explorer = GraphExplorer(_get_driver(request))
+        request.app.state.graph_explorer = explorer
+    return explorer
+
+
+@router.get("/nodes/{node_id}/neighborhood", response_model=NeighborhoodResponse)
+def node_neighborhood(
+    request: Request,
+    node_id: str,
+    depth: int = Query(1, ge=1, le=GRAPH_EXPAND_MAX_DEPTH),
+    fanout: Optional[List[int]] = Query(
+        None, description="Số quan hệ tối đa mỗi node theo từng hop (lặp lại tham số cho từng hop)"
+    ),
+    type: Optional[List[str]] = Query(None, description="Chỉ mở rộng theo các loại quan hệ này"),
+    max_nodes: int = Query(200, ge=1, le=GRAPH_EXPAND_MAX_NODES),
+) -> NeighborhoodResponse:
+    """Mở rộng lân cận k-hop của một node (theo elementId) với giới hạn fan-out và tổng số node."""
+    fanouts = list(fanout or [])
+    fanouts += [fanouts[-1] if fanouts else GRAPH_EXPAND_DEFAULT_FANOUT] * (depth - len(fanouts))
+    try:
+        neighborhood = _get_explorer(request).expand(node_id, fanouts[:depth], rel_types=type, max_nodes=max_nodes)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Neo4j query failed: {exc}",
+        ) from exc
+    if neighborhood is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Node not found")
+    return NeighborhoodResponse(**neighborhood.__dict__)
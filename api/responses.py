@@ -0,0 +1,30 @@
+"""orjson response class for payloads the services already build as plain JSON data."""
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+
+def _fallback(value: Any) -> Any:
+    # Anything orjson can't encode natively (e.g. driver value types) goes through FastAPI's encoder.
+    return jsonable_encoder(value)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse with a jsonable_encoder fallback for unknown types.
+
+    Used as the app's default response class. Endpoints on hot paths return
+    it directly with dicts built from trusted service output, which skips
+    FastAPI's response_model validation and serialization pass; the
+    response_model then only documents the shape in OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_fallback,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
@@ -1,20 +1,47 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from services import connect_neo4j, read_schema_snapshot
-from services.database import init_db
-from services.chatbot_service import ChatbotService
+from services import SchemaIntrospector, connect_neo4j
+from services.async_database import close_async_db
+from services.database import close_db, init_db, pool_stats
+from services.chat_analytics import CHAT_ANALYTICS_ENABLED, ChatAnalyticsAggregator
+from services.partitioning import PartitionMaintainer
+from services.retention import RETENTION_ENABLED, RetentionJob
+from services.chatbot_service import DEFAULT_SYSTEM_PROMPT, ChatbotService
+from services.graph_snapshot import GRAPH_SNAPSHOT_ENABLED, GraphSnapshotManager
+from services.hashing_pool import HashingPoolFull, hashing_pool
+from services.message_search import check_backfill
+from services.neo4j_exec import neo4j_metrics
+from services.precomputed_answers import PRECOMPUTED_ANSWERS_ENABLED, PrecomputedAnswerStore
+from services.prompt_registry import get_prompt_registry
+from services.retrieval import RETRIEVAL_ENABLED, RetrievalIndex
+from services.startup import APP_LAZY_INIT, APP_WARMUP, StartupReport, warm_db_pool, warm_neo4j
+from .admin_routes import router as admin_router
+from .compression import COMPRESSION_ENABLED, CompressionMiddleware
+from .responses import FastJSONResponse
 from .user_routes import router as user_router
 from .chatbot_routes import router as chatbot_router
-from .graph_routes import router as graph_router, admin_router as graph_admin_router
+from .graph_routes import router as graph_router, admin_router as graph_admin_router, get_summary_cache
+
+startup_report = StartupReport(origin=_IMPORT_STARTED)
+startup_report.record("import.app_modules", _IMPORT_STARTED)
 
 TAGS_METADATA = [
     {"name": "users", "description": "Đăng ký, đăng nhập và quản lý người dùng"},
     {"name": "chatbot", "description": "Hỏi đáp tư vấn du học/visa (Gemini + Neo4j)"},
     {"name": "graph", "description": "Thống kê và sơ đồ Neo4j"},
     {"name": "system", "description": "Kiểm tra sức khỏe hệ thống và xem schema Neo4j"},
+    {"name": "admin", "description": "Báo cáo vận hành dành cho quản trị viên (yêu cầu role admin)"},
 ]
 
 APP_DESCRIPTION = (
@@ -27,6 +54,7 @@ app = FastAPI(
     version="1.0.0",
     description=APP_DESCRIPTION,
     openapi_tags=TAGS_METADATA,
+    default_response_class=FastJSONResponse,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -35,38 +63,144 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
 
 # Include user routes
 app.include_router(user_router)
 app.include_router(chatbot_router)
 app.include_router(graph_router)
 app.include_router(graph_admin_router)
+app.include_router(admin_router)
 
-@app.on_event("startup")
-def _startup() -> None:
-    # Initialize database tables
-    init_db()
-    
-    # Initialize chatbot service (Gemini + Neo4j)
-    try:
-        driver = connect_neo4j()
-        app.state.chatbot_service = ChatbotService(driver=driver)
-        app.state.schema_text = read_schema_snapshot(driver)
+@app.exception_handler(HashingPoolFull)
+def _hashing_pool_full(request: Request, exc: HashingPoolFull) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def _initialize(app: FastAPI) -> None:
+    """Initialize Postgres, Neo4j, schema and chatbot concurrently, recording timings."""
+    report = app.state.startup_report
+    with ThreadPoolExecutor(max_workers=6, thread_name_prefix="startup") as pool:
+        futures = [pool.submit(report.run, "postgres.init_db", init_db)]
+        if APP_WARMUP:
+            futures.append(pool.submit(report.run, "postgres.warmup", warm_db_pool))
+
+        # Creating the driver is local; network work happens in the steps below.
+        driver = report.run("neo4j.driver", connect_neo4j)
         app.state.driver = driver
-    except Exception as exc:  # pragma: no cover - depends on env
+        app.state.schema_introspector = SchemaIntrospector(driver)
+        futures.append(pool.submit(report.run, "neo4j.schema", app.state.schema_introspector.refresh))
+        if driver:
+            if APP_WARMUP:
+                futures.append(pool.submit(report.run, "neo4j.warmup", warm_neo4j, driver))
+            else:
+                futures.append(pool.submit(report.run, "neo4j.verify", driver.verify_connectivity))
+        # Opens the persisted index; syncing with the graph happens in the background.
+        app.state.retrieval_index = RetrievalIndex(driver) if driver and RETRIEVAL_ENABLED else None
+        if app.state.retrieval_index:
+            futures.append(pool.submit(report.run, "retrieval.load", app.state.retrieval_index.load))
+        app.state.graph_snapshot = GraphSnapshotManager(driver) if driver and GRAPH_SNAPSHOT_ENABLED else None
+        if app.state.graph_snapshot:
+            futures.append(pool.submit(report.run, "graph_snapshot.load", app.state.graph_snapshot.refresh))
+        app.state.precomputed_answers = (
+            PrecomputedAnswerStore(driver) if driver and PRECOMPUTED_ANSWERS_ENABLED else None
+        )
+        if app.state.precomputed_answers:
+            futures.append(pool.submit(report.run, "precomputed.load", app.state.precomputed_answers.refresh))
+
         # Keep server running even if chatbot init fails (e.g., missing keys)
-        app.state.chatbot_service = None
-        print(f"[startup] Chatbot service not initialized: {exc!r}")
+        chatbot_future = pool.submit(
+            report.run,
+            "chatbot.init",
+            ChatbotService,
+            driver=driver,
+            schema=app.state.schema_introspector,
+            retrieval=app.state.retrieval_index,
+            snapshot=app.state.graph_snapshot,
+            precomputed=app.state.precomputed_answers,
+        )
+        for future in futures:
+            future.result()
+        app.state.chatbot_service = chatbot_future.result()
+
+    app.state.schema_introspector.start()
+    if app.state.retrieval_index:
+        app.state.retrieval_index.start()
+    if app.state.graph_snapshot:
+        app.state.graph_snapshot.start()
+    if app.state.precomputed_answers:
+        app.state.precomputed_answers.start()
+    # Backfilling search vectors is a one-off CLI step; only remind about it here.
+    if not report.failed("postgres.init_db"):
+        report.run("postgres.search_backfill_check", check_backfill)
+    # Rollups read only the tables created by init_db, so this starts after it.
+    app.state.chat_analytics = ChatAnalyticsAggregator() if CHAT_ANALYTICS_ENABLED else None
+    if app.state.chat_analytics:
+        app.state.chat_analytics.start()
+    app.state.retention = RetentionJob() if RETENTION_ENABLED else None
+    if app.state.retention:
+        app.state.retention.start()
+    # init_db already created this month's partitions; this keeps creating (and archiving) as months pass.
+    app.state.partition_maintainer = PartitionMaintainer() if not report.failed("postgres.init_db") else None
+    if app.state.partition_maintainer:
+        app.state.partition_maintainer.start()
+    # Precompute the graph summary in the background so polls are served from memory
+    if driver:
+        get_summary_cache(app, driver)
+    report.mark_ready()
+
 
-    # Provide safe defaults so /schema remains available even if init fails
-    app.state.schema_text = getattr(app.state, "schema_text", None) or "Schema unavailable"
-    app.state.driver = getattr(app.state, "driver", None) or connect_neo4j()
+@app.on_event("startup")
+def _startup() -> None:
+    app.state.startup_report = startup_report
+    app.state.chatbot_service = None
+    if APP_LAZY_INIT:
+        # Start accepting traffic immediately; /health/ready flips once init completes.
+        threading.Thread(target=_initialize, args=(app,), name="app-init", daemon=True).start()
+    else:
+        _initialize(app)
 
 @app.on_event("shutdown")
-def _shutdown() -> None:
+async def _shutdown() -> None:
+    summary_cache = getattr(app.state, "graph_summary_cache", None)
+    if summary_cache:
+        summary_cache.stop()
+    introspector = getattr(app.state, "schema_introspector", None)
+    if introspector:
+        introspector.stop()
+    retrieval_index = getattr(app.state, "retrieval_index", None)
+    if retrieval_index:
+        retrieval_index.stop()
+    graph_snapshot = getattr(app.state, "graph_snapshot", None)
+    if graph_snapshot:
+        graph_snapshot.stop()
+    chat_analytics = getattr(app.state, "chat_analytics", None)
+    if chat_analytics:
+        chat_analytics.stop()
+    retention = getattr(app.state, "retention", None)
+    if retention:
+        retention.stop()
+    partition_maintainer = getattr(app.state, "partition_maintainer", None)
+    if partition_maintainer:
+        partition_maintainer.stop()
+    precomputed_answers = getattr(app.state, "precomputed_answers", None)
+    if precomputed_answers:
+        # Flushes pending serve counts.
+        precomputed_answers.stop()
+    chatbot = getattr(app.state, "chatbot_service", None)
+    if chatbot:
+        # Drop provider-side cached contents instead of leaving them to expire.
+        chatbot.llm.close()
     driver = getattr(app.state, "driver", None)
     if driver:
         driver.close()
+    hashing_pool.shutdown()
+    close_db()
+    await close_async_db()
 
 @app.get("/", include_in_schema=False)
 def root() -> dict[str, str]:
@@ -78,7 +212,77 @@ def health():
     """Lightweight health check to verify the API is running."""
     return {"status": "ok"}
 
+@app.get("/health/live", tags=["system"])
+def health_live():
+    """Liveness: the process is up and serving requests (no dependency checks)."""
+    return {"status": "ok"}
+
+@app.get("/health/ready", tags=["system"])
+def health_ready():
+    """Readiness: khởi tạo đã xong và PostgreSQL sẵn sàng; trả 503 nếu chưa."""
+    ready = startup_report.ready and not startup_report.failed("postgres.init_db")
+    body = {
+        "status": "ready" if ready else "starting",
+        "chatbot": getattr(app.state, "chatbot_service", None) is not None,
+        "neo4j": getattr(app.state, "driver", None) is not None
+        and not (startup_report.failed("neo4j.verify") or startup_report.failed("neo4j.warmup")),
+    }
+    return JSONResponse(status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+
+@app.get("/health/startup", tags=["system"])
+def health_startup():
+    """Báo cáo thời gian khởi động theo từng bước (ms, tính từ lúc import ứng dụng)."""
+    return startup_report.as_dict()
+
+@app.get("/health/db", tags=["system"])
+def health_db():
+    """Trạng thái connection pool PostgreSQL (primary/replica) và thời gian chờ checkout."""
+    return pool_stats()
+
+@app.get("/health/neo4j", tags=["system"])
+def health_neo4j():
+    """Số liệu transaction đọc Neo4j: đang chạy, retry, lỗi, thời gian chờ pool và cấu hình driver."""
+    return neo4j_metrics.snapshot()
+
+@app.get("/health/llm", tags=["system"])
+def health_llm():
+    """Context caching của Gemini: entry đang dùng, số token được cache và độ trễ trung bình (cached/uncached)."""
+    chatbot = getattr(app.state, "chatbot_service", None)
+    if chatbot is None:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": "Chatbot not initialized"})
+    return chatbot.llm.stats()
+
+@app.get("/health/retrieval", tags=["system"])
+def health_retrieval():
+    """Chỉ mục truy hồi đoạn văn: số đoạn, chế độ tìm kiếm (exact/IVF) và lần đồng bộ gần nhất."""
+    retrieval_index = getattr(app.state, "retrieval_index", None)
+    if retrieval_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **retrieval_index.stats()}
+
+@app.get("/health/graph-snapshot", tags=["system"])
+def health_graph_snapshot():
+    """Snapshot đồ thị trong bộ nhớ: phiên bản dữ liệu, số lần trả lời/fallback và báo cáo dung lượng bộ nhớ."""
+    graph_snapshot = getattr(app.state, "graph_snapshot", None)
+    if graph_snapshot is None:
+        return {"enabled": False}
+    return {"enabled": True, **graph_snapshot.stats()}
+
 @app.get("/schema", tags=["system"])
 def schema():
-    """Trả về snapshot schema Neo4j đã nạp lúc khởi động."""
-    return {"schema": app.state.schema_text}
+    """Trả về snapshot schema Neo4j (triple + thuộc tính theo nhãn) kèm fingerprint nội dung."""
+    introspector = getattr(app.state, "schema_introspector", None)
+    if introspector is None:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": "Starting up"})
+    snapshot = introspector.snapshot
+    return {
+        "schema": snapshot.to_text(),
+        "fingerprint": snapshot.fingerprint,
+        "source": snapshot.source,
+        "generated_at": snapshot.generated_at,
+    }
+
+@app.get("/prompts", tags=["system"])
+def prompts():
+    """Hash và kích thước token (ước lượng) của từng prompt trong prompts/ và system prompt theo intent."""
+    return get_prompt_registry().stats(base=DEFAULT_SYSTEM_PROMPT)
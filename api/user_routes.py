@@ -7,8 +7,9 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 
 from services.auth import create_access_token, decode_token, ACCESS_TOKEN_EXPIRE_MINUTES
-from services.database import get_db
-from services.user_service import UserService
+from services.async_database import get_async_db, get_async_read_db
+from services.principal import Principal, aresolve_principal, build_token_claims, parse_bearer
+from services.user_service import AsyncUserService
 from models.user import (
     UserCreate,
     UserResponse,
@@ -30,8 +31,8 @@ def _validate_password_length(password: str) -> None:
         )
 
 
-def _get_user_from_token(authorization: str, db: Any):
-    """Resolve current user from a Bearer token."""
+async def _get_principal_from_token(authorization: str, db: Any) -> Principal:
+    """Resolve the authenticated principal from a Bearer token (cached)."""
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,34 +40,41 @@ def _get_user_from_token(authorization: str, db: Any):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise ValueError()
-    except ValueError:
+    token = parse_bearer(authorization)
+    if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication scheme",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    payload = decode_token(token)
-    if payload is None:
+    principal = await aresolve_principal(db, token)
+    if principal is None:
+        # Same status codes as before the principal cache: bad token -> 401, deleted user -> 404.
+        payload = decode_token(token)
+        if payload is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if payload.get("uid") is None and payload.get("sub") is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
+    return principal
 
-    email: str | None = payload.get("sub")
-    if email is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    user = UserService.get_user_by_email(db, email)
+async def _get_user_from_token(authorization: str, db: Any):
+    """Resolve current user row from a Bearer token."""
+    principal = await _get_principal_from_token(authorization, db)
+    user = await AsyncUserService.get_user_by_id(db, str(principal.id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,7 +84,7 @@ def _get_user_from_token(authorization: str, db: Any):
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Any = Depends(get_db)) -> UserResponse:
+async def register(user: UserCreate, db: Any = Depends(get_async_db)) -> UserResponse:
     """
     Register a new user.
     
@@ -91,7 +99,7 @@ def register(user: UserCreate, db: Any = Depends(get_db)) -> UserResponse:
         HTTPException: If email or username already exists
     """
     # Check if email already exists
-    existing_email = UserService.get_user_by_email(db, user.email)
+    existing_email = await AsyncUserService.get_user_by_email(db, user.email)
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,7 +107,7 @@ def register(user: UserCreate, db: Any = Depends(get_db)) -> UserResponse:
         )
     
     # Check if username already exists
-    existing_username = UserService.get_user_by_username(db, user.username)
+    existing_username = await AsyncUserService.get_user_by_username(db, user.username)
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -112,7 +120,7 @@ def register(user: UserCreate, db: Any = Depends(get_db)) -> UserResponse:
         if user.password:
             _validate_password_length(user.password)
 
-        db_user = UserService.create_user(db, user)
+        db_user = await AsyncUserService.create_user(db, user)
         return UserResponse.from_orm(db_user)
     except ValueError as e:
         raise HTTPException(
@@ -122,7 +130,7 @@ def register(user: UserCreate, db: Any = Depends(get_db)) -> UserResponse:
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(credentials: LoginRequest, db: Any = Depends(get_db)) -> LoginResponse:
+async def login(credentials: LoginRequest, db: Any = Depends(get_async_db)) -> LoginResponse:
     """
     Login user and return access token.
     
@@ -136,7 +144,7 @@ def login(credentials: LoginRequest, db: Any = Depends(get_db)) -> LoginResponse
     Raises:
         HTTPException: If credentials are invalid
     """
-    user = UserService.authenticate_user(db, credentials.email, credentials.password)
+    user = await AsyncUserService.authenticate_user(db, credentials.email, credentials.password)
     
     if not user:
         raise HTTPException(
@@ -153,7 +161,7 @@ def login(credentials: LoginRequest, db: Any = Depends(get_db)) -> LoginResponse
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data=build_token_claims(user),
         expires_delta=access_token_expires
     )
     
@@ -165,9 +173,9 @@ def login(credentials: LoginRequest, db: Any = Depends(get_db)) -> LoginResponse
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(
+async def get_current_user(
     authorization: str = Header(None),
-    db: Any = Depends(get_db)
+    db: Any = Depends(get_async_db)
 ) -> UserResponse:
     """
     Get current authenticated user information.
@@ -182,12 +190,12 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    user = _get_user_from_token(authorization, db)
+    user = await _get_user_from_token(authorization, db)
     return UserResponse.from_orm(user)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
+async def get_user(user_id: str, db: Any = Depends(get_async_read_db)) -> UserResponse:
     """
     Get user by ID.
     
@@ -201,7 +209,7 @@ def get_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
     Raises:
         HTTPException: If user not found
     """
-    user = UserService.get_user_by_id(db, user_id)
+    user = await AsyncUserService.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -211,7 +219,7 @@ def get_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
 
 
 @router.get("", response_model=list[UserResponse])
-def list_users(skip: int = 0, limit: int = 10, db: Any = Depends(get_db)) -> list[UserResponse]:
+async def list_users(skip: int = 0, limit: int = 10, db: Any = Depends(get_async_read_db)) -> list[UserResponse]:
     """
     List all users with pagination.
     
@@ -223,15 +231,15 @@ def list_users(skip: int = 0, limit: int = 10, db: Any = Depends(get_db)) -> lis
     Returns:
         List of users
     """
-    users = UserService.list_users(db, skip=skip, limit=limit)
+    users = await AsyncUserService.list_users(db, skip=skip, limit=limit)
     return [UserResponse.from_orm(user) for user in users]
 
 
 @router.put("/me", response_model=UserResponse)
-def update_current_user(
+async def update_current_user(
     user_update: UserUpdate,
     authorization: str = Header(None),
-    db: Any = Depends(get_db)
+    db: Any = Depends(get_async_db)
 ) -> UserResponse:
     """
     Update the current authenticated user's information.
@@ -251,8 +259,8 @@ def update_current_user(
         _validate_password_length(user_update.password)
 
     try:
-        user = _get_user_from_token(authorization, db)
-        updated_user = UserService.update_user(db, str(user.id), user_update)
+        principal = await _get_principal_from_token(authorization, db)
+        updated_user = await AsyncUserService.update_user(db, str(principal.id), user_update)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -267,10 +275,10 @@ def update_current_user(
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: str,
     user_update: UserUpdate,
-    db: Any = Depends(get_db)
+    db: Any = Depends(get_async_db)
 ) -> UserResponse:
     """
     Update user information.
@@ -290,7 +298,7 @@ def update_user(
         _validate_password_length(user_update.password)
 
     try:
-        user = UserService.update_user(db, user_id, user_update)
+        user = await AsyncUserService.update_user(db, user_id, user_update)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -305,7 +313,7 @@ def update_user(
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
-def delete_user(user_id: str, db: Any = Depends(get_db)) -> None:
+async def delete_user(user_id: str, db: Any = Depends(get_async_db)) -> None:
     """
     Delete a user.
     
@@ -316,7 +324,7 @@ def delete_user(user_id: str, db: Any = Depends(get_db)) -> None:
     Raises:
         HTTPException: If user not found
     """
-    success = UserService.delete_user(db, user_id)
+    success = await AsyncUserService.delete_user(db, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -325,7 +333,7 @@ def delete_user(user_id: str, db: Any = Depends(get_db)) -> None:
 
 
 @router.post("/{user_id}/deactivate", response_model=UserResponse)
-def deactivate_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
+async def deactivate_user(user_id: str, db: Any = Depends(get_async_db)) -> UserResponse:
     """
     Deactivate a user account.
     
@@ -339,7 +347,7 @@ def deactivate_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
     Raises:
         HTTPException: If user not found
     """
-    user = UserService.deactivate_user(db, user_id)
+    user = await AsyncUserService.deactivate_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -349,11 +357,11 @@ def deactivate_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
 
 
 @router.post("/{user_id}/activate", response_model=UserResponse)
-def activate_user(user_id: str, db: Any = Depends(get_db)) -> UserResponse:
+async def activate_user(user_id: str, db: Any = Depends(get_async_db)) -> UserResponse:
     """
     Activate a user account.
     """
-    user = UserService.activate_user(db, user_id)
+    user = await AsyncUserService.activate_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
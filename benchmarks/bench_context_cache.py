@@ -0,0 +1,80 @@
+"""Benchmark token savings and latency of provider context caching.
+
+Replays answer-formatting calls with the per-intent system prompts from
+prompts/ (about 1.5k tokens each) with caching off and on. By default the
+local stand-in backend is used, with a simulated per-input-token cost; pass
+--gemini to call the real API (needs GOOGLE_API_KEY, incurs cost).
+
+Usage:
+    python benchmarks/bench_context_cache.py --calls 200 --ms-per-1k-tokens 40
+    python benchmarks/bench_context_cache.py --gemini --calls 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.chatbot_service import DEFAULT_SYSTEM_PROMPT  # noqa: E402
+from services.context_cache import ContextCache, GeminiCacheBackend, LocalCacheBackend  # noqa: E402
+from services.prompt_registry import INTENT_PROMPTS, get_prompt_registry  # noqa: E402
+
+QUESTIONS = [
+    "Visa 500 yêu cầu gì?",
+    "Tìm chương trình Master IT tại UNSW",
+    "Chi phí sinh hoạt ở Melbourne khoảng bao nhiêu?",
+    "Lộ trình từ du học đến PR cho ngành Nursing?",
+]
+ROWS = [{"university": "UNSW", "program_name": "Master of IT", "ielts_required": 6.5, "url": "https://www.unsw.edu.au"}]
+
+
+def _backend(args: argparse.Namespace):
+    if not args.gemini:
+        return LocalCacheBackend(seconds_per_token=args.ms_per_1k_tokens / 1_000_000)
+    from config import GEMINI_MODEL, GOOGLE_API_KEY
+    import google.generativeai as genai
+
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return GeminiCacheBackend(genai, GEMINI_MODEL)
+
+
+def _run(label: str, cache: ContextCache, calls: int) -> None:
+    registry = get_prompt_registry()
+    intents = list(INTENT_PROMPTS)
+    start = time.perf_counter()
+    for i in range(calls):
+        composed = registry.compose(
+            intents[i % len(intents)],
+            f'User question: "{QUESTIONS[i % len(QUESTIONS)]}"\n\nDatabase results:\n{json.dumps(ROWS, ensure_ascii=False)}',
+            base=DEFAULT_SYSTEM_PROMPT,
+        )
+        cache.generate(f"answer:{composed.static.name}", composed.static, composed.dynamic)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+    sent = stats["cached"]["prompt_tokens"] + stats["uncached"]["prompt_tokens"] - stats["cached"]["cached_tokens"]
+    print(
+        f"  {label:<9} {calls / elapsed:8.1f} calls/s  avg={elapsed / calls * 1000:7.1f} ms"
+        f"  uncached input tokens={sent}  cached ratio={stats['cached_token_ratio']:.2%}"
+        f"  caches created={stats['created']}"
+    )
+    cache.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40.0, help="simulated input cost (local backend)")
+    parser.add_argument("--gemini", action="store_true", help="use the real Gemini API instead of the stand-in")
+    args = parser.parse_args()
+
+    print(f"backend={'gemini' if args.gemini else 'local'} calls={args.calls}")
+    _run("no-cache", ContextCache(_backend(args), enabled=False), args.calls)
+    _run("cached", ContextCache(_backend(args), enabled=True), args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare the sync (threadpool) and async (asyncpg) Postgres paths on one workload.
+
+Each simulated request does what the conversation-details endpoint does:
+list a user's conversations, then load the messages of one of them. The sync
+path runs requests on a thread pool like FastAPI does for ``def`` routes; the
+async path runs them as coroutines with the same concurrency.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_db_sync_vs_async.py --requests 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.async_database import close_async_db, get_async_db  # noqa: E402
+from services.conversation_service import AsyncConversationService, ConversationService  # noqa: E402
+from services.database import SessionLocal, init_db  # noqa: E402
+from services.models import Conservation, ConservationDetail, User  # noqa: E402
+
+BENCH_EMAIL = "bench-sync-async@example.com"
+
+
+def _seed(conversations: int, messages: int) -> tuple[int, list[int]]:
+    with SessionLocal() as db:
+        user = db.query(User).filter_by(email=BENCH_EMAIL).one_or_none()
+        if user is None:
+            user = User(email=BENCH_EMAIL, username="bench-sync-async", hashed_password="x", role="user")
+            db.add(user)
+            db.flush()
+            for i in range(conversations):
+                convo = Conservation(user_id=user.id, title=f"bench {i}")
+                db.add(convo)
+                db.flush()
+                db.add_all(
+                    ConservationDetail(conversation_id=convo.id, role="user" if j % 2 == 0 else "assistant", message=f"message {j}")
+                    for j in range(messages)
+                )
+            db.commit()
+        ids = [c.id for c in db.query(Conservation).filter_by(user_id=user.id)]
+        return user.id, ids
+
+
+def _cleanup() -> None:
+    with SessionLocal() as db:
+        user = db.query(User).filter_by(email=BENCH_EMAIL).one_or_none()
+        if user is not None:
+            for convo in db.query(Conservation).filter_by(user_id=user.id):
+                db.delete(convo)
+            db.delete(user)
+            db.commit()
+
+
+def _report(label: str, latencies: list[float], elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000
+    print(f"{label:<6} {len(latencies) / elapsed:9.1f} req/s  p50={p50:6.2f} ms  p95={p95:6.2f} ms")
+
+
+def run_sync(user_id: int, convo_ids: list[int], requests: int, concurrency: int) -> None:
+    latencies: list[float] = []
+
+    def one(i: int) -> None:
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            ConversationService.list_conservations(db, user_id=user_id)
+            ConversationService.list_details(db, convo_ids[i % len(convo_ids)])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    _report("sync", latencies, time.perf_counter() - start)
+
+
+async def run_async(user_id: int, convo_ids: list[int], requests: int, concurrency: int) -> None:
+    latencies: list[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with gate:
+            start = time.perf_counter()
+            async for db in get_async_db():
+                await AsyncConversationService.list_conservations(db, user_id=user_id)
+                await AsyncConversationService.list_details(db, convo_ids[i % len(convo_ids)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    _report("async", latencies, time.perf_counter() - start)
+    await close_async_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    init_db()
+    user_id, convo_ids = _seed(args.conversations, args.messages)
+    try:
+        run_sync(user_id, convo_ids, args.requests, args.concurrency)
+        asyncio.run(run_async(user_id, convo_ids, args.requests, args.concurrency))
+    finally:
+        if not args.keep:
+            _cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark the in-process graph snapshot on the chatbot's query templates.
+
+Builds a synthetic graph shaped like the knowledge graph (universities ->
+program groups -> levels -> programs with exam requirements, visas with
+eligibility groups, settlement categories) and times each template answered
+from the snapshot. Pass --neo4j to also time the same templates as Cypher
+against the configured database (and load the snapshot from it instead).
+
+Usage:
+    python benchmarks/bench_graph_snapshot.py --universities 200 --programs 20 --iterations 2000
+    python benchmarks/bench_graph_snapshot.py --neo4j --iterations 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.chatbot_service import QUERY_TEMPLATES  # noqa: E402
+from services.graph_snapshot import GraphSnapshot  # noqa: E402
+
+LEVELS = ["Undergraduate", "Postgraduate"]
+SUBJECTS = ["Information Technology", "Nursing", "Engineering", "Business", "Education", "Data Science"]
+VISAS = ["500", "485", "189", "190", "491", "600"]
+SETTLEMENT = ["Housing", "Healthcare", "Employment", "Transport", "Banking"]
+
+
+def _synthetic(universities: int, programs: int, seed: int = 0) -> Tuple[list, list]:
+    rng = random.Random(seed)
+    nodes: List[Tuple[str, List[str], Dict[str, Any]]] = []
+    rels: List[Tuple[str, str, str]] = []
+
+    def node(label: str, **props: Any) -> str:
+        element_id = f"n{len(nodes)}"
+        nodes.append((element_id, [label], props))
+        return element_id
+
+    ielts = node("Exam", name="IELTS")
+    pte = node("Exam", name="PTE")
+    subjects = [node("Subject", name=name) for name in SUBJECTS]
+    for u in range(universities):
+        university = node("University", name=f"University {u}")
+        group = node("ProgramGroup", name=f"Programs {u}")
+        rels.append((university, "HAS_PROGRAMS", group))
+        for level_name in LEVELS:
+            level = node("ProgramLevel", name=level_name)
+            rels.append((group, "HAS_LEVEL", level))
+            for p in range(programs):
+                program = node(
+                    "Program",
+                    name=f"{level_name} {SUBJECTS[p % len(SUBJECTS)]} {u}-{p}",
+                    url=f"https://example.edu/{u}/{level_name.lower()}/{p}",
+                    starting_months=["February", "July"],
+                )
+                rels.append((level, "OFFERS", program))
+                rels.append((program, "FOCUSES_ON", subjects[p % len(subjects)]))
+                for exam, score in ((ielts, rng.choice([6.0, 6.5, 7.0, 7.5])), (pte, rng.choice([50, 58, 65]))):
+                    exam_score = node("ExamScore", value=score)
+                    rels.append((exam, "HAS_SCORE", exam_score))
+                    rels.append((program, "HAS_REQUIRED", exam_score))
+    for subclass in VISAS:
+        visa = node("Visa", subclass=subclass, name_visa=f"Visa {subclass}", url=f"https://immi.example/{subclass}")
+        for i in range(8):
+            rels.append((visa, "HAS_ABOUT_INFO", node("AboutInfo", field=f"field {i}", content="lorem ipsum " * 20)))
+        for g in range(4):
+            group = node("EligibilityGroup", group_key=f"group_{g}")
+            rels.append((visa, "HAS_ELIGIBILITY_GROUP", group))
+            for r in range(5):
+                rels.append((group, "HAS_REQUIREMENT", node("EligibilityRequirement", key=f"req_{r}", content="dolor " * 30)))
+    for name in SETTLEMENT:
+        category = node("SettlementCategory", name=name)
+        for t in range(4):
+            task = node("SettlementTaskGroup", name=f"{name} task {t}")
+            rels.append((category, "HAS_GROUP", task))
+            for s in range(6):
+                page = node("SettlementPage", title=f"{name} page {t}-{s}", url=f"https://settle.example/{name}/{t}/{s}")
+                rels.append((task, "CONTAINS_SETTLEMENT_PAGE", page))
+    return nodes, rels
+
+
+WORKLOAD: List[Tuple[str, Dict[str, Any]]] = [
+    ("find_programs_by_university", {"university_name": "University 7", "level": "Postgraduate"}),
+    ("find_programs_by_ielts", {"max_score": 6.5}),
+    ("visa_info", {"subclass": "500"}),
+    ("visa_eligibility", {"subclass": "189"}),
+    ("settlement_info", {"keyword": "health"}),
+    ("comprehensive_pathway", {"field": "nursing"}),
+]
+
+
+def _time(fn: Callable[[], Any], iterations: int) -> Tuple[float, float, int]:
+    rows = fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))], len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--universities", type=int, default=200)
+    parser.add_argument("--programs", type=int, default=20, help="programs per level per university")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--neo4j", action="store_true", help="load from and compare against the configured Neo4j")
+    args = parser.parse_args()
+
+    driver = None
+    if args.neo4j:
+        from services.neo4j_exec import connect_neo4j, execute_read
+
+        driver = connect_neo4j()
+        snapshot = GraphSnapshot.load(driver)
+    else:
+        snapshot = GraphSnapshot.build(*_synthetic(args.universities, args.programs))
+    report = snapshot.memory_report()
+    print(
+        f"nodes={report['nodes']} relationships={report['relationships']} "
+        f"load={snapshot.load_seconds:.2f}s memory={report['bytes']['total'] / 1e6:.1f} MB"
+    )
+    for query_type, params in WORKLOAD:
+        p50, p95, rows = _time(lambda: snapshot.run(query_type, params), args.iterations)
+        line = f"  {query_type:<28} rows={rows:<3} snapshot p50={p50:9.1f} us p95={p95:9.1f} us"
+        if driver:
+            cypher = QUERY_TEMPLATES[query_type]
+            c50, c95, _ = _time(lambda: execute_read(driver, cypher, params), max(args.iterations // 10, 10))
+            line += f"  cypher p50={c50:9.1f} us p95={c95:9.1f} us"
+        print(line)
+    if driver:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark full-scan vs count-store graph statistics on a growing synthetic graph.
+
+Adds synthetic ``:BenchNode`` nodes (spread over several labels) and random
+relationships to the configured Neo4j database in steps, and after each step
+times the old full-scan summary queries against ``compute_graph_counts``.
+The synthetic data is removed at the end unless --keep is given.
+
+Run it against a scratch database: it writes to NEO4J_URI.
+
+Usage:
+    python benchmarks/bench_graph_stats.py --sizes 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.graph_routes import compute_graph_counts  # noqa: E402
+from services.neo4j_exec import connect_neo4j  # noqa: E402
+
+# The pre-count-store queries, kept here for comparison.
+LEGACY_SUMMARY_QUERY = """
+MATCH (n)
+WITH count(n) AS node_count
+MATCH ()-[r]->()
+WITH node_count, count(r) AS relationship_count, collect(DISTINCT type(r)) AS relationship_types
+RETURN node_count, relationship_count, relationship_types
+"""
+
+LEGACY_LABEL_STATS_QUERY = """
+MATCH (n)
+UNWIND labels(n) AS label
+RETURN label, count(*) AS count
+ORDER BY count DESC
+LIMIT 25
+"""
+
+CREATE_NODES = """
+UNWIND range($start, $end - 1) AS i
+CREATE (:BenchNode {bench_id: i, bench_label: i % $labels})
+"""
+
+CREATE_RELS = """
+UNWIND range($start, $end - 1) AS i
+MATCH (a:BenchNode {bench_id: i})
+MATCH (b:BenchNode {bench_id: toInteger(rand() * $end)})
+CREATE (a)-[:BENCH_REL {kind: i % 4}]->(b)
+"""
+
+CLEANUP = """
+MATCH (n:BenchNode)
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+
+def _time(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _grow(driver, current: int, target: int, labels: int, batch: int) -> None:
+    with driver.session() as session:
+        session.run("CREATE INDEX bench_node_id IF NOT EXISTS FOR (n:BenchNode) ON (n.bench_id)").consume()
+        for start in range(current, target, batch):
+            end = min(start + batch, target)
+            session.run(CREATE_NODES, start=start, end=end, labels=labels).consume()
+        # Give each label its own Neo4j label so per-label counts are meaningful.
+        for label in range(labels):
+            session.run(
+                f"MATCH (n:BenchNode) WHERE n.bench_label = $label AND NOT n:BenchL{label} "
+                f"CALL {{ WITH n SET n:BenchL{label} }} IN TRANSACTIONS OF 10000 ROWS",
+                label=label,
+            ).consume()
+        for start in range(current, target, batch):
+            end = min(start + batch, target)
+            session.run(CREATE_RELS, start=start, end=end).consume()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--labels", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    driver = connect_neo4j()
+    if not driver:
+        sys.exit("Neo4j is not configured (NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD)")
+
+    def legacy() -> None:
+        with driver.session() as session:
+            session.run(LEGACY_SUMMARY_QUERY).consume()
+            session.run(LEGACY_LABEL_STATS_QUERY).consume()
+
+    print(f"{'bench nodes':>12} {'full scan ms':>14} {'count store ms':>15} {'speedup':>8}")
+    current = 0
+    try:
+        for size in sorted(args.sizes):
+            _grow(driver, current, size, args.labels, args.batch)
+            current = size
+            legacy_ms = _time(legacy, args.repeats)
+            count_store_ms = _time(lambda: compute_graph_counts(driver), args.repeats)
+            print(f"{size:>12} {legacy_ms:>14.1f} {count_store_ms:>15.1f} {legacy_ms / count_store_ms:>7.1f}x")
+    finally:
+        if not args.keep:
+            with driver.session() as session:
+                session.run(CLEANUP).consume()
+                session.run("DROP INDEX bench_node_id IF EXISTS").consume()
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
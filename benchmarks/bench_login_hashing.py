@@ -0,0 +1,84 @@
+"""Benchmark login (bcrypt verify) throughput at different cost factors.
+
+Compares verifying inline on a request-style thread pool with routing the
+work through the dedicated hashing process pool.
+
+Usage:
+    python benchmarks/bench_login_hashing.py --rounds 10 11 12 13 --logins 64 --threads 40
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passlib.context import CryptContext  # noqa: E402
+
+from services.hashing_pool import HashingPool, HashingPoolFull  # noqa: E402
+
+PASSWORD = "Passw0rd!-benchmark"
+
+
+def _verify(secret: str, hashed: str) -> bool:
+    # passlib reads the cost from the hash itself, so one context serves all rounds.
+    return CryptContext(schemes=["bcrypt"]).verify(secret, hashed)
+
+
+def _run(label: str, logins: int, threads: int, login_fn) -> None:
+    latencies: list[float] = []
+    rejected = 0
+
+    def one_login(_: int) -> None:
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            login_fn()
+        except HashingPoolFull:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as request_threads:
+        list(request_threads.map(one_login, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    ok = len(latencies)
+    p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+    p95 = sorted(latencies)[int(0.95 * (ok - 1))] * 1000 if latencies else 0.0
+    print(
+        f"  {label:<8} {ok / elapsed:8.1f} logins/s  p50={p50:7.1f} ms  p95={p95:7.1f} ms"
+        f"  ok={ok} rejected(429)={rejected}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=40, help="request threads (uvicorn default pool is 40)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=0, help="0 = never reject")
+    args = parser.parse_args()
+
+    max_pending = args.max_pending or args.logins
+    print(f"cores={os.cpu_count()} pool_workers={args.workers} threads={args.threads} logins={args.logins}")
+    for rounds in args.rounds:
+        hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+        print(f"bcrypt rounds={rounds}")
+        _run("inline", args.logins, args.threads, lambda: _verify(PASSWORD, hashed))
+
+        pool = HashingPool(workers=args.workers, max_pending=max_pending)
+        pool.submit(_verify, PASSWORD, hashed).result()  # spawn workers before timing
+        _run("pool", args.logins, args.threads, lambda: pool.submit(_verify, PASSWORD, hashed).result())
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
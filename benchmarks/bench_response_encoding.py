@@ -0,0 +1,157 @@
+"""Benchmark response encoding for the chat and conversation details endpoints.
+
+Compares FastAPI's default path (build the pydantic model, validate against
+response_model, serialize, json.dumps via JSONResponse) with returning a
+FastJSONResponse built from plain dicts, on synthetic payloads shaped like the
+real ones. Also reports gzip/brotli sizes and compression time at the
+middleware's settings.
+
+Usage:
+    python benchmarks/bench_response_encoding.py --results 50 --messages 300 --iterations 2000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from api.chatbot_routes import ChatbotResponse  # noqa: E402
+from api.compression import brotli, compress  # noqa: E402
+from api.responses import FastJSONResponse  # noqa: E402
+from models import ConservationDetailResponse  # noqa: E402
+from services.models import ConservationDetail  # noqa: E402
+
+WORDS = "visa du học định cư chương trình học bổng trường đại học yêu cầu IELTS tài chính hồ sơ".split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _chat_result(rng: random.Random, results: int) -> Dict[str, Any]:
+    return {
+        "analysis": {
+            "intent": "program_search",
+            "query_type": "programs_by_subject",
+            "entities": {"subject": "Information Technology", "level": "Postgraduate", "country": "Australia"},
+            "params": {"subject": "Information Technology", "level": "Postgraduate", "limit": results},
+            "confidence": 0.92,
+            "fallback": False,
+        },
+        "results": [
+            {
+                "university": f"University {i}",
+                "program": _text(rng, 6),
+                "level": "Postgraduate",
+                "duration_years": rng.choice([1, 1.5, 2]),
+                "tuition_aud": rng.randint(25_000, 55_000),
+                "ielts_overall": rng.choice([6.0, 6.5, 7.0]),
+                "campuses": [f"Campus {j}" for j in range(rng.randint(1, 3))],
+            }
+            for i in range(results)
+        ],
+        "answer": _text(rng, 180),
+        "query_type": "programs_by_subject",
+        "conversation_id": 42,
+    }
+
+
+def _details(rng: random.Random, messages: int) -> List[ConservationDetail]:
+    started = datetime.now(timezone.utc) - timedelta(days=3)
+    return [
+        ConservationDetail(
+            id=i + 1,
+            conversation_id=42,
+            role="user" if i % 2 == 0 else "assistant",
+            message=_text(rng, 15 if i % 2 == 0 else 120),
+            created_at=started + timedelta(minutes=i),
+        )
+        for i in range(messages)
+    ]
+
+
+def _time(fn: Callable[[], bytes], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def _default(field: Any, content_fn: Callable[[], Any]) -> Callable[[], bytes]:
+    loop = asyncio.new_event_loop()
+
+    def run() -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=content_fn()))
+        return JSONResponse(content).body
+
+    return run
+
+
+def _report(name: str, default_fn: Callable[[], bytes], fast_fn: Callable[[], bytes], iterations: int) -> None:
+    default_us = _time(default_fn, iterations)
+    fast_us = _time(fast_fn, iterations)
+    body = fast_fn()
+    print(f"{name}: {len(body) / 1024:.1f} KiB JSON")
+    print(f"  default (validate + json.dumps) {default_us:9.1f} us/request")
+    print(f"  FastJSONResponse (orjson)       {fast_us:9.1f} us/request  saves {default_us - fast_us:.1f} us "
+          f"({default_us / fast_us:.1f}x)")
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and brotli is None:
+            print("  br: brotli not installed")
+            continue
+        compressed = compress(body, encoding)
+        compress_us = _time(lambda: compress(body, encoding), max(iterations // 10, 20))
+        print(f"  {encoding:<4} {len(compressed) / 1024:7.1f} KiB ({len(compressed) / len(body):.0%})"
+              f"  +{compress_us:.1f} us to compress")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=50, help="result rows in the chat payload")
+    parser.add_argument("--messages", type=int, default=300, help="messages in the details payload")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    chat = _chat_result(rng, args.results)
+    _report(
+        "POST /api/chatbot/message",
+        _default(create_response_field("chat", ChatbotResponse), lambda: ChatbotResponse(**chat)),
+        lambda: FastJSONResponse(dict(chat)).body,
+        args.iterations,
+    )
+
+    details = _details(rng, args.messages)
+    _report(
+        "GET /api/chatbot/conservations/{id}/details",
+        _default(create_response_field("details", List[ConservationDetailResponse]), lambda: details),
+        lambda: FastJSONResponse([
+            {
+                "id": d.id,
+                "conversation_id": d.conversation_id,
+                "role": d.role,
+                "message": d.message,
+                "created_at": d.created_at,
+            }
+            for d in details
+        ]).body,
+        max(args.iterations // 4, 50),
+    )
+
+
+if __name__ == "__main__":
+    main()
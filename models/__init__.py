@@ -1,7 +1,15 @@
-from models.conversation import ConservationCreate, ConservationResponse, ConservationDetailResponse
+from models.conversation import (
+    ConservationCreate,
+    ConservationResponse,
+    ConservationDetailResponse,
+    MessageSearchHit,
+    MessageSearchResponse,
+)
 
 __all__ = [
 "ConservationCreate",
 "ConservationResponse",
 "ConservationDetailResponse",
+"MessageSearchHit",
+"MessageSearchResponse",
 ]
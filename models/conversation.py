@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -27,6 +27,24 @@ class ConservationDetailResponse(BaseModel):
     role: str
     message: str
     created_at: datetime
+    # Only returned when requested with ``fields``.
+    analysis: Optional[Dict[str, Any]] = None
+    latency_ms: Optional[int] = None
 
     class Config:
         from_attributes = True
+
+
+class MessageSearchHit(BaseModel):
+    id: int
+    conversation_id: int
+    conversation_title: Optional[str]
+    role: str
+    created_at: datetime
+    rank: float
+    snippet: str = Field(..., description="Đoạn trích quanh từ khớp, từ khớp bọc trong <b>...</b>")
+
+
+class MessageSearchResponse(BaseModel):
+    total: int
+    items: List[MessageSearchHit]
@@ -65,4 +65,6 @@ class LoginResponse(BaseModel):
 class TokenData(BaseModel):
     """Token payload data."""
     email: Optional[str] = None
+    uid: Optional[int] = None
+    role: Optional[str] = None
     exp: Optional[int] = None
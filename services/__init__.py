@@ -1,9 +1,10 @@
 from services.neo4j_exec import connect_neo4j, execute_cypher
-from services.schema_reader import read_schema_snapshot
+from services.schema_reader import SchemaIntrospector, read_schema_snapshot
 
 
 __all__ = [
 "connect_neo4j",
 "execute_cypher",
 "read_schema_snapshot",
+"SchemaIntrospector",
 ]
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Async SQLAlchemy (asyncpg) engine and session dependencies.
+
+The engines are created lazily so importing this module does not require
+asyncpg until an async route is actually hit.
+"""
+from __future__ import annotations
+
+import os
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import (
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync PostgreSQL URL to use the asyncpg driver."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return url
+    if scheme in {"postgres", "postgresql", "postgresql+psycopg2", "postgresql+psycopg"}:
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL") or (
+    to_async_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_read_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+_AsyncReadSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def get_async_read_engine() -> AsyncEngine:
+    global _async_read_engine, _AsyncReadSessionLocal
+    if _async_read_engine is None:
+        if ASYNC_DATABASE_REPLICA_URL:
+            _async_read_engine = _create_async_engine(ASYNC_DATABASE_REPLICA_URL)
+        else:
+            _async_read_engine = get_async_engine()
+        _AsyncReadSessionLocal = async_sessionmaker(_async_read_engine, autoflush=False, expire_on_commit=False)
+    return _async_read_engine
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield an AsyncSession on the primary and ensure it's closed after use."""
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of ``get_read_db``: replica if configured, else primary."""
+    get_async_read_engine()
+    async with _AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def close_async_db() -> None:
+    """Dispose the async engines if they were created."""
+    global _async_engine, _async_read_engine
+    if _async_read_engine is not None and _async_read_engine is not _async_engine:
+        await _async_read_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_read_engine = None
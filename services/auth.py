@@ -11,8 +11,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes below the configured cost are flagged by
+# ``needs_update`` and upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
 
 # JWT configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
@@ -71,6 +78,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         ) from e
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return True if the stored hash uses an outdated scheme or cost."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def verify_and_rehash(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if the stored hash is outdated, compute a new one.
+    
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password from database
+        
+    Returns:
+        (matches, new_hash) where new_hash is None unless an upgrade is needed
+    """
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if password_needs_rehash(hashed_password):
+        return True, hash_password(plain_password)
+    return True, None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -0,0 +1,112 @@
+"""Periodic background workers shared by the services.
+
+:class:`BackgroundRefresher` owns the daemon thread, the stop event and the
+``last_error``/``last_run_at`` bookkeeping; subclasses only implement
+``refresh()``. Workers that maintain shared database state set
+``lock_name`` so that with several API processes only one of them runs
+each cycle; in-process caches leave it unset and refresh in every process.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def advisory_lock(bind: Engine, name: str) -> Iterator[bool]:
+    """Try to take the session-level Postgres advisory lock ``name``; yields whether it was acquired.
+
+    Never blocks: a lock held by another process yields False. Always yields
+    True on other databases, which have no cross-process workers to exclude.
+    """
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+    with bind.connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}).scalar()
+        # End the implicit transaction so the idle connection doesn't pin a snapshot while work runs.
+        conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+                conn.commit()
+
+
+class BackgroundRefresher:
+    """Calls ``refresh()`` on a daemon thread every ``interval_seconds`` until stopped."""
+
+    thread_name = "background-refresh"
+    # Refresh once as soon as the thread starts instead of after the first interval.
+    refresh_on_start = False
+    # Postgres advisory lock name; when set, a cycle runs only in the process that holds it.
+    lock_name: Optional[str] = None
+
+    def __init__(self, interval_seconds: float, lock_bind: Optional[Engine] = None) -> None:
+        self.interval_seconds = interval_seconds
+        self.lock_bind = lock_bind
+        self.last_error: Optional[str] = None
+        self.last_run_at: Optional[datetime] = None
+        self.skipped_locked = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Any:
+        raise NotImplementedError
+
+    def can_start(self) -> bool:
+        """False when the worker has nothing to do (e.g. no Neo4j driver)."""
+        return True
+
+    def next_wait(self) -> float:
+        return self.interval_seconds
+
+    def run_once(self) -> bool:
+        """One cycle, under the advisory lock if configured; returns False if skipped or failed."""
+        try:
+            if self.lock_name is None:
+                self.refresh()
+                return True
+            if self.lock_bind is None:
+                from .database import engine
+
+                self.lock_bind = engine
+            with advisory_lock(self.lock_bind, self.lock_name) as acquired:
+                if not acquired:
+                    self.skipped_locked += 1
+                    return False
+                self.refresh()
+                return True
+        except Exception as exc:
+            # refresh() implementations record their own errors; this catches the rest (e.g. the lock query).
+            self.last_error = repr(exc)
+            logger.warning("%s failed: %r", self.thread_name, exc)
+            return False
+
+    def _run(self) -> None:
+        if self.refresh_on_start:
+            self.run_once()
+        while not self._stop.wait(self.next_wait()):
+            self.run_once()
+
+    def start(self) -> None:
+        if not self.can_start() or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
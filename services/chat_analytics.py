@@ -0,0 +1,264 @@
+"""Incremental rollups of chat traffic from persisted assistant turns.
+
+Each assistant message in ``conservation_detail`` carries the pipeline's
+``analysis`` and ``latency_ms``. :class:`ChatAnalyticsAggregator` folds new
+rows (``id`` above a watermark) into hourly and daily tables keyed by intent,
+query_type, fallback flag and latency bucket, plus a daily table of entity
+values. Dashboards read only the rollups, never the raw messages.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from .background import BackgroundRefresher
+from .database import SessionLocal
+from .models import AnalyticsWatermark, ChatEntityRollupDaily, ChatRollupDaily, ChatRollupHourly
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHAT_ANALYTICS_ENABLED = os.getenv("CHAT_ANALYTICS_ENABLED", "true").lower() in {"1", "true", "yes"}
+CHAT_ANALYTICS_INTERVAL_SECONDS = float(os.getenv("CHAT_ANALYTICS_INTERVAL_SECONDS", "60"))
+CHAT_ANALYTICS_BATCH_ROWS = int(os.getenv("CHAT_ANALYTICS_BATCH_ROWS", "50000"))
+# Rows younger than this are left for the next run so transactions that took an
+# id earlier but commit later are not skipped by the watermark.
+CHAT_ANALYTICS_LAG_SECONDS = int(os.getenv("CHAT_ANALYTICS_LAG_SECONDS", "30"))
+# Hour/day boundaries are computed in this zone.
+CHAT_ANALYTICS_TIMEZONE = os.getenv("CHAT_ANALYTICS_TIMEZONE", "Asia/Ho_Chi_Minh")
+
+WATERMARK_NAME = "chat_rollups"
+# Upper bounds (ms) of the latency buckets; anything slower falls in the last one.
+LATENCY_BUCKETS_MS: Tuple[int, ...] = (500, 1000, 2000, 5000, 10000)
+ENTITY_VALUE_MAX_CHARS = 128
+
+
+def _latency_bucket_labels() -> List[str]:
+    labels, lower = [], 0
+    for upper in LATENCY_BUCKETS_MS:
+        labels.append(f"{lower}-{upper}ms")
+        lower = upper
+    labels.append(f">={lower}ms")
+    return labels
+
+
+LATENCY_BUCKET_LABELS = _latency_bucket_labels()
+
+
+def _latency_bucket_sql() -> str:
+    cases = " ".join(
+        f"WHEN d.latency_ms < {upper} THEN '{label}'" for upper, label in zip(LATENCY_BUCKETS_MS, LATENCY_BUCKET_LABELS)
+    )
+    return f"CASE WHEN d.latency_ms IS NULL THEN 'unknown' {cases} ELSE '{LATENCY_BUCKET_LABELS[-1]}' END"
+
+
+_NEW_TURNS = """
+    FROM conservation_detail d
+    WHERE d.id > :low AND d.id <= :high AND d.role = 'assistant' AND d.analysis IS NOT NULL
+"""
+
+
+def _rollup_sql(table: str, unit: str) -> str:
+    return f"""
+    INSERT INTO {table} AS r (bucket_start, intent, query_type, fallback, latency_bucket, turns, latency_ms_sum)
+    SELECT
+        date_trunc('{unit}', d.created_at AT TIME ZONE :tz) AT TIME ZONE :tz,
+        left(coalesce(d.analysis->>'intent', 'unknown'), 64),
+        left(coalesce(d.analysis->>'query_type', 'unknown'), 64),
+        coalesce((d.analysis->>'fallback')::boolean, false),
+        {_latency_bucket_sql()},
+        count(*),
+        coalesce(sum(d.latency_ms), 0)
+    {_NEW_TURNS}
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (bucket_start, intent, query_type, fallback, latency_bucket) DO UPDATE
+    SET turns = r.turns + excluded.turns, latency_ms_sum = r.latency_ms_sum + excluded.latency_ms_sum
+    """
+
+
+# List-valued entities (e.g. several universities in a COMPARE question) count once per value.
+ENTITY_ROLLUP_SQL = f"""
+    INSERT INTO chat_entity_rollup_daily AS r (bucket_start, name, value, turns)
+    SELECT
+        date_trunc('day', d.created_at AT TIME ZONE :tz) AT TIME ZONE :tz,
+        left(e.key, 64),
+        left(coalesce(v.value, e.value) #>> '{{}}', {ENTITY_VALUE_MAX_CHARS}),
+        count(*)
+    FROM conservation_detail d
+    CROSS JOIN LATERAL jsonb_each(
+        CASE WHEN jsonb_typeof(d.analysis->'entities') = 'object' THEN d.analysis->'entities' ELSE '{{}}'::jsonb END
+    ) AS e
+    LEFT JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(e.value) = 'array' THEN e.value ELSE '[]'::jsonb END
+    ) AS v ON true
+    WHERE d.id > :low AND d.id <= :high AND d.role = 'assistant' AND d.analysis IS NOT NULL
+      AND jsonb_typeof(coalesce(v.value, e.value)) NOT IN ('null', 'object', 'array')
+    GROUP BY 1, 2, 3
+    ON CONFLICT (bucket_start, name, value) DO UPDATE SET turns = r.turns + excluded.turns
+    """
+
+# End of the next batch: at most :batch ids past the watermark, and never at or
+# beyond a row that is still within the lag (its neighbours may not be committed).
+UPPER_BOUND_SQL = """
+    SELECT least(
+        (SELECT max(id) FROM (
+            SELECT id FROM conservation_detail WHERE id > :low ORDER BY id LIMIT :batch
+        ) AS batch),
+        (SELECT min(id) - 1 FROM conservation_detail
+         WHERE id > :low AND created_at >= now() - make_interval(secs => :lag))
+    )
+"""
+
+
+class ChatAnalyticsAggregator(BackgroundRefresher):
+    """Background worker that advances the rollups past the watermark.
+
+    Each batch runs in one transaction that locks the watermark row
+    (``FOR UPDATE SKIP LOCKED``), so several app processes can run the worker
+    without double counting: whoever holds the row does the work.
+    """
+
+    thread_name = "chat-analytics"
+    lock_name = "chat-analytics"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval_seconds: float = CHAT_ANALYTICS_INTERVAL_SECONDS,
+        batch_rows: int = CHAT_ANALYTICS_BATCH_ROWS,
+        lag_seconds: int = CHAT_ANALYTICS_LAG_SECONDS,
+        tz: str = CHAT_ANALYTICS_TIMEZONE,
+    ) -> None:
+        super().__init__(interval_seconds)
+        self.session_factory = session_factory
+        self.batch_rows = batch_rows
+        self.lag_seconds = lag_seconds
+        self.tz = tz
+        self.watermark: Optional[int] = None
+
+    def _advance(self, db: Session) -> Optional[int]:
+        """Fold one batch; returns the new watermark, or None if there was nothing to do."""
+        db.execute(
+            text("INSERT INTO analytics_watermark (name, last_id) VALUES (:name, 0) ON CONFLICT (name) DO NOTHING"),
+            {"name": WATERMARK_NAME},
+        )
+        low = db.execute(
+            text("SELECT last_id FROM analytics_watermark WHERE name = :name FOR UPDATE SKIP LOCKED"),
+            {"name": WATERMARK_NAME},
+        ).scalar()
+        if low is None:
+            return None  # another process holds the watermark
+        high = db.execute(
+            text(UPPER_BOUND_SQL), {"low": low, "lag": self.lag_seconds, "batch": self.batch_rows}
+        ).scalar()
+        if high is None or high <= low:
+            return None
+        params = {"low": low, "high": high, "tz": self.tz}
+        db.execute(text(_rollup_sql("chat_rollup_hourly", "hour")), params)
+        db.execute(text(_rollup_sql("chat_rollup_daily", "day")), params)
+        db.execute(text(ENTITY_ROLLUP_SQL), params)
+        db.execute(
+            text("UPDATE analytics_watermark SET last_id = :high, updated_at = now() WHERE name = :name"),
+            {"high": high, "name": WATERMARK_NAME},
+        )
+        self.watermark = high
+        return high
+
+    def refresh(self) -> None:
+        """Catch up in bounded batches, one transaction each."""
+        try:
+            while not self._stop.is_set():
+                with self.session_factory() as db:
+                    advanced = self._advance(db)
+                    db.commit()
+                if advanced is None:
+                    break
+            self.last_run_at = datetime.now(timezone.utc)
+            self.last_error = None
+        except Exception as exc:
+            self.last_error = repr(exc)
+            logger.warning("chat analytics rollup failed: %r", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_run_at": self.last_run_at,
+            "watermark": self.watermark,
+            "last_error": self.last_error,
+        }
+
+
+def read_rollups(
+    db: Session,
+    granularity: str = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    top_entities: int = 20,
+) -> Dict[str, Any]:
+    """Traffic mix from the rollup tables only: per-bucket rows, totals and hot entities."""
+    table = ChatRollupHourly if granularity == "hour" else ChatRollupDaily
+    until = until or datetime.now(timezone.utc)
+    since = since or until - (timedelta(hours=48) if granularity == "hour" else timedelta(days=30))
+
+    rows = db.scalars(
+        select(table)
+        .where(table.bucket_start >= since, table.bucket_start < until)
+        .order_by(table.bucket_start, table.intent, table.query_type)
+    ).all()
+
+    turns = sum(row.turns for row in rows)
+    timed = [row for row in rows if row.latency_bucket != "unknown"]
+    timed_turns = sum(row.turns for row in timed)
+    by_intent: Dict[str, int] = {}
+    by_query_type: Dict[str, int] = {}
+    by_latency: Dict[str, int] = {label: 0 for label in LATENCY_BUCKET_LABELS}
+    for row in rows:
+        by_intent[row.intent] = by_intent.get(row.intent, 0) + row.turns
+        by_query_type[row.query_type] = by_query_type.get(row.query_type, 0) + row.turns
+        by_latency[row.latency_bucket] = by_latency.get(row.latency_bucket, 0) + row.turns
+
+    entities = db.execute(
+        select(ChatEntityRollupDaily.name, ChatEntityRollupDaily.value, func.sum(ChatEntityRollupDaily.turns).label("turns"))
+        .where(ChatEntityRollupDaily.bucket_start >= since, ChatEntityRollupDaily.bucket_start < until)
+        .group_by(ChatEntityRollupDaily.name, ChatEntityRollupDaily.value)
+        .order_by(func.sum(ChatEntityRollupDaily.turns).desc())
+        .limit(top_entities)
+    ).all()
+    watermark = db.get(AnalyticsWatermark, WATERMARK_NAME)
+
+    return {
+        "granularity": granularity,
+        "since": since,
+        "until": until,
+        "totals": {
+            "turns": turns,
+            "fallback_rate": round(sum(r.turns for r in rows if r.fallback) / turns, 4) if turns else 0.0,
+            "avg_latency_ms": round(sum(r.latency_ms_sum for r in timed) / timed_turns, 1) if timed_turns else None,
+            "by_intent": dict(sorted(by_intent.items(), key=lambda kv: -kv[1])),
+            "by_query_type": dict(sorted(by_query_type.items(), key=lambda kv: -kv[1])),
+            "by_latency_bucket": by_latency,
+        },
+        "hot_entities": [{"name": name, "value": value, "turns": int(n)} for name, value, n in entities],
+        "buckets": [
+            {
+                "bucket_start": row.bucket_start,
+                "intent": row.intent,
+                "query_type": row.query_type,
+                "fallback": row.fallback,
+                "latency_bucket": row.latency_bucket,
+                "turns": row.turns,
+                "avg_latency_ms": round(row.latency_ms_sum / row.turns, 1) if row.turns else None,
+            }
+            for row in rows
+        ],
+        "watermark": {
+            "last_id": watermark.last_id if watermark else 0,
+            "updated_at": watermark.updated_at if watermark else None,
+        },
+    }
@@ -2,22 +2,33 @@ from __future__ import annotations
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import lru_cache
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 from neo4j import Driver
 
 from config import GEMINI_MODEL, GOOGLE_API_KEY
-from services.neo4j_exec import connect_neo4j
+from services.cache import TTLCache
+from services.context_cache import ContextCache, GeminiCacheBackend
+from services.graph_snapshot import GraphSnapshotManager
+from services.neo4j_exec import NEO4J_DATABASE, connect_neo4j, execute_read
+from services.retrieval import RetrievalIndex
+from services.precomputed_answers import PrecomputedAnswerStore
+from services.prompt_registry import INTENT_DETECTION_PROMPT, PromptRegistry, PromptTemplate, get_prompt_registry
+from services.schema_reader import SchemaIntrospector
 
 load_dotenv()
 
-SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schema.txt"
-NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+SCHEMA_PROMPT_MAX_CHARS = int(os.getenv("SCHEMA_PROMPT_MAX_CHARS", "4000"))
+GENERATED_CYPHER_CACHE_TTL_SECONDS = float(os.getenv("GENERATED_CYPHER_CACHE_TTL_SECONDS", "3600"))
+# COMPARE/PATHWAY questions fan out into several sub-queries run concurrently.
+CHAT_FANOUT_MAX_WORKERS = int(os.getenv("CHAT_FANOUT_MAX_WORKERS", "4"))
+CHAT_FANOUT_MAX_SUBQUERIES = int(os.getenv("CHAT_FANOUT_MAX_SUBQUERIES", "6"))
+CHAT_FANOUT_ROWS_PER_QUERY = int(os.getenv("CHAT_FANOUT_ROWS_PER_QUERY", "5"))
+MULTI_QUERY_INTENTS = {"COMPARE", "PATHWAY"}
 
 DEFAULT_SYSTEM_PROMPT = (
     "You are an assistant for Australian study, visa, and settlement questions. "
@@ -123,6 +134,81 @@ QUERY_TEMPLATES: Dict[str, str] = {
 }
 
 
+# Static detection instructions; the user question is sent separately so this
+# prefix is identical on every call. prompts/INTENT_ENTITY_DETECTION.txt overrides it.
+INTENT_DETECTION_INSTRUCTIONS = f"""
+Analyze the user's question and return JSON only.
+
+Return format:
+{{
+    "intent": "STUDY|VISA|SETTLEMENT|PATHWAY|COMPARE",
+    "entities": {{
+        "university_name": "...",
+        "level": "Bachelor|Master|Doctor",
+        "field": "...",
+        "exam_type": "IELTS|TOEFL",
+        "score": 6.5,
+        "subclass": "500",
+        "keyword": "..."
+    }},
+    "query_type": "find_programs_by_university|find_programs_by_ielts|visa_info|visa_eligibility|settlement_info|comprehensive_pathway",
+    "sub_queries": [
+        {{"query_type": "...", "params": {{"university_name": "...", "subclass": "..."}}}}
+    ]
+}}
+
+For COMPARE or PATHWAY questions that need several lookups (e.g. two universities, two visa subclasses,
+study then visa), list one entry per lookup in "sub_queries" (at most {CHAT_FANOUT_MAX_SUBQUERIES});
+"entities" then holds only the filters shared by all of them. Otherwise return "sub_queries": [].
+Only output valid JSON, no explanation. Do not include ```json ...``` block format.
+""".strip()
+
+
+CYPHER_INSTRUCTIONS = """
+You are a Cypher expert. Based on the schema and template, create a concise Cypher sentence:
+- Keep the template logic but customize the fields/labels to match the schema.
+- Force LIMIT 5.
+- RETURN only important fields (avoid collecting too many), prioritize name, url/link, score.
+- No explanation; just return a unique Cypher string. Do not include ```cypher ... ``` block.
+""".strip()
+
+
+@dataclass(frozen=True)
+class SubQuery:
+    query_type: str
+    params: Dict[str, Any]
+
+    @property
+    def key(self) -> str:
+        return f"{self.query_type}:{json.dumps(self.params, sort_keys=True, ensure_ascii=False)}"
+
+
+def _compact(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in row.items() if value not in (None, "", [], {})}
+
+
+def merge_comparison(plan: Sequence[SubQuery], results: Sequence[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge per-sub-query rows into one entry per compared subject.
+
+    The subject is built from the params that differ between sub-queries
+    (e.g. the university names), so shared filters are not repeated.
+    Returns an empty list if no sub-query matched anything.
+    """
+    keys = sorted({key for sub in plan for key in sub.params})
+    varying = [key for key in keys if len({json.dumps(sub.params.get(key), default=str) for sub in plan}) > 1]
+    merged = []
+    for sub, rows in zip(plan, results):
+        subject = " / ".join(str(sub.params[key]) for key in varying if sub.params.get(key) is not None)
+        merged.append({
+            "subject": subject or sub.query_type,
+            "query_type": sub.query_type,
+            "found": bool(rows),
+            "rows": [_compact(row) for row in rows[:CHAT_FANOUT_ROWS_PER_QUERY]],
+        })
+    return merged if any(item["found"] for item in merged) else []
+
+
 @dataclass
 class ChatbotResult:
     reply: str
@@ -134,48 +220,65 @@ class ChatbotResult:
 class ChatbotService:
     """Encapsulate chatbot logic for reuse across API and UI."""
 
-    def __init__(self, driver: Optional[Driver] = None) -> None:
+    def __init__(
+        self,
+        driver: Optional[Driver] = None,
+        schema: Optional[SchemaIntrospector] = None,
+        prompts: Optional[PromptRegistry] = None,
+        context_cache: Optional[ContextCache] = None,
+        retrieval: Optional[RetrievalIndex] = None,
+        snapshot: Optional[GraphSnapshotManager] = None,
+        precomputed: Optional[PrecomputedAnswerStore] = None,
+    ) -> None:
         if not GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY is required for chatbot responses.")
 
+        # Imported lazily: google.generativeai is slow to import and only needed here.
+        import google.generativeai as genai
+
         genai.configure(api_key=GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            system_instruction=DEFAULT_SYSTEM_PROMPT,
-        )
+        # Static system instructions are served from Gemini cached content when
+        # GEMINI_CONTEXT_CACHE is on; calls only send their dynamic part.
+        self.llm = context_cache or ContextCache(GeminiCacheBackend(genai, GEMINI_MODEL))
+        self.prompts = prompts or get_prompt_registry()
+        self._default_system = PromptTemplate(name="DEFAULT", text=DEFAULT_SYSTEM_PROMPT)
+        self._cypher_system: Optional[PromptTemplate] = None
         self.driver = driver or connect_neo4j()
-        self.schema_text = self._load_schema_text()
-
-    @staticmethod
-    def _load_schema_text(max_chars: int = 4000) -> str:
-        if SCHEMA_PATH.exists():
-            return SCHEMA_PATH.read_text(encoding="utf-8")[:max_chars]
-        return ""
+        self.schema = schema or SchemaIntrospector(self.driver)
+        # Grounds fallback answers in graph passages; None answers from model knowledge only.
+        self.retrieval = retrieval
+        # Answers the fixed templates in-process; None sends every lookup to Neo4j.
+        self.snapshot = snapshot
+        # Answers mined offline for frequent questions, valid for the current graph version.
+        self.precomputed = precomputed
+        # Keyed by schema fingerprint so a schema change naturally misses.
+        self._cypher_cache: TTLCache[str] = TTLCache(ttl=GENERATED_CYPHER_CACHE_TTL_SECONDS, maxsize=512)
+
+    @property
+    def schema_text(self) -> str:
+        return self.schema.text[:SCHEMA_PROMPT_MAX_CHARS]
+
+    @property
+    def schema_fingerprint(self) -> str:
+        """Key for caches of anything derived from the schema (prompts, generated Cypher)."""
+        return self.schema.fingerprint
+
+    @property
+    def cypher_system(self) -> PromptTemplate:
+        """Cypher-generation instructions plus the schema; rebuilt only when the schema changes."""
+        name = f"CYPHER:{self.schema_fingerprint}"
+        system = self._cypher_system
+        if system is None or system.name != name:
+            schema_hint = self.schema_text or "Schema unavailable"
+            system = PromptTemplate(name=name, text=f"{CYPHER_INSTRUCTIONS}\n\nSchema:\n{schema_hint}")
+            self._cypher_system = system
+        return system
 
     def detect_intent(self, user_query: str) -> Dict[str, Any]:
-        prompt = f"""
-Analyze the question and return JSON only.
-
-User: "{user_query}"
-
-Return format:
-{{
-    "intent": "STUDY|VISA|SETTLEMENT|PATHWAY|COMPARE",
-    "entities": {{
-        "university_name": "...",
-        "level": "Bachelor|Master|Doctor",
-        "field": "...",
-        "exam_type": "IELTS|TOEFL",
-        "score": 6.5,
-        "subclass": "500",
-        "keyword": "..."
-    }},
-    "query_type": "find_programs_by_university|find_programs_by_ielts|visa_info|visa_eligibility|settlement_info|comprehensive_pathway"
-}}
-
-Only output valid JSON, no explanation. Do not include ```json ...``` block format.
-"""
-        response = self.model.generate_content(prompt)
+        system = self.prompts.get(INTENT_DETECTION_PROMPT) or PromptTemplate(
+            name=INTENT_DETECTION_PROMPT, text=INTENT_DETECTION_INSTRUCTIONS
+        )
+        response = self.llm.generate("intent", system, f'User: "{user_query}"')
         print("Intent Detection Response:", response)
         try:
             return json.loads(response.text.strip())
@@ -187,18 +290,59 @@ Only output valid JSON, no explanation. Do not include ```json ...``` block form
             }
 
     def execute_cypher(self, query_type: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        if query_type not in QUERY_TEMPLATES or not self.driver:
+        if query_type not in QUERY_TEMPLATES:
+            return []
+        if self.snapshot:
+            rows = self.snapshot.run(query_type, params)
+            if rows is not None:
+                return rows
+        if not self.driver:
             return []
         try:
             cypher = self.generate_cypher_query(query_type, params) or QUERY_TEMPLATES[query_type]
             print("Executing Cypher Query:", cypher)
-            with self.driver.session(database=NEO4J_DATABASE) as session:
-                result = session.run(cypher, **params)
-                return [record.data() for record in result]
+            return execute_read(self.driver, cypher, params, database=NEO4J_DATABASE)
         except Exception as exc:
             print(f"Error executing cypher for {query_type}: {exc!r}")
             return []
 
+    def plan_queries(self, analysis: Dict[str, Any]) -> List[SubQuery]:
+        """
+        Turn the intent analysis into the list of template lookups to run.
+
+        COMPARE/PATHWAY questions use the planner's ``sub_queries`` (each merged
+        over the shared ``entities``) or, failing that, one lookup per value of
+        a list-valued entity. Everything else is a single lookup.
+        """
+        query_type = analysis.get("query_type") or analysis.get("intent") or "fallback"
+        entities = analysis.get("entities") or {}
+        if analysis.get("intent") not in MULTI_QUERY_INTENTS:
+            return [SubQuery(query_type, entities)]
+
+        shared = {key: value for key, value in entities.items() if not isinstance(value, list)}
+        plan: List[SubQuery] = []
+        for item in analysis.get("sub_queries") or []:
+            if isinstance(item, dict) and item.get("query_type") in QUERY_TEMPLATES:
+                plan.append(SubQuery(item["query_type"], {**shared, **(item.get("params") or {})}))
+        if not plan:
+            list_key = next((key for key, value in entities.items() if isinstance(value, list) and value), None)
+            if list_key is None:
+                return [SubQuery(query_type, entities)]
+            plan = [SubQuery(query_type, {**shared, list_key: value}) for value in entities[list_key]]
+
+        unique = {sub.key: sub for sub in plan}
+        return list(unique.values())[:CHAT_FANOUT_MAX_SUBQUERIES]
+
+    def execute_plan(self, plan: Sequence[SubQuery]) -> List[Dict[str, Any]]:
+        """Run the sub-queries concurrently; several sub-queries return merged comparison rows."""
+        if len(plan) == 1:
+            return self.execute_cypher(plan[0].query_type, plan[0].params)
+        workers = max(1, min(CHAT_FANOUT_MAX_WORKERS, len(plan)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-fanout") as pool:
+            # execute_cypher swallows errors, so one failing lookup only leaves its slot empty.
+            results = list(pool.map(lambda sub: self.execute_cypher(sub.query_type, sub.params), plan))
+        return merge_comparison(plan, results)
+
     def generate_cypher_query(self, query_type: str, params: Dict[str, Any]) -> Optional[str]:
         """
         Use Gemini to adapt a base template to the current schema and keep result size small.
@@ -208,87 +352,144 @@ Only output valid JSON, no explanation. Do not include ```json ...``` block form
         if not base:
             return None
 
-        schema_hint = self.schema_text or "Schema unavailable"
-        prompt = f"""
-You are a Cypher expert. Based on the schema and template, create a concise Cypher sentence:
-- Keep the template logic but customize the fields/labels to match the schema.
-- Force LIMIT 5.
-- RETURN only important fields (avoid collecting too many), prioritize name, url/link, score.
-- No explanation; just return a unique Cypher string. Do not include ```cypher ... ``` block.
-
-Schema:
-{schema_hint}
+        cache_key = (self.schema_fingerprint, query_type, json.dumps(params, sort_keys=True, ensure_ascii=False))
+        cached = self._cypher_cache.get(cache_key)
+        if cached:
+            return cached
 
+        prompt = f"""
 Template:
 {base}
 
 Params (JSON): {json.dumps(params, ensure_ascii=False)}
 """
         try:
-            resp = self.model.generate_content(prompt)
+            resp = self.llm.generate("cypher", self.cypher_system, prompt)
             text = (resp.text or "").strip()
             if not text:
                 return base
             if "limit" not in text.lower():
                 text = f"{text}\nLIMIT 5"
+            self._cypher_cache.set(cache_key, text)
             return text
         except Exception:
             return base
 
-    def format_response(self, user_query: str, query_results: List[Dict[str, Any]]) -> str:
-        prompt = f"""
+    def format_response(
+        self,
+        user_query: str,
+        query_results: List[Dict[str, Any]],
+        comparison: bool = False,
+        intent: Optional[str] = None,
+    ) -> str:
+        layout = (
+            "- Results are grouped per compared subject; compare them side by side (a short table if helpful)\n"
+            "- Say so when a subject has no data (found = false)\n"
+            if comparison
+            else ""
+        )
+        # The per-intent guidance from prompts/ is the static system instruction;
+        # only the question and rows below change between calls.
+        composed = self.prompts.compose(
+            intent,
+            f"""
 User question: "{user_query}"
 
 Database results:
 {json.dumps(query_results, ensure_ascii=False, indent=2)}
 
 Respond naturally in Vietnamese:
-- Friendly tone and concise
+{layout}- Friendly tone and concise
 - Use bullets and bold where helpful
 - Add links if present
 - Suggest next steps briefly
-"""
-        response = self.model.generate_content(prompt)
+""",
+            base=DEFAULT_SYSTEM_PROMPT,
+        )
+        response = self.llm.generate(f"answer:{composed.static.name}", composed.static, composed.dynamic)
         return response.text
 
-    def _fallback_response(self, user_query: str) -> str:
-        response = self.model.generate_content(
-            f"""
+    def retrieve_passages(self, user_query: str) -> List[Dict[str, Any]]:
+        if not self.retrieval:
+            return []
+        try:
+            return self.retrieval.search(user_query)
+        except Exception as exc:
+            print(f"Error retrieving passages: {exc!r}")
+            return []
+
+    def _fallback_response(self, user_query: str, passages: Optional[List[Dict[str, Any]]] = None) -> str:
+        if passages:
+            references = "\n\n".join(
+                f"[{i}] {p['title']} ({p['label']}){' - ' + p['url'] if p.get('url') else ''}\n{p['text']}"
+                for i, p in enumerate(passages, start=1)
+            )
+            prompt = f"""
+User question: "{user_query}"
+
+No exact database match, but these passages from the knowledge graph may be relevant:
+{references}
+
+Answer in Vietnamese based on the passages first, citing their links where present; fill gaps with
+general knowledge about studying, visas, and settlement in Australia and say which parts are general.
+Keep the answer short, helpful, and invite the user to ask for more details.
+"""
+        else:
+            prompt = f"""
 User question: "{user_query}"
 
 No exact database match. Answer based on your knowledge about studying, visas, and settlement in Australia.
 Keep the answer short, helpful, and invite the user to ask for more details.
 """
-        )
+        response = self.llm.generate("fallback", self._default_system, prompt)
         return response.text
 
-    def chat(self, user_query: str) -> ChatbotResult:
+    def chat(self, user_query: str, include_results: bool = True) -> ChatbotResult:
+        """Answer ``user_query``; with ``include_results=False`` the raw rows are used for the answer only."""
         if not user_query or not user_query.strip():
             raise ValueError("message must not be empty.")
 
         cleaned_query = user_query.strip()
+        if self.precomputed:
+            entry = self.precomputed.lookup(cleaned_query)
+            if entry is not None:
+                return ChatbotResult(
+                    reply=entry.reply,
+                    analysis={**entry.analysis, "precomputed": True},
+                    query_results=entry.query_results if include_results else None,
+                    query_type=entry.query_type or "fallback",
+                )
+
         analysis = self.detect_intent(cleaned_query)
         query_type = analysis.get("query_type") or analysis.get("intent") or "fallback"
-        entities = analysis.get("entities") or {}
-        print("query_type:", query_type)
+        plan = self.plan_queries(analysis)
+        print("query_type:", query_type, "sub_queries:", len(plan))
 
-        rows = self.execute_cypher(query_type, entities)
-        print("Cypher Query Results:", rows)
+        rows = self.execute_plan(plan)
+        # repr() of a large result set costs more than the rest of this method; skip it when nobody asked for rows.
+        print("Cypher Query Results:", rows if include_results else f"{len(rows)} rows")
+        analysis["fallback"] = not rows
         if rows:
-            reply = self.format_response(cleaned_query, rows)
+            reply = self.format_response(cleaned_query, rows, comparison=len(plan) > 1, intent=analysis.get("intent"))
             print("Reply:", reply)
         else:
-            reply = self._fallback_response(cleaned_query)
+            passages = self.retrieve_passages(cleaned_query)
+            analysis["retrieved_passages"] = [
+                {"id": p["id"], "label": p["label"], "title": p["title"], "url": p.get("url"), "score": p["score"]}
+                for p in passages
+            ]
+            reply = self._fallback_response(cleaned_query, passages)
             print("Fallback Reply:", reply)
 
         return ChatbotResult(
             reply=reply,
             analysis=analysis,
-            query_results=rows or None,
+            query_results=(rows or None) if include_results else None,
             query_type=query_type,
         )
 
     def close(self) -> None:
+        self.llm.close()
         if self.driver:
             self.driver.close()
 
@@ -0,0 +1,290 @@
+"""Provider-side context caching for static prompt prefixes.
+
+Large, rarely changing prefixes (per-intent system prompts, the schema block of
+the Cypher-generation prompt) are uploaded once as Gemini cached content and
+referenced by name; each call then only sends its dynamic part.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.prompt_registry import PromptTemplate, estimate_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in {"1", "true", "yes"}
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Entries whose remaining lifetime drops below this are renewed on next use.
+GEMINI_CONTEXT_CACHE_RENEW_MARGIN_SECONDS = float(os.getenv("GEMINI_CONTEXT_CACHE_RENEW_MARGIN_SECONDS", "300"))
+# Gemini rejects cached content below a model-specific minimum size.
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+
+@dataclass
+class CacheEntry:
+    handle: Any
+    sha: str
+    model: Any
+    tokens: int
+    expires_at: float
+
+
+class GeminiCacheBackend:
+    """Creates and renews ``google.generativeai`` cached contents."""
+
+    def __init__(self, genai: Any, model_name: str) -> None:
+        self.genai = genai
+        # Cached content needs the fully qualified model name.
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+    def create(self, system: PromptTemplate, ttl: float) -> Any:
+        return self.genai.caching.CachedContent.create(
+            model=self.model_name,
+            display_name=f"{system.name}:{system.sha}"[:128],
+            system_instruction=system.text,
+            ttl=dt.timedelta(seconds=ttl),
+        )
+
+    def renew(self, handle: Any, ttl: float) -> None:
+        handle.update(ttl=dt.timedelta(seconds=ttl))
+
+    def delete(self, handle: Any) -> None:
+        handle.delete()
+
+    def model_for(self, handle: Any) -> Any:
+        return self.genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+    def plain_model(self, system: PromptTemplate) -> Any:
+        return self.genai.GenerativeModel(model_name=self.model_name, system_instruction=system.text)
+
+
+@dataclass
+class _LocalUsage:
+    prompt_token_count: int
+    cached_content_token_count: int
+    candidates_token_count: int
+
+
+@dataclass
+class _LocalResponse:
+    text: str
+    usage_metadata: _LocalUsage
+
+
+class LocalModel:
+    """Stand-in for ``GenerativeModel``: echoes the request and reports Gemini-style usage.
+
+    ``seconds_per_token`` simulates input-processing cost for uncached tokens so
+    the latency effect of caching can be measured offline.
+    """
+
+    def __init__(self, system_instruction: str, cached: bool, seconds_per_token: float = 0.0) -> None:
+        self.system_instruction = system_instruction
+        self.cached = cached
+        self.seconds_per_token = seconds_per_token
+
+    def generate_content(self, contents: str) -> _LocalResponse:
+        system_tokens = estimate_tokens(self.system_instruction)
+        prompt_tokens = system_tokens + estimate_tokens(contents)
+        cached_tokens = system_tokens if self.cached else 0
+        if self.seconds_per_token:
+            time.sleep((prompt_tokens - cached_tokens) * self.seconds_per_token)
+        return _LocalResponse(
+            text=contents,
+            usage_metadata=_LocalUsage(
+                prompt_token_count=prompt_tokens,
+                cached_content_token_count=cached_tokens,
+                candidates_token_count=estimate_tokens(contents),
+            ),
+        )
+
+
+class LocalCacheBackend:
+    """In-process stand-in for :class:`GeminiCacheBackend` (tests and benchmarks)."""
+
+    def __init__(self, seconds_per_token: float = 0.0) -> None:
+        self.seconds_per_token = seconds_per_token
+        self.handles: Dict[str, PromptTemplate] = {}
+        self.created = 0
+        self.renewed = 0
+        self.deleted = 0
+
+    def create(self, system: PromptTemplate, ttl: float) -> str:
+        self.created += 1
+        name = f"cachedContents/local-{system.sha}-{self.created}"
+        self.handles[name] = system
+        return name
+
+    def renew(self, handle: str, ttl: float) -> None:
+        self.renewed += 1
+
+    def delete(self, handle: str) -> None:
+        self.deleted += 1
+        self.handles.pop(handle, None)
+
+    def model_for(self, handle: str) -> LocalModel:
+        return LocalModel(self.handles[handle].text, cached=True, seconds_per_token=self.seconds_per_token)
+
+    def plain_model(self, system: PromptTemplate) -> LocalModel:
+        return LocalModel(system.text, cached=False, seconds_per_token=self.seconds_per_token)
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.total_ms = 0.0
+
+    def add(self, usage: Any, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_token_count", 0) or 0
+            self.cached_tokens += getattr(usage, "cached_content_token_count", 0) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+        }
+
+
+class ContextCache:
+    """
+    Hands out models whose system instruction is served from a provider cache.
+
+    One entry is kept per ``slot`` (e.g. ``"intent:VISA"``, ``"cypher"``); when
+    the prefix for a slot changes (new schema fingerprint) the old entry is
+    deleted instead of being left to expire. Prefixes below ``min_tokens`` or
+    any backend failure fall back to a plain model with the same instruction.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        enabled: bool = GEMINI_CONTEXT_CACHE,
+        ttl: float = GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+        renew_margin: float = GEMINI_CONTEXT_CACHE_RENEW_MARGIN_SECONDS,
+        min_tokens: int = GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.backend = backend
+        self.enabled = enabled
+        self.ttl = ttl
+        self.renew_margin = min(renew_margin, ttl / 2)
+        self.min_tokens = min_tokens
+        self.clock = clock
+        self._entries: Dict[str, CacheEntry] = {}
+        self._plain: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"cached": _Stats(), "uncached": _Stats()}
+        self.created = 0
+        self.renewed = 0
+        self.failures = 0
+
+    def _plain_model(self, system: PromptTemplate) -> Any:
+        model = self._plain.get(system.sha)
+        if model is None:
+            model = self.backend.plain_model(system)
+            self._plain[system.sha] = model
+        return model
+
+    def _cached_model(self, slot: str, system: PromptTemplate) -> Optional[Any]:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry and (entry.sha != system.sha or entry.expires_at <= now):
+                self._entries.pop(slot)
+                if entry.expires_at > now:
+                    self._call(self.backend.delete, entry.handle)
+                entry = None
+            if entry is None:
+                ok, handle = self._call(self.backend.create, system, self.ttl)
+                if not ok:
+                    return None
+                self.created += 1
+                entry = CacheEntry(
+                    handle=handle,
+                    sha=system.sha,
+                    model=self.backend.model_for(handle),
+                    tokens=system.tokens,
+                    expires_at=now + self.ttl,
+                )
+                self._entries[slot] = entry
+            elif entry.expires_at - now <= self.renew_margin:
+                # Renew while the entry is still live; a failed renewal keeps
+                # serving it until expiry and the next use recreates it.
+                ok, _ = self._call(self.backend.renew, entry.handle, self.ttl)
+                if ok:
+                    self.renewed += 1
+                    entry.expires_at = now + self.ttl
+            return entry.model
+
+    def _call(self, fn: Callable[..., Any], *args: Any) -> Tuple[bool, Any]:
+        try:
+            return True, fn(*args)
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("Context cache %s failed: %r", fn.__name__, exc)
+            return False, None
+
+    def model_for(self, slot: str, system: PromptTemplate) -> Any:
+        if self.enabled and system.tokens >= self.min_tokens:
+            model = self._cached_model(slot, system)
+            if model is not None:
+                return model
+        return self._plain_model(system)
+
+    def generate(self, slot: str, system: PromptTemplate, contents: str) -> Any:
+        """Call the model for ``system`` with ``contents`` and record token usage and latency."""
+        model = self.model_for(slot, system)
+        start = time.perf_counter()
+        response = model.generate_content(contents)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        usage = getattr(response, "usage_metadata", None)
+        cached = bool(usage is not None and getattr(usage, "cached_content_token_count", 0))
+        with self._stats_lock:
+            self._stats["cached" if cached else "uncached"].add(usage, elapsed_ms)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            cached = self._stats["cached"].as_dict()
+            uncached = self._stats["uncached"].as_dict()
+        with self._lock:
+            entries = {
+                slot: {"sha": entry.sha, "tokens": entry.tokens, "expires_in": round(entry.expires_at - self.clock(), 1)}
+                for slot, entry in self._entries.items()
+            }
+        prompt_tokens = cached["prompt_tokens"] + uncached["prompt_tokens"]
+        saved = cached["cached_tokens"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "created": self.created,
+            "renewed": self.renewed,
+            "failures": self.failures,
+            "cached": cached,
+            "uncached": uncached,
+            "cached_token_ratio": round(saved / prompt_tokens, 4) if prompt_tokens else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        for entry in entries:
+            self._call(self.backend.delete, entry.handle)
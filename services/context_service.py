@@ -5,8 +5,6 @@ import logging
 from functools import lru_cache
 from typing import List, Tuple
 
-import google.generativeai as genai
-
 from config import GEMINI_MODEL, GOOGLE_API_KEY
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ logger = logging.getLogger(__name__)
 def _get_model():
     if not GOOGLE_API_KEY:
         raise RuntimeError("GOOGLE_API_KEY is required for context rewrite.")
+    import google.generativeai as genai
+
     genai.configure(api_key=GOOGLE_API_KEY)
     return genai.GenerativeModel(
         model_name=GEMINI_MODEL,
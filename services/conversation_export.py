@@ -0,0 +1,141 @@
+"""Stream all of a user's conversations and messages as NDJSON (optionally gzip).
+
+One ordered query over conversations LEFT JOIN messages is read through a
+server-side cursor (``yield_per``), so memory stays flat however much history
+the user has. Messages from archived partitions are read back from their
+archive files. Lines, in order::
+
+    {"kind": "export", "user_id": ..., "exported_at": ..., "format": 1}
+    {"kind": "conversation", "id": ..., "title": ..., "last_update": ...}
+    {"kind": "message", "id": ..., "conversation_id": ..., "role": ..., "message": ..., ...}
+    ...
+    {"kind": "summary", "conversations": ..., "messages": ...}
+"""
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .database import ReadSessionLocal
+from .models import Conservation, ConservationDetail
+from .partitioning import archived_messages_by_conversation, read_archived_entries
+
+# Rows fetched from the server-side cursor per round-trip.
+CONVERSATION_EXPORT_YIELD_PER = int(os.getenv("CONVERSATION_EXPORT_YIELD_PER", "1000"))
+# Lines are coalesced into chunks of about this size before being written out.
+CONVERSATION_EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FORMAT_VERSION = 1
+
+
+def _default(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _dumps(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, default=_default) + "\n").encode("utf-8")
+
+
+def _message(fields: Dict[str, Any]) -> Dict[str, Any]:
+    line = {"kind": "message"}
+    for key in ("id", "conversation_id", "role", "message", "created_at"):
+        line[key] = fields[key]
+    for key in ("analysis", "latency_ms"):
+        if fields.get(key) is not None:
+            line[key] = fields[key]
+    return line
+
+
+def _lines(user_id: int, session_factory: Callable[[], Session], yield_per: int) -> Iterator[bytes]:
+    yield _dumps({
+        "kind": "export",
+        "user_id": user_id,
+        "exported_at": datetime.now(timezone.utc),
+        "format": EXPORT_FORMAT_VERSION,
+    })
+    stmt = (
+        select(
+            Conservation.id.label("conversation_id"),
+            Conservation.title,
+            Conservation.last_update,
+            ConservationDetail.id.label("message_id"),
+            ConservationDetail.role,
+            ConservationDetail.message,
+            ConservationDetail.created_at,
+            ConservationDetail.analysis,
+            ConservationDetail.latency_ms,
+        )
+        .select_from(Conservation)
+        .outerjoin(ConservationDetail, ConservationDetail.conversation_id == Conservation.id)
+        .where(Conservation.user_id == user_id)
+        .order_by(Conservation.id, ConservationDetail.created_at, ConservationDetail.id)
+        .execution_options(yield_per=yield_per)
+    )
+    conversations = messages = 0
+    current = None
+    with session_factory() as db:
+        archived = archived_messages_by_conversation(db, user_id)
+        for row in db.execute(stmt):
+            if row.conversation_id != current:
+                current = row.conversation_id
+                conversations += 1
+                yield _dumps({
+                    "kind": "conversation",
+                    "id": row.conversation_id,
+                    "title": row.title,
+                    "last_update": row.last_update,
+                })
+                # Archived messages are older than any live one, so they come first.
+                for message in read_archived_entries(db, current, archived.get(current, ())):
+                    messages += 1
+                    yield _dumps(_message(message))
+            if row.message_id is None:
+                continue
+            messages += 1
+            yield _dumps(_message({
+                "id": row.message_id,
+                "conversation_id": row.conversation_id,
+                "role": row.role,
+                "message": row.message,
+                "created_at": row.created_at,
+                "analysis": row.analysis,
+                "latency_ms": row.latency_ms,
+            }))
+    yield _dumps({"kind": "summary", "conversations": conversations, "messages": messages})
+
+
+def _chunked(lines: Iterable[bytes], size: int = CONVERSATION_EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    buffer, buffered = [], 0
+    for line in lines:
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_user_export(
+    user_id: int,
+    gzip: bool = False,
+    session_factory: Callable[[], Session] = ReadSessionLocal,
+    yield_per: int = CONVERSATION_EXPORT_YIELD_PER,
+) -> Iterator[bytes]:
+    """Yield the export as byte chunks; the session lives only as long as the iteration."""
+    chunks = _chunked(_lines(user_id, session_factory, yield_per))
+    return _gzipped(chunks) if gzip else chunks
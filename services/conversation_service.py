@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .message_search import search_vector_for
+from .partitioning import aarchived_details, archived_details
 from .models import Conservation, ConservationDetail
 
 
@@ -39,11 +42,21 @@ class ConversationService:
         return conversation
 
     @staticmethod
-    def add_message(db: Session, conversation_id: int, role: str, message: str) -> ConservationDetail:
+    def add_message(
+        db: Session,
+        conversation_id: int,
+        role: str,
+        message: str,
+        analysis: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[int] = None,
+    ) -> ConservationDetail:
         detail = ConservationDetail(
             conversation_id=conversation_id,
             role=role,
             message=message,
+            analysis=analysis,
+            latency_ms=latency_ms,
+            search_vector=search_vector_for(message),
         )
         db.add(detail)
         # Do not commit here; caller decides.
@@ -55,9 +68,12 @@ class ConversationService:
         conversation: Conservation,
         user_message: str,
         assistant_message: str,
+        analysis: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[int] = None,
     ) -> None:
+        """Store a question/answer turn; ``analysis`` and ``latency_ms`` feed the chat analytics rollups."""
         ConversationService.add_message(db, conversation.id, "user", user_message)
-        ConversationService.add_message(db, conversation.id, "assistant", assistant_message)
+        ConversationService.add_message(db, conversation.id, "assistant", assistant_message, analysis, latency_ms)
         conversation.last_update = datetime.utcnow()
         db.add(conversation)
         db.commit()
@@ -71,19 +87,135 @@ class ConversationService:
         return db.scalars(stmt).all()
 
     @staticmethod
-    def list_details(db: Session, conversation_id: int) -> List[ConservationDetail]:
+    def list_details(db: Session, conversation_id: int, include_archived: bool = True) -> List[ConservationDetail]:
         stmt = (
             select(ConservationDetail)
             .where(ConservationDetail.conversation_id == conversation_id)
             .order_by(ConservationDetail.created_at.asc())
         )
-        return db.scalars(stmt).all()
+        details = db.scalars(stmt).all()
+        if not include_archived:
+            return details
+        # Archived partitions only hold months older than any attached one, so they go first.
+        archived = archived_details(db, conversation_id)
+        return archived + list(details) if archived else details
 
     @staticmethod
     def delete_conversation(db: Session, conversation_id: int) -> bool:
-        convo = db.get(Conservation, conversation_id)
-        if not convo:
-            return False
-        db.delete(convo)
+        # One DELETE; messages and archive entries go with it through ON DELETE CASCADE
+        # (compact_archives later drops the archived copies from the archive files).
+        result = db.execute(
+            delete(Conservation).where(Conservation.id == conversation_id).execution_options(synchronize_session=False)
+        )
         db.commit()
-        return True
+        return result.rowcount > 0
+
+
+class AsyncConversationService:
+    """AsyncSession counterpart of :class:`ConversationService`."""
+
+    @staticmethod
+    async def get_conversation(db: AsyncSession, conversation_id: int) -> Optional[Conservation]:
+        return await db.get(Conservation, conversation_id)
+
+    @staticmethod
+    async def create_conversation(db: AsyncSession, user_id: Optional[int], title: Optional[str]) -> Conservation:
+        conversation = Conservation(
+            user_id=user_id,
+            title=title,
+            last_update=datetime.utcnow(),
+        )
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+        return conversation
+
+    @staticmethod
+    async def touch_conversation(db: AsyncSession, conversation: Conservation, title: Optional[str] = None) -> Conservation:
+        if title and title != conversation.title:
+            conversation.title = title
+        conversation.last_update = datetime.utcnow()
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+        return conversation
+
+    @staticmethod
+    async def add_pair(
+        db: AsyncSession,
+        conversation: Conservation,
+        user_message: str,
+        assistant_message: str,
+        analysis: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[int] = None,
+    ) -> None:
+        """Store a question/answer turn; ``analysis`` and ``latency_ms`` feed the chat analytics rollups."""
+        ConversationService.add_message(db, conversation.id, "user", user_message)
+        ConversationService.add_message(db, conversation.id, "assistant", assistant_message, analysis, latency_ms)
+        conversation.last_update = datetime.utcnow()
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+
+    @staticmethod
+    async def list_conservations(
+        db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 20
+    ) -> List[Conservation]:
+        stmt = select(Conservation).offset(skip).limit(limit).order_by(Conservation.last_update.desc())
+        if user_id is not None:
+            stmt = stmt.where(Conservation.user_id == user_id)
+        return (await db.scalars(stmt)).all()
+
+    @staticmethod
+    async def list_conservation_rows(
+        db: AsyncSession, fields: Sequence[str], user_id: Optional[int] = None, skip: int = 0, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Like :meth:`list_conservations` but selects only ``fields`` (no ORM objects, no joined user)."""
+        stmt = (
+            select(*(getattr(Conservation, field) for field in fields))
+            .offset(skip)
+            .limit(limit)
+            .order_by(Conservation.last_update.desc())
+        )
+        if user_id is not None:
+            stmt = stmt.where(Conservation.user_id == user_id)
+        return [dict(row._mapping) for row in await db.execute(stmt)]
+
+    @staticmethod
+    async def list_detail_rows(db: AsyncSession, conversation_id: int, fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """Messages of a conversation as dicts of ``fields`` only, archived ones included."""
+        stmt = (
+            select(*(getattr(ConservationDetail, field) for field in fields))
+            .where(ConservationDetail.conversation_id == conversation_id)
+            .order_by(ConservationDetail.created_at.asc())
+        )
+        rows = [dict(row._mapping) for row in await db.execute(stmt)]
+        archived = await aarchived_details(db, conversation_id)
+        if not archived:
+            return rows
+        return [{field: getattr(detail, field) for field in fields} for detail in archived] + rows
+
+    @staticmethod
+    async def list_details(
+        db: AsyncSession, conversation_id: int, include_archived: bool = True
+    ) -> List[ConservationDetail]:
+        stmt = (
+            select(ConservationDetail)
+            .where(ConservationDetail.conversation_id == conversation_id)
+            .order_by(ConservationDetail.created_at.asc())
+        )
+        details = (await db.scalars(stmt)).all()
+        if not include_archived:
+            return details
+        archived = await aarchived_details(db, conversation_id)
+        return archived + list(details) if archived else details
+
+    @staticmethod
+    async def delete_conversation(db: AsyncSession, conversation_id: int) -> bool:
+        # One DELETE; messages and archive entries go with it through ON DELETE CASCADE
+        # (compact_archives later drops the archived copies from the archive files).
+        result = await db.execute(
+            delete(Conservation).where(Conservation.id == conversation_id).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount > 0
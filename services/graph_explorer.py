@@ -0,0 +1,145 @@
+"""Bounded k-hop neighborhood expansion for the admin graph explorer."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from neo4j import Driver
+
+from .cache import TTLCache
+from .neo4j_exec import execute_read, quote_identifier
+
+GRAPH_EXPAND_MAX_DEPTH = int(os.getenv("GRAPH_EXPAND_MAX_DEPTH", "3"))
+GRAPH_EXPAND_DEFAULT_FANOUT = int(os.getenv("GRAPH_EXPAND_DEFAULT_FANOUT", "25"))
+GRAPH_EXPAND_MAX_FANOUT = int(os.getenv("GRAPH_EXPAND_MAX_FANOUT", "200"))
+GRAPH_EXPAND_MAX_NODES = int(os.getenv("GRAPH_EXPAND_MAX_NODES", "500"))
+# Roots with at least this many relationships are hubs; their expansions are cached.
+GRAPH_HUB_MIN_DEGREE = int(os.getenv("GRAPH_HUB_MIN_DEGREE", "200"))
+GRAPH_HUB_CACHE_TTL_SECONDS = float(os.getenv("GRAPH_HUB_CACHE_TTL_SECONDS", "600"))
+
+# Short display text for a node without shipping every property.
+_CAPTION = "coalesce(toString({v}.name), toString({v}.title), toString({v}.name_visa), toString({v}.subclass), toString({v}.key))"
+
+ROOT_QUERY = f"""
+MATCH (n) WHERE elementId(n) = $id
+RETURN elementId(n) AS id, labels(n) AS labels, {_CAPTION.format(v="n")} AS caption,
+       COUNT {{ (n)--() }} AS degree
+"""
+
+
+def build_hop_query(rel_types: Optional[Sequence[str]]) -> str:
+    type_pattern = ":" + "|".join(quote_identifier(t) for t in rel_types) if rel_types else ""
+    # The per-source LIMIT inside CALL caps fan-out without materializing a
+    # hub's full adjacency list; the outer LIMIT keeps the hop within the
+    # remaining node budget, so a wide frontier never returns frontier * fanout rows.
+    return f"""
+UNWIND $frontier AS source_id
+MATCH (n) WHERE elementId(n) = source_id
+CALL {{
+    WITH n
+    MATCH (n)-[r{type_pattern}]-(m)
+    WHERE NOT elementId(m) IN $visited
+    RETURN r, m
+    LIMIT $fanout
+}}
+RETURN source_id,
+       elementId(r) AS rel_id, type(r) AS type,
+       elementId(startNode(r)) AS start, elementId(endNode(r)) AS end,
+       elementId(m) AS node_id, labels(m) AS labels, {_CAPTION.format(v="m")} AS caption
+LIMIT $budget
+"""
+
+
+@dataclass
+class Neighborhood:
+    root_id: str
+    degree: int
+    nodes: List[Dict[str, Any]] = field(default_factory=list)
+    relationships: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: bool = False
+    cached: bool = False
+
+
+class GraphExplorer:
+    """Expand a node hop by hop under per-hop fan-out caps and a total node budget."""
+
+    def __init__(self, driver: Driver) -> None:
+        self.driver = driver
+        self.hub_cache: TTLCache[Neighborhood] = TTLCache(ttl=GRAPH_HUB_CACHE_TTL_SECONDS, maxsize=256)
+
+    def _run(self, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return execute_read(self.driver, cypher, params)
+
+    def expand(
+        self,
+        node_id: str,
+        fanouts: Sequence[int],
+        rel_types: Optional[Sequence[str]] = None,
+        max_nodes: int = GRAPH_EXPAND_MAX_NODES,
+    ) -> Optional[Neighborhood]:
+        """
+        Return the neighborhood of ``node_id``, ``len(fanouts)`` hops deep.
+
+        Returns:
+            The bounded neighborhood, or None if the node does not exist.
+        """
+        fanouts = [max(1, min(f, GRAPH_EXPAND_MAX_FANOUT)) for f in fanouts[:GRAPH_EXPAND_MAX_DEPTH]]
+        max_nodes = max(1, min(max_nodes, GRAPH_EXPAND_MAX_NODES))
+        types = tuple(sorted(rel_types)) if rel_types else ()
+        key = (node_id, tuple(fanouts), types, max_nodes)
+
+        cached = self.hub_cache.get(key)
+        if cached is not None:
+            return Neighborhood(**{**cached.__dict__, "cached": True})
+
+        root_rows = self._run(ROOT_QUERY, {"id": node_id})
+        if not root_rows:
+            return None
+        root = root_rows[0]
+        result = Neighborhood(root_id=node_id, degree=root["degree"])
+        nodes: Dict[str, Dict[str, Any]] = {
+            node_id: {"id": node_id, "labels": root["labels"], "caption": root["caption"], "hop": 0}
+        }
+        relationships: Dict[str, Dict[str, Any]] = {}
+        hop_query = build_hop_query(types)
+        frontier = [node_id]
+
+        for hop, fanout in enumerate(fanouts, start=1):
+            if not frontier:
+                break
+            budget = max_nodes - len(nodes)
+            if budget <= 0:
+                result.truncated = True
+                break
+            rows = self._run(
+                hop_query, {"frontier": frontier, "visited": list(nodes), "fanout": fanout, "budget": budget}
+            )
+            if len(rows) >= budget:
+                result.truncated = True
+            per_source: Dict[str, int] = {}
+            next_frontier: List[str] = []
+            for row in rows:
+                per_source[row["source_id"]] = per_source.get(row["source_id"], 0) + 1
+                neighbor = row["node_id"]
+                if neighbor not in nodes:
+                    if len(nodes) >= max_nodes:
+                        result.truncated = True
+                        continue
+                    nodes[neighbor] = {"id": neighbor, "labels": row["labels"], "caption": row["caption"], "hop": hop}
+                    next_frontier.append(neighbor)
+                relationships[row["rel_id"]] = {
+                    "id": row["rel_id"],
+                    "type": row["type"],
+                    "source_id": row["start"],
+                    "target_id": row["end"],
+                }
+            if any(count >= fanout for count in per_source.values()):
+                result.truncated = True
+            frontier = next_frontier
+
+        result.nodes = list(nodes.values())
+        result.relationships = list(relationships.values())
+        if result.degree >= GRAPH_HUB_MIN_DEGREE:
+            self.hub_cache.set(key, result)
+        return result
@@ -0,0 +1,96 @@
+"""Stream graph nodes and relationships as NDJSON from a single query.
+
+Each export is one Cypher query read record by record with the driver's
+``fetch_size``. There is no ``ORDER BY``/cursor paging: elementId is not
+indexed, so every page would be a full scan plus sort.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+from neo4j import READ_ACCESS, Driver
+
+from .neo4j_exec import NEO4J_DATABASE, quote_identifier
+
+# Records pulled from the server per network round-trip while streaming.
+GRAPH_EXPORT_FETCH_SIZE = int(os.getenv("GRAPH_EXPORT_FETCH_SIZE", "1000"))
+
+
+def _label_pattern(labels: Optional[List[str]]) -> str:
+    if not labels:
+        return ""
+    return ":" + "|".join(quote_identifier(label) for label in labels)
+
+
+def build_nodes_query(labels: Optional[List[str]], limited: bool = False) -> str:
+    # LIMIT without ORDER BY stops the label scan early instead of sorting it.
+    return f"""
+MATCH (n{_label_pattern(labels)})
+RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+{"LIMIT $limit" if limited else ""}
+"""
+
+
+def build_relationships_query(
+    rel_types: Optional[List[str]], labels: Optional[List[str]], limited: bool = False
+) -> str:
+    type_pattern = _label_pattern(rel_types)
+    # With a label filter both endpoints must carry one of the labels.
+    label_pattern = _label_pattern(labels)
+    return f"""
+MATCH (a{label_pattern})-[r{type_pattern}]->(b{label_pattern})
+RETURN elementId(r) AS id, type(r) AS type, elementId(a) AS start, elementId(b) AS end, properties(r) AS properties
+{"LIMIT $limit" if limited else ""}
+"""
+
+
+def _dumps(obj: Dict[str, Any]) -> bytes:
+    # Neo4j temporal/spatial values are not JSON-native; fall back to str().
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _stream(
+    driver: Driver,
+    cypher: str,
+    record_type: str,
+    limit: Optional[int],
+    fetch_size: int,
+) -> Iterator[bytes]:
+    count = 0
+    # Streaming needs an auto-commit read: a managed transaction function would
+    # have to consume the whole result before returning.
+    with driver.session(database=NEO4J_DATABASE, default_access_mode=READ_ACCESS, fetch_size=fetch_size) as session:
+        result = session.run(cypher, limit=limit)
+        # Iterating the Result pulls fetch_size records at a time; nothing is
+        # accumulated here, so memory is bounded by one fetch batch.
+        for record in result:
+            row = {"kind": record_type}
+            for key, value in record.items():
+                row[key] = value
+            count += 1
+            yield _dumps(row)
+    yield _dumps({"kind": "summary", "count": count, "truncated": limit is not None and count == limit})
+
+
+def iter_nodes_ndjson(
+    driver: Driver,
+    labels: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    fetch_size: int = GRAPH_EXPORT_FETCH_SIZE,
+) -> Iterator[bytes]:
+    """Yield NDJSON lines for every matching node (at most ``limit``), ending with a ``summary`` line."""
+    return _stream(driver, build_nodes_query(labels, limit is not None), "node", limit, fetch_size)
+
+
+def iter_relationships_ndjson(
+    driver: Driver,
+    rel_types: Optional[List[str]] = None,
+    labels: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    fetch_size: int = GRAPH_EXPORT_FETCH_SIZE,
+) -> Iterator[bytes]:
+    """Yield NDJSON lines for every matching relationship (at most ``limit``), ending with a ``summary`` line."""
+    cypher = build_relationships_query(rel_types, labels, limit is not None)
+    return _stream(driver, cypher, "relationship", limit, fetch_size)
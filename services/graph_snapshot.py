@@ -0,0 +1,618 @@
+"""In-process, array-backed snapshot of the knowledge graph.
+
+The graph is small and read-mostly, so the chatbot's fixed ``QUERY_TEMPLATES``
+can be answered from memory instead of a Bolt round-trip plus Cypher planning:
+
+* nodes get dense integer ids; each label keeps its member ids and one column
+  per property, aligned with the members;
+* relationships are stored per type as CSR adjacency (``indptr``/``indices``),
+  in both directions;
+* lookup properties used by the templates get a value -> node ids index.
+
+Relationship properties are not loaded; no template reads them. A snapshot is
+immutable once built, and :class:`GraphSnapshotManager` swaps in a fresh one when
+the graph version changes, so readers never see a half-loaded graph.
+
+Freshness depends on ``read_graph_version`` moving on every write; a custom
+``GRAPH_VERSION_QUERY`` that returns node/relationship counts misses property
+edits. As a backstop a snapshot older than ``GRAPH_SNAPSHOT_MAX_AGE_SECONDS``
+is reloaded regardless of the version, and one that could not be reloaded for
+twice that long is no longer used.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from neo4j import READ_ACCESS, Driver
+
+from .background import BackgroundRefresher
+from .neo4j_exec import NEO4J_DATABASE, NEO4J_FETCH_SIZE, execute_read, read_graph_version
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GRAPH_SNAPSHOT_ENABLED = os.getenv("GRAPH_SNAPSHOT_ENABLED", "false").lower() in {"1", "true", "yes"}
+GRAPH_SNAPSHOT_POLL_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_POLL_SECONDS", "30"))
+# Refuse to load graphs larger than this; the Cypher path keeps serving them.
+GRAPH_SNAPSHOT_MAX_NODES = int(os.getenv("GRAPH_SNAPSHOT_MAX_NODES", "2000000"))
+# Reload at least this often even if the graph version did not move (0 = never).
+GRAPH_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_MAX_AGE_SECONDS", "3600"))
+
+# Each is read in one pass, fetch_size records per round-trip; no ORDER BY, so
+# nothing is sorted on the unindexed elementId.
+SNAPSHOT_NODES_QUERY = """
+MATCH (n)
+RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS props
+"""
+
+SNAPSHOT_RELATIONSHIPS_QUERY = """
+MATCH (a)-[r]->(b)
+RETURN elementId(a) AS src, type(r) AS type, elementId(b) AS dst
+"""
+
+NODE_COUNT_QUERY = "MATCH (n) RETURN count(n) AS count"
+
+# (label, property) pairs the templates match on by equality.
+INDEXED_PROPERTIES: Tuple[Tuple[str, str], ...] = (
+    ("University", "name"),
+    ("ProgramLevel", "name"),
+    ("Exam", "name"),
+    ("Visa", "subclass"),
+)
+
+OUT, IN = "out", "in"
+EMPTY = np.zeros(0, dtype=np.int32)
+
+
+class SnapshotUnsupported(Exception):
+    """The snapshot can't answer this request; the caller should fall back to Cypher."""
+
+
+def _param(params: Dict[str, Any], name: str) -> Any:
+    # Cypher fails on a missing parameter; mirror that by deferring to the Cypher path.
+    if name not in params:
+        raise SnapshotUnsupported(f"missing parameter ${name}")
+    return params[name]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _cypher_le(left: Any, right: Any) -> bool:
+    """``left <= right`` with Cypher semantics: null or mixed types never match."""
+    if _is_number(left) and _is_number(right):
+        return left <= right
+    if isinstance(left, str) and isinstance(right, str):
+        return left <= right
+    return False
+
+
+def _contains_ci(value: Any, needle: Any) -> bool:
+    """``toLower(value) CONTAINS toLower(needle)``; null on either side never matches."""
+    return isinstance(value, str) and isinstance(needle, str) and needle.lower() in value.lower()
+
+
+def _hashable(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _null_last(value: Any) -> Tuple[int, Any]:
+    return (1, "") if value is None else (0, value)
+
+
+def _deep_sizeof(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_deep_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    return size
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, node_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(node_count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32)
+
+
+class GraphSnapshot:
+    """Immutable CSR snapshot; build with :meth:`build` or :meth:`load`."""
+
+    def __init__(self) -> None:
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self.load_seconds = 0.0
+        self.node_ids: List[str] = []
+        self.relationship_count = 0
+        # label -> sorted member ids; label -> position of each node in that label (-1 if absent)
+        self.members: Dict[str, np.ndarray] = {}
+        self.positions: Dict[str, np.ndarray] = {}
+        # label -> property -> values aligned with members[label]
+        self.columns: Dict[str, Dict[str, List[Any]]] = {}
+        # float64 copies (NaN for null) of the columns holding only numbers, for vectorized filters
+        self.numeric: Dict[str, Dict[str, np.ndarray]] = {}
+        # (type, direction) -> (indptr, indices)
+        self.adjacency: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        self.indexes: Dict[Tuple[str, str], Dict[Any, np.ndarray]] = {}
+
+    # -- building ---------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        nodes: Iterable[Tuple[str, Sequence[str], Dict[str, Any]]],
+        relationships: Iterable[Tuple[str, str, str]],
+        version: Optional[str] = None,
+    ) -> "GraphSnapshot":
+        """Build from ``(element_id, labels, properties)`` and ``(src_id, type, dst_id)`` records."""
+        start = time.perf_counter()
+        snapshot = cls()
+        dense: Dict[str, int] = {}
+        label_members: Dict[str, List[int]] = defaultdict(list)
+        label_props: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for element_id, labels, props in nodes:
+            node = dense.setdefault(element_id, len(dense))
+            snapshot.node_ids.append(element_id)
+            for label in labels:
+                label_members[label].append(node)
+                label_props[label].append(props)
+        node_count = len(dense)
+
+        for label, members in label_members.items():
+            snapshot.members[label] = np.asarray(members, dtype=np.int32)
+            positions = np.full(node_count, -1, dtype=np.int32)
+            positions[snapshot.members[label]] = np.arange(len(members), dtype=np.int32)
+            snapshot.positions[label] = positions
+            rows = label_props[label]
+            keys = sorted({key for props in rows for key in props})
+            snapshot.columns[label] = {key: [props.get(key) for props in rows] for key in keys}
+            snapshot.numeric[label] = {
+                key: np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+                for key, values in snapshot.columns[label].items()
+                if any(v is not None for v in values) and all(v is None or _is_number(v) for v in values)
+            }
+
+        edges: Dict[str, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        for src, rel_type, dst in relationships:
+            if src in dense and dst in dense:
+                sources, targets = edges[rel_type]
+                sources.append(dense[src])
+                targets.append(dense[dst])
+                snapshot.relationship_count += 1
+        for rel_type, (sources, targets) in edges.items():
+            src = np.asarray(sources, dtype=np.int32)
+            dst = np.asarray(targets, dtype=np.int32)
+            snapshot.adjacency[(rel_type, OUT)] = _csr(src, dst, node_count)
+            snapshot.adjacency[(rel_type, IN)] = _csr(dst, src, node_count)
+
+        for label, key in INDEXED_PROPERTIES:
+            index: Dict[Any, List[int]] = defaultdict(list)
+            for node, value in zip(snapshot.members.get(label, EMPTY).tolist(), snapshot.columns.get(label, {}).get(key, [])):
+                if value is not None:
+                    index[_hashable(value)].append(node)
+            snapshot.indexes[(label, key)] = {value: np.asarray(ids, dtype=np.int32) for value, ids in index.items()}
+
+        snapshot.version = version
+        snapshot.loaded_at = datetime.now(timezone.utc)
+        snapshot.load_seconds = time.perf_counter() - start
+        return snapshot
+
+    @classmethod
+    def load(cls, driver: Driver) -> "GraphSnapshot":
+        """Read the whole graph; retried if the graph version moves during the read."""
+        for _ in range(3):
+            version = read_graph_version(driver)
+            start = time.perf_counter()
+            nodes = _read_tuples(driver, SNAPSHOT_NODES_QUERY)
+            rels = _read_tuples(driver, SNAPSHOT_RELATIONSHIPS_QUERY)
+            if read_graph_version(driver) == version:
+                snapshot = cls.build(nodes, rels, version)
+                snapshot.load_seconds = time.perf_counter() - start
+                return snapshot
+            logger.info("graph changed while loading snapshot; retrying")
+        raise RuntimeError("graph kept changing while loading the snapshot")
+
+    # -- primitives -------------------------------------------------------
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    def has_label(self, node: int, label: str) -> bool:
+        positions = self.positions.get(label)
+        return positions is not None and positions[node] >= 0
+
+    def prop(self, node: int, label: str, key: str) -> Any:
+        column = self.columns.get(label, {}).get(key)
+        if column is None:
+            return None
+        position = self.positions[label][node]
+        return column[position] if position >= 0 else None
+
+    def adjacent(self, node: int, rel_type: str, direction: str, label: Optional[str] = None) -> np.ndarray:
+        """Neighbour ids over ``rel_type`` in ``direction``, optionally restricted to ``label``."""
+        csr = self.adjacency.get((rel_type, direction))
+        if csr is None:
+            return EMPTY
+        indptr, indices = csr
+        found = indices[indptr[node]:indptr[node + 1]]
+        if label:
+            positions = self.positions.get(label)
+            if positions is None:
+                return EMPTY
+            found = found[positions[found] >= 0]
+        return found
+
+    def neighbors(self, node: int, rel_type: str, direction: str, label: Optional[str] = None) -> List[int]:
+        return self.adjacent(node, rel_type, direction, label).tolist()
+
+    def lookup(self, label: str, key: str, value: Any) -> List[int]:
+        """Nodes with ``label`` whose ``key`` equals ``value`` (``{key: $value}`` in Cypher)."""
+        if value is None:
+            return []
+        index = self.indexes.get((label, key))
+        if index is not None:
+            return index.get(_hashable(value), EMPTY).tolist()
+        return [n for n in self.members.get(label, EMPTY).tolist() if self.prop(n, label, key) == value]
+
+    def scan(self, label: str) -> List[int]:
+        return self.members.get(label, EMPTY).tolist()
+
+    # -- QUERY_TEMPLATES --------------------------------------------------
+
+    def _exam_requirements(self, program: int) -> List[Dict[str, Any]]:
+        # OPTIONAL MATCH (p)-[:HAS_REQUIRED]->(es:ExamScore)<-[:HAS_SCORE]-(e:Exam)
+        pairs = [
+            (es, e)
+            for es in self.neighbors(program, "HAS_REQUIRED", OUT, "ExamScore")
+            for e in self.neighbors(es, "HAS_SCORE", IN, "Exam")
+        ]
+        if not pairs:
+            return [{"exam": None, "score": None}]
+        return [{"exam": self.prop(e, "Exam", "name"), "score": self.prop(es, "ExamScore", "value")} for es, e in pairs]
+
+    def _universities_offering(self, program: int) -> List[int]:
+        # (p)<-[:OFFERS]-(pl:ProgramLevel)<-[:HAS_LEVEL]-(pg:ProgramGroup)<-[:HAS_PROGRAMS]-(u:University)
+        return [
+            u
+            for pl in self.neighbors(program, "OFFERS", IN, "ProgramLevel")
+            for pg in self.neighbors(pl, "HAS_LEVEL", IN, "ProgramGroup")
+            for u in self.neighbors(pg, "HAS_PROGRAMS", IN, "University")
+        ]
+
+    def find_programs_by_university(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        name, level = _param(params, "university_name"), _param(params, "level")
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for u in self.lookup("University", "name", name):
+            for pg in self.neighbors(u, "HAS_PROGRAMS", OUT, "ProgramGroup"):
+                for pl in self.neighbors(pg, "HAS_LEVEL", OUT, "ProgramLevel"):
+                    if level is None or self.prop(pl, "ProgramLevel", "name") != level:
+                        continue
+                    for p in self.neighbors(pl, "OFFERS", OUT, "Program"):
+                        key = (
+                            self.prop(u, "University", "name"),
+                            self.prop(p, "Program", "name"),
+                            self.prop(p, "Program", "url"),
+                            _hashable(self.prop(p, "Program", "starting_months")),
+                        )
+                        # Past the LIMIT only programs merging into a kept group matter.
+                        if key in groups or len(groups) < 10:
+                            groups.setdefault(key, []).extend(self._exam_requirements(p))
+        return [
+            {
+                "university": university,
+                "program_name": program_name,
+                "program_url": program_url,
+                "starting_months": list(months) if isinstance(months, tuple) else months,
+                "requirements": requirements,
+            }
+            for (university, program_name, program_url, months), requirements in groups.items()
+        ]
+
+    def find_programs_by_ielts(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        max_score = _param(params, "max_score")
+        values = self.numeric.get("ExamScore", {}).get("value")
+        candidates = [self.adjacent(e, "HAS_SCORE", OUT, "ExamScore") for e in self.lookup("Exam", "name", "IELTS")]
+        if values is not None and _is_number(max_score):
+            # Vectorized filter and sort; NaN (null) compares false, like Cypher's null.
+            found = np.concatenate(candidates) if candidates else EMPTY
+            found_values = values[self.positions["ExamScore"][found]]
+            keep = found_values <= max_score
+            found, found_values = found[keep], found_values[keep]
+            ordered = found[np.argsort(found_values, kind="stable")].tolist()
+        else:
+            scored = [
+                (self.prop(es, "ExamScore", "value"), es) for group in candidates for es in group.tolist()
+            ]
+            scored = [(value, es) for value, es in scored if _cypher_le(value, max_score)]
+            # Every surviving value has max_score's type, so they compare cleanly.
+            ordered = [es for _, es in sorted(scored, key=lambda item: item[0])]
+        # Expand paths in score order only until the LIMIT is reached.
+        rows: List[Dict[str, Any]] = []
+        for es in ordered:
+            value = self.prop(es, "ExamScore", "value")
+            for p in self.neighbors(es, "HAS_REQUIRED", IN, "Program"):
+                for u in self._universities_offering(p):
+                    rows.append({
+                        "university": self.prop(u, "University", "name"),
+                        "program_name": self.prop(p, "Program", "name"),
+                        "ielts_required": value,
+                        "url": self.prop(p, "Program", "url"),
+                    })
+                    if len(rows) == 10:
+                        return rows
+        return rows
+
+    def visa_info(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        subclass = _param(params, "subclass")
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for v in self.lookup("Visa", "subclass", subclass):
+            key = (self.prop(v, "Visa", "name_visa"), self.prop(v, "Visa", "subclass"), self.prop(v, "Visa", "url"))
+            about = self.neighbors(v, "HAS_ABOUT_INFO", OUT, "AboutInfo")
+            items = groups.setdefault(key, [])
+            if about:
+                items.extend(
+                    {"field": self.prop(a, "AboutInfo", "field"), "content": self.prop(a, "AboutInfo", "content")}
+                    for a in about
+                )
+            else:
+                items.append({"field": None, "content": None})
+        return [
+            {"visa_name": name, "subclass": sub, "official_url": url, "about_information": about}
+            for (name, sub, url), about in groups.items()
+        ]
+
+    def visa_eligibility(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        subclass = _param(params, "subclass")
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for v in self.lookup("Visa", "subclass", subclass):
+            for eg in self.neighbors(v, "HAS_ELIGIBILITY_GROUP", OUT, "EligibilityGroup"):
+                for er in self.neighbors(eg, "HAS_REQUIREMENT", OUT, "EligibilityRequirement"):
+                    key = (self.prop(v, "Visa", "name_visa"), self.prop(eg, "EligibilityGroup", "group_key"))
+                    groups.setdefault(key, []).append({
+                        "key": self.prop(er, "EligibilityRequirement", "key"),
+                        "content": self.prop(er, "EligibilityRequirement", "content"),
+                    })
+        rows = [
+            {"visa_name": name, "requirement_group": group, "requirements": requirements}
+            for (name, group), requirements in groups.items()
+        ]
+        rows.sort(key=lambda row: _null_last(row["requirement_group"]))
+        return rows
+
+    def settlement_info(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        keyword = _param(params, "keyword")
+        groups: Dict[Any, Dict[Tuple, Dict[str, Any]]] = {}
+        for cat in self.scan("SettlementCategory"):
+            category = self.prop(cat, "SettlementCategory", "name")
+            if not _contains_ci(category, keyword):
+                continue
+            for tg in self.neighbors(cat, "HAS_GROUP", OUT, "SettlementTaskGroup"):
+                for sp in self.neighbors(tg, "CONTAINS_SETTLEMENT_PAGE", OUT, "SettlementPage"):
+                    item = {
+                        "task_group": self.prop(tg, "SettlementTaskGroup", "name"),
+                        "page_title": self.prop(sp, "SettlementPage", "title"),
+                        "page_url": self.prop(sp, "SettlementPage", "url"),
+                    }
+                    # collect(DISTINCT ...) keeps first-seen order.
+                    groups.setdefault(_hashable(category), {}).setdefault(tuple(item.values()), item)
+        return [
+            {"category": list(category) if isinstance(category, tuple) else category, "related_info": list(items.values())}
+            for category, items in list(groups.items())[:5]
+        ]
+
+    def comprehensive_pathway(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        field = _param(params, "field")
+        # Programs reached through matching subjects, with how many subjects matched:
+        # Cypher carries one row per (subject, path) match into the aggregation.
+        matches: Dict[int, int] = {}
+        for subject in self.scan("Subject"):
+            if _contains_ci(self.prop(subject, "Subject", "name"), field):
+                for p in self.neighbors(subject, "FOCUSES_ON", IN, "Program"):
+                    matches[p] = matches.get(p, 0) + 1
+        study: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for p, subject_count in matches.items():
+            # A program's groups are complete once it is processed, so stop at the LIMIT.
+            if len(study) >= 3:
+                break
+            universities = self._universities_offering(p)
+            if not universities:
+                continue
+            requirements = self._exam_requirements(p)
+            for u in universities:
+                study.setdefault((u, p), []).extend(requirements * subject_count)
+        student_visas = self.lookup("Visa", "subclass", "500")
+        pr_visas: Dict[Tuple, Dict[str, Any]] = {}
+        for vpr in self.scan("Visa"):
+            sub = self.prop(vpr, "Visa", "subclass")
+            if sub in ("189", "190"):
+                item = {"name": self.prop(vpr, "Visa", "name_visa"), "subclass": sub}
+                pr_visas.setdefault((item["name"], sub), item)
+        if not pr_visas:
+            return []
+        rows = []
+        for (u, p), requirements in list(study.items())[:3]:
+            for v in student_visas:
+                rows.append({
+                    "pathway": {
+                        "study": {
+                            "university": self.prop(u, "University", "name"),
+                            "program": self.prop(p, "Program", "name"),
+                            "requirements": requirements,
+                            "url": self.prop(p, "Program", "url"),
+                        },
+                        "student_visa": {"name": self.prop(v, "Visa", "name_visa"), "subclass": self.prop(v, "Visa", "subclass")},
+                        "pr_visas": list(pr_visas.values()),
+                    }
+                })
+        return rows
+
+    TEMPLATES = (
+        "find_programs_by_university",
+        "find_programs_by_ielts",
+        "visa_info",
+        "visa_eligibility",
+        "settlement_info",
+        "comprehensive_pathway",
+    )
+
+    def run(self, query_type: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if query_type not in self.TEMPLATES:
+            raise SnapshotUnsupported(f"no native implementation for {query_type}")
+        return getattr(self, query_type)(params)
+
+    # -- reporting --------------------------------------------------------
+
+    def memory_report(self) -> Dict[str, Any]:
+        csr_bytes = sum(indptr.nbytes + indices.nbytes for indptr, indices in self.adjacency.values())
+        numeric_bytes = sum(a.nbytes for columns in self.numeric.values() for a in columns.values())
+        label_bytes = sum(a.nbytes for a in self.members.values()) + sum(a.nbytes for a in self.positions.values())
+        column_bytes = {
+            label: sum(_deep_sizeof(values) for values in columns.values()) for label, columns in self.columns.items()
+        }
+        index_bytes = sum(
+            _deep_sizeof(list(index.keys())) + sum(ids.nbytes for ids in index.values()) for index in self.indexes.values()
+        )
+        id_bytes = _deep_sizeof(self.node_ids)
+        total = csr_bytes + label_bytes + sum(column_bytes.values()) + numeric_bytes + index_bytes + id_bytes
+        return {
+            "nodes": self.node_count,
+            "relationships": self.relationship_count,
+            "labels": len(self.members),
+            "relationship_types": len({rel_type for rel_type, _ in self.adjacency}),
+            "bytes": {
+                "csr_adjacency": csr_bytes,
+                "label_membership": label_bytes,
+                "property_columns": sum(column_bytes.values()),
+                "numeric_columns": numeric_bytes,
+                "indexes": index_bytes,
+                "element_ids": id_bytes,
+                "total": total,
+            },
+            "property_columns_by_label": dict(sorted(column_bytes.items(), key=lambda kv: -kv[1])),
+        }
+
+
+def _read_tuples(driver: Driver, cypher: str) -> List[Tuple[Any, ...]]:
+    """Run ``cypher`` once in a read transaction and keep each record as a bare tuple."""
+
+    def _work(tx) -> List[Tuple[Any, ...]]:
+        return [tuple(record.values()) for record in tx.run(cypher)]
+
+    with driver.session(database=NEO4J_DATABASE, default_access_mode=READ_ACCESS, fetch_size=NEO4J_FETCH_SIZE) as session:
+        return session.execute_read(_work)
+
+
+class GraphSnapshotManager(BackgroundRefresher):
+    """Holds the current snapshot and replaces it when the graph version changes.
+
+    The swap is a single reference assignment: in-flight queries finish on the
+    snapshot they started with.
+    """
+
+    thread_name = "graph-snapshot"
+
+    def __init__(
+        self,
+        driver: Optional[Driver],
+        poll_seconds: float = GRAPH_SNAPSHOT_POLL_SECONDS,
+        loader: Callable[[Driver], GraphSnapshot] = GraphSnapshot.load,
+        max_age_seconds: float = GRAPH_SNAPSHOT_MAX_AGE_SECONDS,
+    ) -> None:
+        super().__init__(poll_seconds)
+        self.driver = driver
+        self.poll_seconds = poll_seconds
+        self.max_age_seconds = max_age_seconds
+        self.loader = loader
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def snapshot(self) -> Optional[GraphSnapshot]:
+        return self._snapshot
+
+    def _age_seconds(self, snapshot: GraphSnapshot) -> float:
+        return (datetime.now(timezone.utc) - snapshot.loaded_at).total_seconds()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the graph version changed, the snapshot is too old, or ``force``; returns True if swapped."""
+        if not self.driver:
+            return False
+        with self._refresh_lock:
+            try:
+                current = self._snapshot
+                expired = (
+                    current is not None
+                    and self.max_age_seconds > 0
+                    and self._age_seconds(current) >= self.max_age_seconds
+                )
+                if (
+                    not force
+                    and not expired
+                    and current is not None
+                    and read_graph_version(self.driver) == current.version
+                ):
+                    return False
+                node_count = execute_read(self.driver, NODE_COUNT_QUERY)[0]["count"]
+                if node_count > GRAPH_SNAPSHOT_MAX_NODES:
+                    raise RuntimeError(f"graph has {node_count} nodes, above GRAPH_SNAPSHOT_MAX_NODES")
+                self._snapshot = self.loader(self.driver)
+                self.last_error = None
+                logger.info(
+                    "graph snapshot loaded: %d nodes, %d relationships in %.2fs",
+                    self._snapshot.node_count, self._snapshot.relationship_count, self._snapshot.load_seconds,
+                )
+                return True
+            except Exception as exc:
+                self.last_error = repr(exc)
+                logger.warning("graph snapshot refresh failed, keeping previous snapshot: %r", exc)
+                return False
+
+    def run(self, query_type: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Answer natively, or return None so the caller runs the Cypher template instead."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.fallbacks += 1
+            return None
+        if self.max_age_seconds > 0 and self._age_seconds(snapshot) > 2 * self.max_age_seconds:
+            # Reloads have been failing for a whole max age; don't answer from data this old.
+            self.fallbacks += 1
+            return None
+        try:
+            rows = snapshot.run(query_type, params)
+        except SnapshotUnsupported:
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        base = {"loaded": snapshot is not None, "hits": self.hits, "fallbacks": self.fallbacks, "last_error": self.last_error}
+        if snapshot is None:
+            return base
+        return {
+            **base,
+            "graph_version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "max_age_seconds": self.max_age_seconds,
+            "load_seconds": round(snapshot.load_seconds, 3),
+            "memory": snapshot.memory_report(),
+        }
+
+    def can_start(self) -> bool:
+        return self.driver is not None
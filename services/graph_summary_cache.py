@@ -0,0 +1,121 @@
+"""In-memory graph summary refreshed in the background instead of per request."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from neo4j import Driver
+
+from .background import BackgroundRefresher
+from .neo4j_exec import read_graph_version
+
+logger = logging.getLogger(__name__)
+
+# Full recompute interval, and how often the cheap version probe runs.
+GRAPH_SUMMARY_REFRESH_SECONDS = float(os.getenv("GRAPH_SUMMARY_REFRESH_SECONDS", "300"))
+GRAPH_SUMMARY_VERSION_POLL_SECONDS = float(os.getenv("GRAPH_SUMMARY_VERSION_POLL_SECONDS", "15"))
+
+
+@dataclass(frozen=True)
+class CachedSummary:
+    payload: Dict[str, Any]
+    etag: str
+    graph_version: Optional[str]
+    generated_at: datetime
+    generated_monotonic: float
+    compute_seconds: float
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.monotonic() - self.generated_monotonic)
+
+
+def _etag_for(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+class GraphSummaryCache(BackgroundRefresher):
+    """Keeps the latest graph summary in memory.
+
+    A daemon thread recomputes the summary every ``refresh_seconds`` or as soon
+    as the graph version probe reports a change, so requests never run the
+    expensive statistics queries themselves (except once on a cold cache).
+    """
+
+    thread_name = "graph-summary-refresh"
+
+    def __init__(
+        self,
+        driver: Driver,
+        compute: Callable[[Driver], Dict[str, Any]],
+        refresh_seconds: float = GRAPH_SUMMARY_REFRESH_SECONDS,
+        version_poll_seconds: float = GRAPH_SUMMARY_VERSION_POLL_SECONDS,
+    ) -> None:
+        self.version_poll_seconds = min(version_poll_seconds, refresh_seconds)
+        super().__init__(self.version_poll_seconds)
+        self.driver = driver
+        self.compute = compute
+        self.refresh_seconds = refresh_seconds
+        self._current: Optional[CachedSummary] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[CachedSummary]:
+        return self._current
+
+    def get(self) -> CachedSummary:
+        """Return the cached summary, computing it synchronously on a cold cache."""
+        current = self._current
+        if current is not None:
+            return current
+        return self.refresh()
+
+    def is_stale(self, summary: CachedSummary) -> bool:
+        return self.last_error is not None or summary.age_seconds() > 2 * self.refresh_seconds
+
+    def refresh(self, graph_version: Optional[str] = None) -> CachedSummary:
+        with self._refresh_lock:
+            if graph_version is None:
+                graph_version = read_graph_version(self.driver)
+            start = time.perf_counter()
+            try:
+                payload = self.compute(self.driver)
+            except Exception as exc:
+                self.last_error = repr(exc)
+                raise
+            summary = CachedSummary(
+                payload=payload,
+                etag=_etag_for(payload),
+                graph_version=graph_version,
+                generated_at=datetime.now(timezone.utc),
+                generated_monotonic=time.monotonic(),
+                compute_seconds=time.perf_counter() - start,
+            )
+            self._current = summary
+            self.last_error = None
+            return summary
+
+    def next_wait(self) -> float:
+        # Compute right away on a cold cache; after a failure, back off to the poll interval.
+        return self.version_poll_seconds if self._current or self.last_error else 0
+
+    def run_once(self) -> bool:
+        """Recompute if the graph version moved or the summary is due."""
+        try:
+            current = self._current
+            version = read_graph_version(self.driver)
+            due = current is None or current.age_seconds() >= self.refresh_seconds
+            if due or version != current.graph_version:
+                self.refresh(graph_version=version)
+            return True
+        except Exception as exc:
+            self.last_error = repr(exc)
+            logger.warning("graph summary refresh failed: %r", exc)
+            return False
@@ -0,0 +1,164 @@
+"""Dedicated process pool for bcrypt work so logins do not starve request threads."""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from .auth import hash_password, verify_and_rehash, verify_password
+
+load_dotenv()
+
+# Empty -> one worker per core; "0" -> hash inline (on a worker thread for the async methods).
+_workers_env = os.getenv("HASH_POOL_WORKERS", "").strip()
+HASH_POOL_WORKERS = int(_workers_env) if _workers_env else (os.cpu_count() or 1)
+# Submitted-but-unfinished jobs allowed before callers get HashingPoolFull.
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(max(HASH_POOL_WORKERS, 1) * 4)))
+HASH_POOL_RETRY_AFTER_SECONDS = int(os.getenv("HASH_POOL_RETRY_AFTER_SECONDS", "1"))
+# Passwords per job in hash_many; amortizes process round-trips for bulk imports.
+HASH_POOL_BATCH_SIZE = int(os.getenv("HASH_POOL_BATCH_SIZE", "16"))
+
+
+def _hash_batch(passwords: Sequence[str]) -> List[str]:
+    return [hash_password(password) for password in passwords]
+
+
+class HashingPoolFull(RuntimeError):
+    """Raised when the hashing queue is saturated; map to HTTP 429."""
+
+    def __init__(self, retry_after: int = HASH_POOL_RETRY_AFTER_SECONDS) -> None:
+        super().__init__("Password hashing queue is full, retry later.")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    """Bounded front-end over a process pool running bcrypt.
+
+    ``max_pending`` caps queued plus running jobs. Once the cap is reached new
+    submissions fail fast instead of parking more request threads on a queue.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolFull()
+        self.submitted += 1
+        executor = self._get_executor()
+        if executor is None:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+            finally:
+                self._slots.release()
+            return future
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        return self.submit(hash_password, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self.submit(verify_password, plain_password, hashed_password).result()
+
+    def verify_and_rehash(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return self.submit(verify_and_rehash, plain_password, hashed_password).result()
+
+    def hash_many(self, passwords: Sequence[str], batch_size: int = HASH_POOL_BATCH_SIZE) -> List[str]:
+        """Hash ``passwords`` across all workers, preserving order.
+
+        Meant for bulk jobs: it waits for free slots instead of raising
+        HashingPoolFull, and holds at most half of ``max_pending`` so
+        interactive logins keep getting through.
+        """
+        batches = [passwords[i:i + batch_size] for i in range(0, len(passwords), batch_size)]
+        executor = self._get_executor()
+        if executor is None:
+            return [hashed for batch in batches for hashed in _hash_batch(batch)]
+        share = threading.BoundedSemaphore(max(1, self.max_pending // 2))
+        futures: List[Future] = []
+
+        def _release(_f: Future) -> None:
+            self._slots.release()
+            share.release()
+
+        try:
+            for batch in batches:
+                share.acquire()
+                self._slots.acquire()
+                self.submitted += 1
+                try:
+                    future = executor.submit(_hash_batch, batch)
+                except BaseException:
+                    _release(None)  # type: ignore[arg-type]
+                    raise
+                future.add_done_callback(_release)
+                futures.append(future)
+            return [hashed for future in futures for hashed in future.result()]
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def asubmit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Async ``submit``; without a process pool the work runs on a thread, never on the event loop."""
+        if self._get_executor() is not None:
+            return await asyncio.wrap_future(self.submit(fn, *args))
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolFull()
+        self.submitted += 1
+        try:
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            self._slots.release()
+
+    async def ahash(self, password: str) -> str:
+        return await self.asubmit(hash_password, password)
+
+    async def averify_and_rehash(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self.asubmit(verify_and_rehash, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hashing_pool = HashingPool()
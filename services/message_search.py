@@ -0,0 +1,198 @@
+"""Full-text search over a user's conversation messages.
+
+Postgres has no Vietnamese text search configuration, so messages are indexed
+as ``to_tsvector('simple', fold_diacritics(message))``: lowercase, accents
+stripped, no stemming. Queries are folded the same way, so "dinh cu" finds
+"Định cư". Snippets are cut from the original text in Python, keeping the
+accents that the index throws away.
+
+Messages stored before search existed are indexed once, offline::
+
+    python -m services.message_search backfill
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from .database import SessionLocal
+from .models import Conservation, ConservationDetail
+from .text_normalize import fold_diacritics, tokenize
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "simple"
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "160"))
+SEARCH_BACKFILL_BATCH = int(os.getenv("SEARCH_BACKFILL_BATCH", "2000"))
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_vector_for(message: str) -> ColumnElement:
+    """SQL expression for the ``search_vector`` of a new message."""
+    return func.to_tsvector(SEARCH_CONFIG, fold_diacritics(message or ""))
+
+
+def _tsquery(query: str) -> ColumnElement:
+    # websearch syntax: "exact phrase", OR, -exclude
+    return func.websearch_to_tsquery(SEARCH_CONFIG, fold_diacritics(query))
+
+
+def make_snippet(message: str, query: str, width: int = SEARCH_SNIPPET_CHARS) -> str:
+    """A window of ``message`` around the first query term, matches wrapped in ``<b>``."""
+    terms = set(tokenize(query))
+    matches = [m for m in _WORD_RE.finditer(message) if fold_diacritics(m.group()) in terms]
+    if not matches:
+        return message[:width] + ("…" if len(message) > width else "")
+    start = max(0, matches[0].start() - width // 3)
+    end = min(len(message), start + width)
+    # Don't cut words at the window edges.
+    if start > 0:
+        start = message.find(" ", start) + 1 or start
+    if end < len(message):
+        cut = message.rfind(" ", start, end)
+        if cut > matches[0].end():
+            end = cut
+    parts, cursor = [], start
+    for m in matches:
+        if m.start() < start or m.end() > end:
+            continue
+        parts.append(message[cursor:m.start()])
+        parts.append(f"<b>{m.group()}</b>")
+        cursor = m.end()
+    parts.append(message[cursor:end])
+    return ("…" if start > 0 else "") + "".join(parts).strip() + ("…" if end < len(message) else "")
+
+
+async def search_messages(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    role: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Ranked page of the user's messages matching ``query``, with snippets and the total count."""
+    if not tokenize(query):
+        return {"total": 0, "items": []}
+    tsquery = _tsquery(query)
+    conditions = [Conservation.user_id == user_id, ConservationDetail.search_vector.op("@@")(tsquery)]
+    if role:
+        conditions.append(ConservationDetail.role == role)
+    # ts_rank (not ts_rank_cd) is about half the cost per matched row; normalization 1
+    # divides by log(document length) so long answers don't outrank short questions.
+    rank = func.ts_rank(ConservationDetail.search_vector, tsquery, 1).label("rank")
+    joined = (
+        select(
+            ConservationDetail.id,
+            ConservationDetail.conversation_id,
+            ConservationDetail.role,
+            ConservationDetail.message,
+            ConservationDetail.created_at,
+            Conservation.title,
+            rank,
+            func.count().over().label("total"),
+        )
+        .join(Conservation, Conservation.id == ConservationDetail.conversation_id)
+        .where(*conditions)
+    )
+    rows = (
+        await db.execute(joined.order_by(rank.desc(), ConservationDetail.created_at.desc()).limit(limit).offset(offset))
+    ).all()
+    if rows:
+        total = rows[0].total
+    elif offset:
+        # Paged past the end: the window count came back empty, count separately.
+        total = (await db.execute(select(func.count()).select_from(joined.subquery()))).scalar_one()
+    else:
+        total = 0
+    return {
+        "total": total,
+        "items": [
+            {
+                "id": row.id,
+                "conversation_id": row.conversation_id,
+                "conversation_title": row.title,
+                "role": row.role,
+                "created_at": row.created_at,
+                "rank": round(float(row.rank), 6),
+                "snippet": make_snippet(row.message, query),
+            }
+            for row in rows
+        ],
+    }
+
+
+def check_backfill(session_factory: Callable[[], Session] = SessionLocal) -> bool:
+    """Warn if any message still lacks a search vector; a probe of the partial index, so cheap at startup."""
+    with session_factory() as db:
+        pending = db.execute(
+            select(ConservationDetail.id).where(ConservationDetail.search_vector.is_(None)).limit(1)
+        ).first() is not None
+    if pending:
+        logger.warning("messages without search vectors; run `python -m services.message_search backfill`")
+    return pending
+
+
+def backfill_search_vectors(
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch: int = SEARCH_BACKFILL_BATCH,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Fill ``search_vector`` for messages stored before search existed; returns rows updated."""
+    updated = 0
+    stmt = (
+        update(ConservationDetail)
+        .where(ConservationDetail.id == bindparam("row_id"))
+        .values(search_vector=func.to_tsvector(SEARCH_CONFIG, bindparam("folded")))
+        .execution_options(synchronize_session=False)
+    )
+    last_id = 0
+    while not (stop and stop.is_set()):
+        with session_factory() as db:
+            # Walk the primary key so each batch is a range scan, not a rescan from the start.
+            rows = db.execute(
+                select(ConservationDetail.id, ConservationDetail.message)
+                .where(ConservationDetail.id > last_id, ConservationDetail.search_vector.is_(None))
+                .order_by(ConservationDetail.id)
+                .limit(batch)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            db.connection().execute(
+                stmt, [{"row_id": row.id, "folded": fold_diacritics(row.message or "")} for row in rows]
+            )
+            db.commit()
+        updated += len(rows)
+    if updated:
+        logger.info("search vectors backfilled for %d messages", updated)
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Message search maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="index messages stored before search existed")
+    backfill.add_argument("--batch", type=int, default=SEARCH_BACKFILL_BATCH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "backfill":
+        print(backfill_search_vectors(batch=args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, ForeignKey, Text
+from sqlalchemy import (
+    JSON, BigInteger, Column, Index, Integer, String, Boolean, DateTime, func, ForeignKey, PrimaryKeyConstraint, Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -30,10 +34,13 @@ class Conservation(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     title = Column(String(255), nullable=True)
-    last_update = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    last_update = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
     user = relationship("User", backref="conservations", lazy="joined")
-    details = relationship("ConservationDetail", back_populates="conservation", cascade="all, delete-orphan")
+    # Messages are removed by ON DELETE CASCADE; the ORM does not load them to delete them.
+    details = relationship(
+        "ConservationDetail", back_populates="conservation", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self) -> str:  # pragma: no cover - simple repr
         return f"<Conversation(id={self.id}, user_id={self.user_id}, title={self.title})>"
@@ -41,14 +48,126 @@ class Conservation(Base):
 
 class ConservationDetail(Base):
     __tablename__ = "conservation_detail"
+    # Range-partitioned by month on created_at (see services.partitioning); the
+    # partition key has to be part of the primary key, the ORM still keys rows by id.
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at", name="conservation_detail_pkey"),
+        Index("ix_conservation_detail_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conservation.id"), nullable=False, index=True)
+    id = Column(Integer, autoincrement=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conservation.id", ondelete="CASCADE"), nullable=False, index=True)
     role = Column(String(32), nullable=False)  # 'user' | 'assistant'
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Assistant turns only: the pipeline's analysis dict and end-to-end latency, rolled up by chat_analytics.
+    analysis = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    latency_ms = Column(Integer, nullable=True)
+    # to_tsvector('simple', fold_diacritics(message)); see services.message_search.
+    search_vector = Column(TSVECTOR, nullable=True)
 
     conservation = relationship("Conservation", back_populates="details")
 
+    __mapper_args__ = {"primary_key": [id]}
+
     def __repr__(self) -> str:  # pragma: no cover - simple repr
         return f"<ConservationDetail(id={self.id}, conversation_id={self.conversation_id}, role={self.role})>"
+
+
+class ArchivedPartition(Base):
+    """A monthly conservation_detail partition moved to a gzip NDJSON file and detached."""
+
+    __tablename__ = "archived_partition"
+
+    name = Column(String(64), primary_key=True)  # e.g. conservation_detail_y2025m01
+    range_start = Column(DateTime(timezone=True), nullable=False)
+    range_end = Column(DateTime(timezone=True), nullable=False)
+    path = Column(Text, nullable=False)
+    messages = Column(Integer, nullable=False)
+    conversations = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ArchivedConversation(Base):
+    """Where one conversation's messages sit inside an archive file (one gzip member each)."""
+
+    __tablename__ = "archived_conversation"
+    __table_args__ = (PrimaryKeyConstraint("conversation_id", "partition_name"),)
+
+    conversation_id = Column(Integer, ForeignKey("conservation.id", ondelete="CASCADE"), nullable=False)
+    partition_name = Column(
+        String(64), ForeignKey("archived_partition.name", ondelete="CASCADE"), nullable=False, index=True
+    )
+    offset = Column(BigInteger, nullable=False)
+    length = Column(Integer, nullable=False)
+    messages = Column(Integer, nullable=False)
+
+
+class PrecomputedAnswer(Base):
+    """A full chatbot answer for a frequent question, valid for one graph version."""
+
+    __tablename__ = "precomputed_answer"
+    __table_args__ = (UniqueConstraint("question_key", "graph_version", name="uq_precomputed_answer_key_version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_key = Column(String(512), nullable=False, index=True)  # normalize_question() output
+    graph_version = Column(String(64), nullable=False, index=True)
+    question = Column(Text, nullable=False)  # most common raw form, as sent to the pipeline
+    reply = Column(Text, nullable=False)
+    analysis = Column(JSON, nullable=True)
+    query_results = Column(JSON, nullable=True)
+    query_type = Column(String(64), nullable=True)
+    frequency = Column(Integer, nullable=False, default=0)  # occurrences in the mined window
+    served_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_served_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:  # pragma: no cover - simple repr
+        return f"<PrecomputedAnswer(id={self.id}, question_key={self.question_key!r}, graph_version={self.graph_version})>"
+
+
+class ChatRollup:
+    """Columns shared by the hourly and daily chat analytics rollups."""
+
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    intent = Column(String(64), nullable=False)
+    query_type = Column(String(64), nullable=False)
+    fallback = Column(Boolean, nullable=False)
+    latency_bucket = Column(String(16), nullable=False)
+    turns = Column(Integer, nullable=False, default=0)
+    latency_ms_sum = Column(BigInteger, nullable=False, default=0)
+
+
+class ChatRollupHourly(ChatRollup, Base):
+    __tablename__ = "chat_rollup_hourly"
+    __table_args__ = (PrimaryKeyConstraint("bucket_start", "intent", "query_type", "fallback", "latency_bucket"),)
+
+
+class ChatRollupDaily(ChatRollup, Base):
+    __tablename__ = "chat_rollup_daily"
+    __table_args__ = (PrimaryKeyConstraint("bucket_start", "intent", "query_type", "fallback", "latency_bucket"),)
+
+
+class ChatEntityRollupDaily(Base):
+    """Daily counts of entity values extracted by intent detection (hot entities)."""
+
+    __tablename__ = "chat_entity_rollup_daily"
+    __table_args__ = (PrimaryKeyConstraint("bucket_start", "name", "value"),)
+
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    name = Column(String(64), nullable=False)
+    value = Column(String(128), nullable=False)
+    turns = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsWatermark(Base):
+    """Highest ``conservation_detail.id`` folded into the rollups, per aggregator."""
+
+    __tablename__ = "analytics_watermark"
+
+    name = Column(String(64), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,31 +1,186 @@
 from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
 from typing import Any, Dict, List, Optional
-from neo4j import GraphDatabase, Driver
+from neo4j import Bookmarks, GraphDatabase, Driver, READ_ACCESS
 from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
 
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+# Driver pool / transaction tuning.
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_MAX_TRANSACTION_RETRY_TIME = float(os.getenv("NEO4J_MAX_TRANSACTION_RETRY_TIME", "15"))
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+
+# Cheap probe used to detect graph changes. Empty (the default) uses the
+# database's last committed transaction, taken from the bookmark of a trivial
+# read, so every write moves the version, property edits included. Set it to
+# read an explicit version instead (e.g. a :GraphMeta node the ETL bumps on
+# every load). Do not use node/relationship counts: a property edit, or a
+# delete plus insert, keeps them equal and caches keyed on the version
+# (graph snapshot, precomputed answers, retrieval index) would go stale.
+GRAPH_VERSION_QUERY = os.getenv("GRAPH_VERSION_QUERY", "")
+
+
+class Neo4jMetrics:
+    """Counters for managed read transactions issued through :func:`execute_read`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.transactions = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, elapsed: float, acquire: Optional[float], attempts: int, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.transactions += 1
+            self.retries += max(0, attempts - 1)
+            self.total_seconds += elapsed
+            if not ok:
+                self.failures += 1
+            if acquire is not None:
+                self.total_acquire_seconds += acquire
+                self.max_acquire_seconds = max(self.max_acquire_seconds, acquire)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.transactions or 1
+            return {
+                "in_flight": self.in_flight,
+                "transactions": self.transactions,
+                "retries": self.retries,
+                "failures": self.failures,
+                "avg_acquire_ms": round(self.total_acquire_seconds / n * 1000, 3),
+                "max_acquire_ms": round(self.max_acquire_seconds * 1000, 3),
+                "avg_transaction_ms": round(self.total_seconds / n * 1000, 3),
+                "config": {
+                    "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+                    "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+                    "max_transaction_retry_time": NEO4J_MAX_TRANSACTION_RETRY_TIME,
+                    "fetch_size": NEO4J_FETCH_SIZE,
+                },
+            }
+
+
+neo4j_metrics = Neo4jMetrics()
+
+
 def connect_neo4j() -> Optional[Driver]:
-    """_summary_
+    """Create a pooled Neo4j driver from the environment.
 
     Returns:
-        Optional[Driver]: _description_
+        Optional[Driver]: the driver, or None when Neo4j is not configured.
     """
     if NEO4J_URI and NEO4J_USER and NEO4J_PASSWORD:
-        return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        return GraphDatabase.driver(
+            NEO4J_URI,
+            auth=(NEO4J_USER, NEO4J_PASSWORD),
+            max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+            max_transaction_retry_time=NEO4J_MAX_TRANSACTION_RETRY_TIME,
+        )
     return None
 
-def execute_cypher(driver: Optional[Driver], cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """_summary_
+def execute_read(
+    driver: Optional[Driver],
+    cypher: str,
+    params: Optional[Dict[str, Any]] = None,
+    database: Optional[str] = NEO4J_DATABASE,
+    fetch_size: int = NEO4J_FETCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """Run a read query in a managed read transaction.
 
-    Args:
-        driver (Optional[Driver]): _description_
-        cypher (str): _description_
-        params (Dict[str, Any]): _description_
+    Read sessions are routed to cluster followers/read replicas, and the driver
+    retries the transaction on transient errors (e.g. leader switches) for up
+    to NEO4J_MAX_TRANSACTION_RETRY_TIME seconds.
 
     Returns:
-        List[Dict[str, Any]]: _description_
+        List[Dict[str, Any]]: one dict per record.
     """
     if not driver:
         return []
-    with driver.session() as sess:
-        res = sess.run(cypher, params)
-        return [r.data() for r in res]
\ No newline at end of file
+    params = params or {}
+    started = time.perf_counter()
+    attempts = 0
+    acquire: Optional[float] = None
+
+    def _work(tx) -> List[Dict[str, Any]]:
+        nonlocal attempts, acquire
+        attempts += 1
+        if acquire is None:
+            # First call happens once a connection is acquired and BEGIN is sent.
+            acquire = time.perf_counter() - started
+        return [record.data() for record in tx.run(cypher, params)]
+
+    neo4j_metrics.begin()
+    ok = False
+    try:
+        with driver.session(database=database, default_access_mode=READ_ACCESS, fetch_size=fetch_size) as sess:
+            rows = sess.execute_read(_work)
+        ok = True
+        return rows
+    finally:
+        neo4j_metrics.end(time.perf_counter() - started, acquire, attempts, ok)
+
+def execute_cypher(driver: Optional[Driver], cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run a read-only query; kept for callers of the original helper.
+
+    Returns:
+        List[Dict[str, Any]]: one dict per record.
+    """
+    return execute_read(driver, cypher, params)
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote a label or relationship type for safe Cypher interpolation."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+# Newest bookmark seen by this process; passing it to the next probe makes a lagging
+# cluster member wait until it caught up, so the version never moves backwards.
+_version_bookmarks: Optional[Bookmarks] = None
+
+
+def _last_committed_bookmark(driver: Driver) -> str:
+    # A read transaction's bookmark names the newest transaction committed in the database.
+    global _version_bookmarks
+    with driver.session(
+        database=NEO4J_DATABASE, default_access_mode=READ_ACCESS, bookmarks=_version_bookmarks
+    ) as sess:
+        sess.execute_read(lambda tx: tx.run("RETURN 1").consume())
+        bookmarks = sess.last_bookmarks()
+    if not bookmarks.raw_values:
+        raise RuntimeError("Neo4j returned no bookmark; set GRAPH_VERSION_QUERY to an explicit version")
+    _version_bookmarks = bookmarks
+    return repr(sorted(bookmarks.raw_values))
+
+
+def read_graph_version(driver: Optional[Driver]) -> Optional[str]:
+    """Return a short fingerprint that changes whenever the graph changes.
+
+    Writes that do not touch the graph content (e.g. index creation) move it
+    too; that costs an extra reload, never a stale one.
+
+    Returns:
+        Optional[str]: hex digest of the version probe, or None without a driver.
+    """
+    if not driver:
+        return None
+    if GRAPH_VERSION_QUERY:
+        rows = execute_cypher(driver, GRAPH_VERSION_QUERY, {})
+        raw = repr([sorted(row.items()) for row in rows])
+    else:
+        raw = _last_committed_bookmark(driver)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
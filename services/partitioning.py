@@ -0,0 +1,703 @@
+"""Monthly partitions of ``conservation_detail`` and cold archival of old ones.
+
+``conservation_detail`` is range-partitioned on ``created_at``, one partition
+per UTC month (``conservation_detail_y2026m10``). :func:`ensure_partitions`
+keeps ``PARTITION_MONTHS_AHEAD`` future months created; ``init_db`` calls it
+on every start and :class:`PartitionMaintainer` re-checks periodically.
+
+Partitions whose month ended more than ``PARTITION_ARCHIVE_AFTER_MONTHS`` ago
+are written to ``<PARTITION_ARCHIVE_DIR>/<partition>.ndjson.gz`` plus a
+``.manifest.json``, verified, then detached and dropped. Each conversation is
+its own gzip member in the file (the file still gunzips as a whole), and
+``archived_conversation`` records its offset and length, so reading an
+archived conversation back decompresses only its own messages.
+
+Deleting a conversation (by the API or the retention job) removes its
+``archived_conversation`` rows through ``ON DELETE CASCADE``, so its archived
+messages are unreachable at once. A missing row is the tombstone:
+:func:`compact_archives` rewrites every file whose live members are fewer than
+it holds, copying the remaining members into a new file and deleting the old
+one. :class:`PartitionMaintainer` runs it each cycle and the retention job
+after each purge.
+
+Databases created before partitioning keep a plain table until migrated
+offline with ``python -m services.partitioning migrate``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, delete, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .background import BackgroundRefresher, advisory_lock
+from .database import engine as default_engine
+from .models import ArchivedConversation, ArchivedPartition, Conservation, ConservationDetail
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600"))
+PARTITION_ARCHIVE_ENABLED = os.getenv("PARTITION_ARCHIVE_ENABLED", "false").lower() in {"1", "true", "yes"}
+PARTITION_ARCHIVE_AFTER_MONTHS = int(os.getenv("PARTITION_ARCHIVE_AFTER_MONTHS", "12"))
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "./archive/conservation_detail")
+# Detaching takes a brief exclusive lock on conservation_detail; give up rather than queue writers behind it.
+PARTITION_LOCK_TIMEOUT_MS = int(os.getenv("PARTITION_LOCK_TIMEOUT_MS", "5000"))
+
+PARENT_TABLE = "conservation_detail"
+# Advisory lock held while an archive file is written and published; one archiver at a time across processes.
+ARCHIVE_LOCK_NAME = "conservation-detail-archive"
+ARCHIVE_FORMAT_VERSION = 1
+_PARTITION_RE = re.compile(r"^conservation_detail_y(\d{4})m(\d{2})$")
+_ARCHIVED_COLUMNS = ("id", "conversation_id", "role", "message", "created_at", "analysis", "latency_ms")
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _partition_month(name: str) -> Optional[datetime]:
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": PARENT_TABLE}
+    ).scalar()
+    return kind == "p"
+
+
+def list_partitions(conn: Connection) -> List[Tuple[str, datetime]]:
+    """Attached monthly partitions as ``(name, month start)``, oldest first."""
+    names = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": PARENT_TABLE},
+    ).scalars()
+    partitions = [(name, _partition_month(name)) for name in names]
+    return sorted((name, month) for name, month in partitions if month is not None)
+
+
+def _create_partition(conn: Connection, month: datetime) -> None:
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+    )
+
+
+def ensure_partitions(
+    bind: Engine = default_engine,
+    ahead: int = PARTITION_MONTHS_AHEAD,
+    since: Optional[datetime] = None,
+) -> List[str]:
+    """Create missing partitions from ``since`` (default: this month) to ``ahead`` months out."""
+    with bind.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        existing = {name for name, _ in list_partitions(conn)}
+        current = month_start(datetime.now(timezone.utc))
+        month = month_start(since) if since else current
+        created = []
+        while month <= add_months(current, ahead):
+            if partition_name(month) not in existing:
+                _create_partition(conn, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    if created:
+        logger.info("created partitions: %s", ", ".join(created))
+    return created
+
+
+def _message_line(row: Any) -> bytes:
+    line = {column: getattr(row, column) for column in _ARCHIVED_COLUMNS}
+    if isinstance(line["created_at"], datetime):
+        line["created_at"] = line["created_at"].isoformat()
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write_archive(conn: Connection, name: str, path: Path) -> Tuple[List[Dict[str, int]], int]:
+    """Stream a partition into ``path``, one gzip member per conversation; returns members and row count."""
+    rows = conn.execution_options(stream_results=True, yield_per=5000).execute(
+        text(
+            f"SELECT {', '.join(_ARCHIVED_COLUMNS)} FROM {name} ORDER BY conversation_id, created_at, id"
+        )
+    )
+    members: List[Dict[str, int]] = []
+    total = 0
+
+    with open(path, "wb") as fh:
+        def flush(conversation_id: int, lines: List[bytes]) -> None:
+            member = gzip.compress(b"".join(lines), compresslevel=6)
+            members.append({
+                "conversation_id": conversation_id,
+                "offset": fh.tell(),
+                "length": len(member),
+                "messages": len(lines),
+            })
+            fh.write(member)
+
+        current, lines = None, []
+        for row in rows:
+            if row.conversation_id != current and lines:
+                flush(current, lines)
+                lines = []
+            current = row.conversation_id
+            lines.append(_message_line(row))
+            total += 1
+        if lines:
+            flush(current, lines)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return members, total
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_archived(path: str, offset: int, length: int) -> List[Dict[str, Any]]:
+    """Messages of one conversation from an archive file."""
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        member = fh.read(length)
+    messages = [json.loads(line) for line in gzip.decompress(member).splitlines()]
+    for message in messages:
+        message["created_at"] = datetime.fromisoformat(message["created_at"])
+    return messages
+
+
+def _verify_archive(path: Path, members: Sequence[Dict[str, int]], total: int) -> None:
+    # Read every member back before anything that depends on the file is committed.
+    if sum(len(read_archived(str(path), m["offset"], m["length"])) for m in members) != total:
+        raise RuntimeError(f"archive {path.name} failed verification")
+
+
+def _manifest(name: str, month: datetime, path: Path, members: List[Dict[str, int]]) -> Dict[str, Any]:
+    return {
+        "format": ARCHIVE_FORMAT_VERSION,
+        "partition": name,
+        "range_start": month.isoformat(),
+        "range_end": add_months(month, 1).isoformat(),
+        "file": path.name,
+        "messages": sum(m["messages"] for m in members),
+        "conversations": len(members),
+        "size_bytes": path.stat().st_size,
+        "sha256": _sha256(path),
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+        "members": members,
+    }
+
+
+def _write_manifest(path: Path, name: str, manifest: Dict[str, Any]) -> None:
+    path.with_name(f"{name}.manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def archive_partition(
+    bind: Engine,
+    name: str,
+    archive_dir: str = PARTITION_ARCHIVE_DIR,
+    lock_timeout_ms: int = PARTITION_LOCK_TIMEOUT_MS,
+) -> Optional[Dict[str, Any]]:
+    """Archive one partition to disk, verify the file, then detach and drop it in one transaction.
+
+    Runs under the ``ARCHIVE_LOCK_NAME`` advisory lock, so the maintainer and
+    the CLI never write the same file at once. Returns None, without doing
+    anything, if another process holds the lock or already archived ``name``.
+    """
+    month = _partition_month(name)
+    if month is None:
+        raise ValueError(f"not a monthly partition: {name}")
+    with advisory_lock(bind, ARCHIVE_LOCK_NAME) as acquired:
+        if not acquired:
+            logger.info("skipping %s: another process is archiving", name)
+            return None
+        with bind.connect() as conn:
+            if name not in {partition for partition, _ in list_partitions(conn)}:
+                return None
+        return _archive_partition(bind, name, month, archive_dir, lock_timeout_ms)
+
+
+def _archive_partition(
+    bind: Engine, name: str, month: datetime, archive_dir: str, lock_timeout_ms: int
+) -> Dict[str, Any]:
+    directory = Path(archive_dir).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.ndjson.gz"
+    partial = path.with_name(path.name + ".partial")
+
+    with bind.connect() as conn:
+        members, total = _write_archive(conn, name, partial)
+    # Read every member back before the rows are dropped.
+    _verify_archive(partial, members, total)
+    os.replace(partial, path)
+    manifest = _manifest(name, month, path, members)
+    _write_manifest(path, name, manifest)
+
+    with bind.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        # Rows written after the file was cut (late inserts into an old month) would be lost.
+        live = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar_one()
+        if live != total:
+            raise RuntimeError(f"{name} changed while archiving ({total} archived, {live} now)")
+        conn.execute(
+            insert(ArchivedPartition).values(
+                name=name,
+                range_start=month,
+                range_end=add_months(month, 1),
+                path=str(path),
+                messages=total,
+                conversations=len(members),
+                size_bytes=manifest["size_bytes"],
+                sha256=manifest["sha256"],
+            )
+        )
+        if members:
+            conn.execute(
+                insert(ArchivedConversation),
+                [
+                    {
+                        "conversation_id": m["conversation_id"],
+                        "partition_name": name,
+                        "offset": m["offset"],
+                        "length": m["length"],
+                        "messages": m["messages"],
+                    }
+                    for m in members
+                ],
+            )
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    logger.info("archived %s: %d messages in %d conversations -> %s", name, total, len(members), path)
+    return {key: value for key, value in manifest.items() if key != "members"}
+
+
+def expired_partitions(conn: Connection, after_months: int = PARTITION_ARCHIVE_AFTER_MONTHS) -> List[str]:
+    """Attached partitions whose whole month is older than ``after_months``."""
+    limit = add_months(month_start(datetime.now(timezone.utc)), -after_months)
+    return [name for name, month in list_partitions(conn) if add_months(month, 1) <= limit]
+
+
+def archive_expired(
+    bind: Engine = default_engine,
+    after_months: int = PARTITION_ARCHIVE_AFTER_MONTHS,
+    archive_dir: str = PARTITION_ARCHIVE_DIR,
+    stop: Optional[threading.Event] = None,
+) -> List[Dict[str, Any]]:
+    with bind.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+        names = expired_partitions(conn, after_months)
+    archived = []
+    for name in names:
+        if stop and stop.is_set():
+            break
+        manifest = archive_partition(bind, name, archive_dir)
+        if manifest is not None:
+            archived.append(manifest)
+    return archived
+
+
+# --- compaction after conversations are deleted ---------------------------
+
+def partitions_to_compact(conn: Connection) -> List[str]:
+    """Archived partitions whose file still holds members of deleted conversations."""
+    live = (
+        select(ArchivedConversation.partition_name, func.count().label("live"))
+        .group_by(ArchivedConversation.partition_name)
+        .subquery()
+    )
+    return list(
+        conn.execute(
+            select(ArchivedPartition.name)
+            .outerjoin(live, live.c.partition_name == ArchivedPartition.name)
+            .where(func.coalesce(live.c.live, 0) < ArchivedPartition.conversations)
+            .order_by(ArchivedPartition.range_start)
+        ).scalars()
+    )
+
+
+def _remove_archive_files(path: Path, name: str) -> None:
+    path.unlink(missing_ok=True)
+    path.with_name(f"{name}.manifest.json").unlink(missing_ok=True)
+
+
+def compact_archive(bind: Engine, name: str) -> Optional[Dict[str, Any]]:
+    """Rewrite ``name``'s archive without the members of deleted conversations, then delete the old file.
+
+    Takes the same advisory lock as archiving; returns None if it is held or
+    there is nothing to drop. Conversations deleted while the new file is
+    written stay in it until the next compaction.
+    """
+    with advisory_lock(bind, ARCHIVE_LOCK_NAME) as acquired:
+        if not acquired:
+            logger.info("skipping compaction of %s: another process is archiving", name)
+            return None
+        return _compact_archive(bind, name)
+
+
+def _compact_archive(bind: Engine, name: str) -> Optional[Dict[str, Any]]:
+    with bind.connect() as conn:
+        partition = conn.execute(select(ArchivedPartition).where(ArchivedPartition.name == name)).one_or_none()
+        if partition is None:
+            return None
+        live = conn.execute(
+            select(
+                ArchivedConversation.conversation_id,
+                ArchivedConversation.offset,
+                ArchivedConversation.length,
+                ArchivedConversation.messages,
+            )
+            .where(ArchivedConversation.partition_name == name)
+            .order_by(ArchivedConversation.offset)
+        ).all()
+    old_path = Path(partition.path)
+    if len(live) >= partition.conversations:
+        return None
+    if not live:
+        with bind.begin() as conn:
+            conn.execute(delete(ArchivedPartition).where(ArchivedPartition.name == name))
+        _remove_archive_files(old_path, name)
+        logger.info("removed archive %s: no conversations left", name)
+        return {"partition": name, "conversations": 0, "messages": 0, "removed": True}
+
+    # A new file name, so readers holding the old offsets never read the new file.
+    path = old_path.with_name(f"{name}.{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.ndjson.gz")
+    partial = path.with_name(path.name + ".partial")
+    members: List[Dict[str, int]] = []
+    with open(old_path, "rb") as src, open(partial, "wb") as dst:
+        for entry in live:
+            src.seek(entry.offset)
+            members.append({
+                "conversation_id": entry.conversation_id,
+                "offset": dst.tell(),
+                "length": entry.length,
+                "messages": entry.messages,
+            })
+            # Members are independent gzip streams: copy the bytes, no recompression.
+            dst.write(src.read(entry.length))
+        dst.flush()
+        os.fsync(dst.fileno())
+    _verify_archive(partial, members, sum(m["messages"] for m in members))
+    os.replace(partial, path)
+    manifest = _manifest(name, month_start(partition.range_start), path, members)
+    try:
+        with bind.begin() as conn:
+            conn.execute(
+                update(ArchivedConversation)
+                .where(
+                    ArchivedConversation.partition_name == name,
+                    ArchivedConversation.conversation_id == bindparam("member_id"),
+                )
+                .values(offset=bindparam("member_offset")),
+                [{"member_id": m["conversation_id"], "member_offset": m["offset"]} for m in members],
+            )
+            conn.execute(
+                update(ArchivedPartition)
+                .where(ArchivedPartition.name == name)
+                .values(
+                    path=str(path),
+                    messages=manifest["messages"],
+                    conversations=manifest["conversations"],
+                    size_bytes=manifest["size_bytes"],
+                    sha256=manifest["sha256"],
+                )
+            )
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    _write_manifest(path, name, manifest)
+    old_path.unlink(missing_ok=True)
+    logger.info(
+        "compacted %s: %d of %d conversations kept -> %s",
+        name, len(members), partition.conversations, path,
+    )
+    return {key: value for key, value in manifest.items() if key != "members"}
+
+
+def compact_archives(bind: Engine = default_engine, stop: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """Compact every archive that still holds deleted conversations."""
+    with bind.connect() as conn:
+        names = partitions_to_compact(conn)
+    compacted = []
+    for name in names:
+        if stop and stop.is_set():
+            break
+        result = compact_archive(bind, name)
+        if result is not None:
+            compacted.append(result)
+    return compacted
+
+
+# --- lazy reads of archived conversations ---------------------------------
+
+def _archived_entries_stmt(conversation_ids: Sequence[int]):
+    return (
+        select(
+            ArchivedConversation.conversation_id,
+            ArchivedPartition.path,
+            ArchivedConversation.offset,
+            ArchivedConversation.length,
+        )
+        .join(ArchivedPartition, ArchivedPartition.name == ArchivedConversation.partition_name)
+        .where(ArchivedConversation.conversation_id.in_(conversation_ids))
+        .order_by(ArchivedConversation.conversation_id, ArchivedPartition.range_start)
+    )
+
+
+def _to_details(entries: Iterable[Any]) -> List[ConservationDetail]:
+    # Transient objects (never added to a session), shaped like live rows.
+    return [
+        ConservationDetail(
+            id=message["id"],
+            conversation_id=message["conversation_id"],
+            role=message["role"],
+            message=message["message"],
+            created_at=message["created_at"],
+            analysis=message.get("analysis"),
+            latency_ms=message.get("latency_ms"),
+        )
+        for entry in entries
+        for message in read_archived(entry.path, entry.offset, entry.length)
+    ]
+
+
+def archived_details(db: Session, conversation_id: int) -> List[ConservationDetail]:
+    """Archived messages of a conversation, oldest first; empty if none were archived."""
+    stmt = _archived_entries_stmt([conversation_id])
+    try:
+        return _to_details(db.execute(stmt).all())
+    except FileNotFoundError:
+        # Compacted between the lookup and the read; the new location is committed by now.
+        return _to_details(db.execute(stmt).all())
+
+
+async def aarchived_details(db: AsyncSession, conversation_id: int) -> List[ConservationDetail]:
+    stmt = _archived_entries_stmt([conversation_id])
+    entries = (await db.execute(stmt)).all()
+    if not entries:
+        return []
+    try:
+        return await asyncio.to_thread(_to_details, entries)
+    except FileNotFoundError:
+        return await asyncio.to_thread(_to_details, (await db.execute(stmt)).all())
+
+
+def read_archived_entries(db: Session, conversation_id: int, entries: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Messages behind ``entries`` looked up earlier (e.g. preloaded by the export), re-resolved if compacted since."""
+    try:
+        return [m for entry in entries for m in read_archived(entry.path, entry.offset, entry.length)]
+    except FileNotFoundError:
+        fresh = db.execute(_archived_entries_stmt([conversation_id])).all()
+        return [m for entry in fresh for m in read_archived(entry.path, entry.offset, entry.length)]
+
+
+def archived_messages_by_conversation(db: Session, user_id: int) -> Dict[int, List[Any]]:
+    """Archive locations of all of a user's archived conversations (used by the export)."""
+    owned = select(Conservation.id).where(Conservation.user_id == user_id)
+    entries: Dict[int, List[Any]] = {}
+    for entry in db.execute(_archived_entries_stmt(owned)):
+        entries.setdefault(entry.conversation_id, []).append(entry)
+    return entries
+
+
+# --- offline migration of an existing plain table -------------------------
+
+def migrate_to_partitioned(bind: Engine = default_engine, ahead: int = PARTITION_MONTHS_AHEAD) -> Dict[str, Any]:
+    """Rebuild a plain conservation_detail as the partitioned table, copying every row.
+
+    Holds an exclusive lock on the table for the whole copy: run it in a
+    maintenance window with the API stopped.
+    """
+    old = f"{PARENT_TABLE}_unpartitioned"
+    with bind.begin() as conn:
+        if is_partitioned(conn):
+            return {"migrated": False, "reason": "already partitioned"}
+        conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {old}"))
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {PARENT_TABLE}_id_seq RENAME TO {old}_id_seq"))
+        # Free the constraint and index names the partitioned table is created with.
+        for constraint in conn.execute(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:t)"), {"t": old}
+        ).scalars().all():
+            conn.execute(text(f'ALTER TABLE {old} DROP CONSTRAINT "{constraint}"'))
+        for index in conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": old}
+        ).scalars().all():
+            conn.execute(text(f'DROP INDEX "{index}"'))
+        ConservationDetail.__table__.create(conn)
+        low, high = conn.execute(text(f"SELECT min(created_at), max(created_at) FROM {old}")).one()
+        current = month_start(datetime.now(timezone.utc))
+        month = month_start(low) if low else current
+        last = max(add_months(current, ahead), month_start(high) if high else current)
+        while month <= last:
+            _create_partition(conn, month)
+            month = add_months(month, 1)
+        columns = [column.name for column in ConservationDetail.__table__.columns]
+        select_list = ", ".join("coalesce(created_at, now())" if c == "created_at" else c for c in columns)
+        copied = conn.execute(
+            text(f"INSERT INTO {PARENT_TABLE} ({', '.join(columns)}) SELECT {select_list} FROM {old}")
+        ).rowcount
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{PARENT_TABLE}', 'id'), "
+                f"coalesce((SELECT max(id) FROM {PARENT_TABLE}), 0) + 1, false)"
+            )
+        )
+        conn.execute(text(f"DROP TABLE {old}"))
+    logger.info("migrated %d messages into partitioned %s", copied, PARENT_TABLE)
+    return {"migrated": True, "messages": copied}
+
+
+def partition_status(db: Session) -> Dict[str, Any]:
+    conn = db.connection()
+    partitioned = is_partitioned(conn)
+    partitions = []
+    if partitioned:
+        estimates = dict(
+            conn.execute(
+                text(
+                    "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = to_regclass(:table)"
+                ),
+                {"table": PARENT_TABLE},
+            ).all()
+        )
+        partitions = [
+            {"name": name, "month": month.date().isoformat(), "rows_estimate": max(estimates.get(name, 0), 0)}
+            for name, month in list_partitions(conn)
+        ]
+    archived = db.execute(select(ArchivedPartition).order_by(ArchivedPartition.range_start)).scalars().all()
+    return {
+        "partitioned": partitioned,
+        "partitions": partitions,
+        "archived": [
+            {
+                "name": p.name,
+                "messages": p.messages,
+                "conversations": p.conversations,
+                "size_bytes": p.size_bytes,
+                "path": p.path,
+                "archived_at": p.archived_at,
+            }
+            for p in archived
+        ],
+    }
+
+
+class PartitionMaintainer(BackgroundRefresher):
+    """Keeps future partitions created, archives expired ones if enabled and compacts archives in the background."""
+
+    thread_name = "partition-maintenance"
+    lock_name = "partition-maintenance"
+
+    def __init__(
+        self,
+        bind: Engine = default_engine,
+        interval_seconds: float = PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+        archive: bool = PARTITION_ARCHIVE_ENABLED,
+    ) -> None:
+        super().__init__(interval_seconds, lock_bind=bind)
+        self.bind = bind
+        self.archive = archive
+        self.archived_total = 0
+        self.compacted_total = 0
+
+    def refresh(self) -> None:
+        try:
+            ensure_partitions(self.bind)
+            if self.archive:
+                self.archived_total += len(archive_expired(self.bind, stop=self._stop))
+            # Independent of ``archive``: files written before it was turned off still hold deleted conversations.
+            self.compacted_total += len(compact_archives(self.bind, stop=self._stop))
+            self.last_run_at = datetime.now(timezone.utc)
+            self.last_error = None
+        except Exception as exc:
+            self.last_error = repr(exc)
+            logger.warning("partition maintenance failed: %r", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "archive_enabled": self.archive,
+            "last_run_at": self.last_run_at,
+            "archived_partitions": self.archived_total,
+            "compacted_archives": self.compacted_total,
+            "last_error": self.last_error,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage conservation_detail monthly partitions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="convert an existing plain table (offline, locks the table)")
+    sub.add_parser("ensure", help="create partitions for the coming months")
+    archive = sub.add_parser("archive", help="archive and detach partitions past the threshold")
+    archive.add_argument("--after-months", type=int, default=PARTITION_ARCHIVE_AFTER_MONTHS)
+    archive.add_argument("--dir", default=PARTITION_ARCHIVE_DIR)
+    archive.add_argument("--dry-run", action="store_true", help="only list the partitions")
+    sub.add_parser("compact", help="rewrite archives without the conversations deleted since")
+    sub.add_parser("status", help="print partitions and archives")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "migrate":
+        print(migrate_to_partitioned())
+    elif args.command == "ensure":
+        print(ensure_partitions())
+    elif args.command == "archive":
+        if args.dry_run:
+            with default_engine.connect() as conn:
+                print(expired_partitions(conn, args.after_months) if is_partitioned(conn) else [])
+            return
+        for manifest in archive_expired(after_months=args.after_months, archive_dir=args.dir):
+            print(manifest)
+    elif args.command == "compact":
+        for result in compact_archives():
+            print(result)
+    else:
+        from .database import SessionLocal
+
+        with SessionLocal() as db:
+            print(json.dumps(partition_status(db), default=str, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Precomputed answers for the most frequent user questions.
+
+An offline job mines ``conservation_detail`` for recurring user questions
+(grouped by :func:`normalize_question`), runs each through the normal chat
+pipeline and stores the result keyed by question and graph version. At request
+time :class:`PrecomputedAnswerStore` serves them from memory; entries for any
+other graph version are never served, so a graph change invalidates them.
+
+The graph version is :func:`~services.neo4j_exec.read_graph_version`, which by
+default is Neo4j's last committed transaction: any write, including a
+property-only edit, moves it and retires every stored answer. A custom
+``GRAPH_VERSION_QUERY`` must keep that property; one built on node and
+relationship counts would keep serving answers computed from edited data.
+
+Run the job off-peak, e.g. from cron::
+
+    python -m services.precomputed_answers mine --days 30 --top 200 --min-count 3
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from neo4j import Driver
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .background import BackgroundRefresher
+from .database import SessionLocal
+from .models import ConservationDetail, PrecomputedAnswer
+from .neo4j_exec import read_graph_version
+from .text_normalize import normalize_question
+
+if TYPE_CHECKING:
+    from .chatbot_service import ChatbotService
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTED_ANSWERS_ENABLED = os.getenv("PRECOMPUTED_ANSWERS_ENABLED", "true").lower() in {"1", "true", "yes"}
+# How often the store re-checks the graph version, reloads entries and flushes serve counts.
+PRECOMPUTED_REFRESH_SECONDS = float(os.getenv("PRECOMPUTED_REFRESH_SECONDS", "60"))
+PRECOMPUTED_MINE_DAYS = int(os.getenv("PRECOMPUTED_MINE_DAYS", "30"))
+PRECOMPUTED_TOP_N = int(os.getenv("PRECOMPUTED_TOP_N", "200"))
+PRECOMPUTED_MIN_COUNT = int(os.getenv("PRECOMPUTED_MIN_COUNT", "3"))
+QUESTION_KEY_MAX_CHARS = 512
+
+
+@dataclass(frozen=True)
+class PrecomputedEntry:
+    id: int
+    question: str
+    reply: str
+    analysis: Dict[str, Any]
+    query_results: Optional[List[Dict[str, Any]]]
+    query_type: Optional[str]
+    created_at: Optional[datetime]
+
+
+class PrecomputedAnswerStore(BackgroundRefresher):
+    """In-memory view of the precomputed answers for the current graph version.
+
+    ``lookup`` is a dict access; the background refresh swaps in a new dict
+    when the graph version changes or the job has added entries.
+    """
+
+    thread_name = "precomputed-answers"
+
+    def __init__(
+        self,
+        driver: Optional[Driver],
+        session_factory: Callable[[], Session] = SessionLocal,
+        refresh_seconds: float = PRECOMPUTED_REFRESH_SECONDS,
+    ) -> None:
+        super().__init__(refresh_seconds)
+        self.driver = driver
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self.graph_version: Optional[str] = None
+        self._entries: Dict[str, PrecomputedEntry] = {}
+        self._lock = threading.Lock()
+        self._pending_serves: Dict[int, int] = defaultdict(int)
+        self.lookups = 0
+        self.hits = 0
+        self.loaded_at: Optional[datetime] = None
+
+    def lookup(self, question: str) -> Optional[PrecomputedEntry]:
+        entry = self._entries.get(normalize_question(question))
+        with self._lock:
+            self.lookups += 1
+            if entry is not None:
+                self.hits += 1
+                self._pending_serves[entry.id] += 1
+        return entry
+
+    def contains(self, question: str) -> bool:
+        """Membership check that doesn't count as served traffic."""
+        return normalize_question(question) in self._entries
+
+    def refresh(self) -> None:
+        if not self.driver:
+            return
+        try:
+            version = read_graph_version(self.driver)
+            with self.session_factory() as db:
+                rows = db.scalars(select(PrecomputedAnswer).where(PrecomputedAnswer.graph_version == version)).all()
+                entries = {
+                    row.question_key: PrecomputedEntry(
+                        id=row.id,
+                        question=row.question,
+                        reply=row.reply,
+                        analysis=row.analysis or {},
+                        query_results=row.query_results,
+                        query_type=row.query_type,
+                        created_at=row.created_at,
+                    )
+                    for row in rows
+                }
+                self._flush_serves(db)
+            self._entries = entries
+            self.graph_version = version
+            self.loaded_at = datetime.now(timezone.utc)
+            self.last_error = None
+        except Exception as exc:
+            # A failed version check must not keep serving answers for a graph that may have changed.
+            self._entries = {}
+            self.last_error = repr(exc)
+            logger.warning("precomputed answer refresh failed: %r", exc)
+
+    def _flush_serves(self, db: Session) -> None:
+        with self._lock:
+            pending, self._pending_serves = self._pending_serves, defaultdict(int)
+        if not pending:
+            return
+        now = datetime.now(timezone.utc)
+        for entry_id, count in pending.items():
+            db.execute(
+                update(PrecomputedAnswer)
+                .where(PrecomputedAnswer.id == entry_id)
+                .values(served_count=PrecomputedAnswer.served_count + count, last_served_at=now)
+            )
+        db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups, hits = self.lookups, self.hits
+        return {
+            "graph_version": self.graph_version,
+            "entries": len(self._entries),
+            "loaded_at": self.loaded_at,
+            "lookups": lookups,
+            "hits": hits,
+            "coverage": round(hits / lookups, 4) if lookups else 0.0,
+            "last_error": self.last_error,
+        }
+
+    def can_start(self) -> bool:
+        return self.driver is not None
+
+    def stop(self) -> None:
+        super().stop()
+        if self.driver:
+            try:
+                with self.session_factory() as db:
+                    self._flush_serves(db)
+            except Exception as exc:
+                logger.warning("could not flush precomputed answer serve counts: %r", exc)
+
+
+def mine_hot_questions(
+    db: Session,
+    days: int = PRECOMPUTED_MINE_DAYS,
+    top: int = PRECOMPUTED_TOP_N,
+    min_count: int = PRECOMPUTED_MIN_COUNT,
+) -> List[Tuple[str, str, int]]:
+    """Most frequent user questions in the window as ``(question_key, question, count)``.
+
+    Exact duplicates are grouped in SQL; folding accents and punctuation
+    happens here, and the most common raw form represents each key.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    stmt = (
+        select(ConservationDetail.message, func.count().label("n"))
+        .where(ConservationDetail.role == "user", ConservationDetail.created_at >= since)
+        .group_by(ConservationDetail.message)
+        .execution_options(yield_per=5000)
+    )
+    counts: Counter[str] = Counter()
+    forms: Dict[str, Counter[str]] = defaultdict(Counter)
+    for message, n in db.execute(stmt):
+        key = normalize_question(message or "")
+        if not key or len(key) > QUESTION_KEY_MAX_CHARS:
+            continue
+        counts[key] += n
+        forms[key][message.strip()] += n
+    return [
+        (key, forms[key].most_common(1)[0][0], count)
+        for key, count in counts.most_common(top)
+        if count >= min_count
+    ]
+
+
+def precompute(
+    db: Session,
+    service: "ChatbotService",
+    questions: List[Tuple[str, str, int]],
+    pause_seconds: float = 0.0,
+) -> Dict[str, int]:
+    """Answer each mined question for the current graph version and upsert it.
+
+    Keys that already have an answer for this version are skipped, so reruns
+    only pay for new questions. Answers produced while the graph changed
+    under the job are discarded rather than stored under the wrong version.
+    """
+    if not service.driver:
+        raise RuntimeError("Neo4j is required: answers are keyed by graph version.")
+    version = read_graph_version(service.driver)
+    existing = set(
+        db.scalars(select(PrecomputedAnswer.question_key).where(PrecomputedAnswer.graph_version == version)).all()
+    )
+    report = {"mined": len(questions), "skipped": 0, "stored": 0, "failed": 0}
+    for key, question, count in questions:
+        if key in existing:
+            db.execute(
+                update(PrecomputedAnswer)
+                .where(PrecomputedAnswer.question_key == key, PrecomputedAnswer.graph_version == version)
+                .values(frequency=count)
+            )
+            report["skipped"] += 1
+            continue
+        try:
+            result = service.chat(question)
+        except Exception as exc:
+            logger.warning("precompute failed for %r: %r", question, exc)
+            report["failed"] += 1
+            continue
+        if read_graph_version(service.driver) != version:
+            logger.info("graph changed during precompute; stopping")
+            break
+        values = {
+            "question_key": key,
+            "graph_version": version,
+            "question": question,
+            "reply": result.reply,
+            "analysis": result.analysis,
+            "query_results": result.query_results,
+            "query_type": result.query_type,
+            "frequency": count,
+        }
+        db.execute(
+            insert(PrecomputedAnswer)
+            .values(**values)
+            .on_conflict_do_update(constraint="uq_precomputed_answer_key_version", set_=values)
+        )
+        db.commit()
+        report["stored"] += 1
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    db.commit()
+    return report
+
+
+def purge_stale(db: Session, current_version: str) -> int:
+    """Delete entries built for other graph versions; they can never be served again."""
+    result = db.execute(delete(PrecomputedAnswer).where(PrecomputedAnswer.graph_version != current_version))
+    db.commit()
+    return result.rowcount or 0
+
+
+def _age_seconds(now: datetime, then: Optional[datetime]) -> Optional[float]:
+    if then is None:
+        return None
+    if then.tzinfo is None:
+        then = then.replace(tzinfo=timezone.utc)
+    return round((now - then).total_seconds(), 1)
+
+
+def build_report(db: Session, store: Optional[PrecomputedAnswerStore], current_version: Optional[str]) -> Dict[str, Any]:
+    """Coverage (share of chat traffic served from precomputed answers) and staleness."""
+    rows = db.execute(
+        select(
+            PrecomputedAnswer.graph_version,
+            func.count(),
+            func.coalesce(func.sum(PrecomputedAnswer.served_count), 0),
+            func.min(PrecomputedAnswer.created_at),
+            func.max(PrecomputedAnswer.created_at),
+        ).group_by(PrecomputedAnswer.graph_version)
+    ).all()
+    now = datetime.now(timezone.utc)
+    current = next((row for row in rows if row[0] == current_version), None)
+    stale = [row for row in rows if row[0] != current_version]
+    return {
+        "graph_version": current_version,
+        "coverage": store.stats() if store else None,
+        "current": {
+            "entries": current[1] if current else 0,
+            "served": int(current[2]) if current else 0,
+            "oldest_generated_at": current[3] if current else None,
+            "newest_generated_at": current[4] if current else None,
+            "age_seconds": _age_seconds(now, current[4]) if current else None,
+        },
+        "stale": {
+            "versions": len(stale),
+            "entries": sum(row[1] for row in stale),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mine frequent questions and precompute their answers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mine = sub.add_parser("mine", help="mine hot questions and precompute answers for the current graph")
+    mine.add_argument("--days", type=int, default=PRECOMPUTED_MINE_DAYS)
+    mine.add_argument("--top", type=int, default=PRECOMPUTED_TOP_N)
+    mine.add_argument("--min-count", type=int, default=PRECOMPUTED_MIN_COUNT)
+    mine.add_argument("--pause", type=float, default=0.5, help="seconds between pipeline runs (LLM rate limits)")
+    mine.add_argument("--dry-run", action="store_true", help="print the mined questions only")
+    mine.add_argument("--keep-stale", action="store_true", help="keep entries for previous graph versions")
+    sub.add_parser("report", help="print coverage and staleness")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from .chatbot_service import ChatbotService
+
+    with SessionLocal() as db:
+        if args.command == "report":
+            from .neo4j_exec import connect_neo4j
+
+            driver = connect_neo4j()
+            print(build_report(db, None, read_graph_version(driver) if driver else None))
+            return
+        questions = mine_hot_questions(db, args.days, args.top, args.min_count)
+        if args.dry_run:
+            for key, question, count in questions:
+                print(f"{count:6d}  {question}")
+            return
+        service = ChatbotService()
+        try:
+            report = precompute(db, service, questions, args.pause)
+            if not args.keep_stale:
+                report["purged"] = purge_stale(db, read_graph_version(service.driver))
+            print(report)
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
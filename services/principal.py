@@ -0,0 +1,133 @@
+"""Resolve JWT bearer tokens into cached authenticated principals."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .auth import decode_token
+from .cache import TTLCache
+from .models import User
+
+load_dotenv()
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAXSIZE = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The minimal identity needed to authorize a request."""
+
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active))
+
+
+_principal_cache: TTLCache[Principal] = TTLCache(
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+    maxsize=PRINCIPAL_CACHE_MAXSIZE,
+)
+
+
+def build_token_claims(user: User) -> Dict[str, Any]:
+    """Claims embedded in access tokens so requests can skip the email lookup."""
+    return {"sub": user.email, "uid": user.id, "role": user.role}
+
+
+def parse_bearer(authorization: Optional[str]) -> Optional[str]:
+    """Return the token from a ``Bearer <token>`` header, or None if malformed."""
+    if not authorization:
+        return None
+    try:
+        scheme, token = authorization.split()
+    except ValueError:
+        return None
+    if scheme.lower() != "bearer":
+        return None
+    return token
+
+
+def _lookup(token: str) -> Tuple[Optional[Principal], Optional[Select]]:
+    """Decode ``token``; returns its cached principal, or the statement that loads its user.
+
+    Both are None when the token is invalid. Shared by the sync and async
+    resolvers so that only running the statement differs between them.
+    """
+    payload = decode_token(token)
+    if not payload:
+        return None, None
+
+    uid = payload.get("uid")
+    if uid is not None:
+        try:
+            uid = int(uid)
+        except (TypeError, ValueError):
+            return None, None
+        principal = _principal_cache.get(uid)
+        if principal is not None:
+            return principal, None
+        return None, select(User).where(User.id == uid)
+
+    email = payload.get("sub")
+    if not email:
+        return None, None
+    return None, select(User).filter_by(email=email)
+
+
+def _remember(user: Optional[User]) -> Optional[Principal]:
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    _principal_cache.set(principal.id, principal)
+    return principal
+
+
+def resolve_principal(db: Session, token: str) -> Optional[Principal]:
+    """
+    Verify a JWT and return the principal it refers to.
+
+    Tokens carrying a ``uid`` claim are served from the principal cache when
+    possible; only cache misses and legacy ``sub``-only tokens touch the DB.
+
+    Returns:
+        The principal, or None if the token is invalid or the user is gone.
+    """
+    principal, stmt = _lookup(token)
+    if stmt is None:
+        return principal
+    return _remember(db.execute(stmt).scalar_one_or_none())
+
+
+async def aresolve_principal(db: AsyncSession, token: str) -> Optional[Principal]:
+    """Async variant of :func:`resolve_principal` for native-coroutine routes."""
+    principal, stmt = _lookup(token)
+    if stmt is None:
+        return principal
+    return _remember((await db.execute(stmt)).scalar_one_or_none())
+
+
+def invalidate_principal(user_id: Any) -> None:
+    """Drop a cached principal after the underlying user row changed."""
+    try:
+        _principal_cache.invalidate(int(user_id))
+    except (TypeError, ValueError):
+        return
+
+
+def principal_cache_stats() -> Dict[str, Any]:
+    return _principal_cache.stats()
@@ -0,0 +1,169 @@
+"""Load the prompts/ library once and compose per-intent system prompts."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import string
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(os.getenv("PROMPTS_DIR") or Path(__file__).resolve().parent.parent / "prompts")
+
+# Prompt files stacked into the system instruction for each intent, in order.
+# CORE and CHECKLIST_STYLE frame every intent so the prefix stays stable.
+INTENT_PROMPTS: Dict[str, Sequence[str]] = {
+    "STUDY": ("CORE", "STUDY_COMPARE", "CHECKLIST_STYLE"),
+    "COMPARE": ("CORE", "STUDY_COMPARE", "CHECKLIST_STYLE"),
+    "VISA": ("CORE", "VISA", "CHECKLIST_STYLE"),
+    "SETTLEMENT": ("CORE", "SETTLEMENT", "CHECKLIST_STYLE"),
+    "PATHWAY": ("CORE", "CROSS-RELATION_PATHWAY_TIMELINE", "CHECKLIST_STYLE"),
+    "TIMELINE": ("CORE", "CROSS-RELATION_PATHWAY_TIMELINE", "CHECKLIST_STYLE"),
+}
+DEFAULT_INTENT_PROMPTS: Sequence[str] = ("CORE", "CHECKLIST_STYLE")
+INTENT_DETECTION_PROMPT = "INTENT_ENTITY_DETECTION"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer: ~4 UTF-8 bytes per token.
+
+    Vietnamese diacritics take 2-3 bytes each, which this accounts for better
+    than counting characters.
+    """
+    return math.ceil(len(text.encode("utf-8")) / 4) if text else 0
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt compiled once at load time; ``sha`` identifies its exact content."""
+
+    name: str
+    text: str
+
+    @cached_property
+    def sha(self) -> str:
+        return _digest(self.text)
+
+    @cached_property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+    @cached_property
+    def template(self) -> string.Template:
+        return string.Template(self.text)
+
+    @cached_property
+    def placeholders(self) -> List[str]:
+        return sorted({
+            match.group("named") or match.group("braced")
+            for match in self.template.pattern.finditer(self.text)
+            if match.group("named") or match.group("braced")
+        })
+
+    def render(self, **values: object) -> str:
+        # safe_substitute: prompts are free text and may contain stray "$".
+        return self.template.safe_substitute(values) if values else self.text
+
+
+@dataclass(frozen=True)
+class ComposedPrompt:
+    """A request prompt split into a cacheable static prefix and per-call content.
+
+    ``static`` goes into the model's system instruction, which providers can
+    cache across calls; only ``dynamic`` changes per request.
+    """
+
+    static: PromptTemplate
+    dynamic: str
+
+    @property
+    def static_sha(self) -> str:
+        return self.static.sha
+
+    @property
+    def tokens(self) -> Dict[str, int]:
+        static_tokens = self.static.tokens
+        dynamic_tokens = estimate_tokens(self.dynamic)
+        return {"static": static_tokens, "dynamic": dynamic_tokens, "total": static_tokens + dynamic_tokens}
+
+
+class PromptRegistry:
+    """Reads ``*.txt`` from ``directory`` once; composed system prompts are memoized per intent."""
+
+    def __init__(self, directory: Path = PROMPTS_DIR) -> None:
+        self.directory = Path(directory)
+        self.prompts: Dict[str, PromptTemplate] = {}
+        self._systems: Dict[str, PromptTemplate] = {}
+        self.load()
+
+    def load(self) -> None:
+        prompts: Dict[str, PromptTemplate] = {}
+        if self.directory.is_dir():
+            for path in sorted(self.directory.glob("*.txt")):
+                text = path.read_text(encoding="utf-8").strip()
+                if not text:
+                    logger.warning("Prompt %s is empty; callers fall back to their built-in prompt", path.name)
+                    continue
+                template = PromptTemplate(name=path.stem, text=text)
+                template.sha, template.placeholders  # compile and hash once, at load time
+                prompts[path.stem] = template
+        else:
+            logger.warning("Prompt directory %s not found; using built-in prompts only", self.directory)
+        self.prompts = prompts
+        self._systems = {}
+
+    def get(self, name: str) -> Optional[PromptTemplate]:
+        return self.prompts.get(name)
+
+    def system_prompt(self, intent: Optional[str], base: str = "") -> PromptTemplate:
+        """
+        Return the system instruction for ``intent``: ``base`` followed by the intent's prompt files.
+
+        The result is identical for every call with the same intent, which is
+        what lets provider-side caching reuse it.
+        """
+        names = INTENT_PROMPTS.get((intent or "").upper(), DEFAULT_INTENT_PROMPTS)
+        key = f"{'+'.join(names)}|{_digest(base)}"
+        system = self._systems.get(key)
+        if system is None:
+            parts = [base.strip()] if base.strip() else []
+            parts.extend(self.prompts[name].text for name in names if name in self.prompts)
+            system = PromptTemplate(name="+".join(names), text="\n\n".join(parts))
+            self._systems[key] = system
+        return system
+
+    def compose(self, intent: Optional[str], dynamic: str, base: str = "") -> ComposedPrompt:
+        return ComposedPrompt(static=self.system_prompt(intent, base), dynamic=dynamic)
+
+    def stats(self, base: str = "", count_tokens: Optional[Callable[[str], int]] = None) -> Dict[str, object]:
+        """
+        Per-prompt hashes and token sizes, plus the composed system prompt per intent.
+
+        Args:
+            count_tokens: exact counter (e.g. the model's ``count_tokens``); defaults to :func:`estimate_tokens`.
+        """
+        count = count_tokens or estimate_tokens
+
+        def _row(template: PromptTemplate) -> Dict[str, object]:
+            return {"sha": template.sha, "chars": len(template.text), "tokens": count(template.text)}
+
+        return {
+            "directory": str(self.directory),
+            "token_counter": "exact" if count_tokens else "estimate",
+            "prompts": {name: _row(template) for name, template in self.prompts.items()},
+            "intents": {intent: _row(self.system_prompt(intent, base)) for intent in INTENT_PROMPTS},
+        }
+
+
+@lru_cache(maxsize=1)
+def get_prompt_registry() -> PromptRegistry:
+    return PromptRegistry()
@@ -0,0 +1,210 @@
+"""Retention: purge conversations not updated for ``RETENTION_DAYS``.
+
+Each batch is one set-based statement that picks up to ``batch_size`` expired
+conversations (``FOR UPDATE SKIP LOCKED``, so rows a request is touching are
+left for the next run) and deletes them; their messages go with them through
+the ``ON DELETE CASCADE`` foreign key. Batches run under a short
+``lock_timeout`` with a pause in between so the job never holds locks for
+long or starves chat traffic.
+
+Deleted conversations that had been archived lose their
+``archived_conversation`` rows by the same cascade; after a run that deleted
+anything, :func:`services.partitioning.compact_archives` rewrites the archive
+files without them.
+
+CLI::
+
+    python -m services.retention [--days N] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .background import BackgroundRefresher
+from .database import SessionLocal
+from .models import Conservation, ConservationDetail
+from .partitioning import compact_archives
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() in {"1", "true", "yes"}
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "365"))
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+# Conversations per DELETE; their messages are removed by the cascade in the same statement.
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "200"))
+RETENTION_PAUSE_SECONDS = float(os.getenv("RETENTION_PAUSE_SECONDS", "0.5"))
+RETENTION_LOCK_TIMEOUT_MS = int(os.getenv("RETENTION_LOCK_TIMEOUT_MS", "2000"))
+
+PURGE_BATCH_SQL = """
+    WITH doomed AS (
+        SELECT id FROM conservation
+        WHERE last_update < :cutoff
+        ORDER BY last_update, id
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    ),
+    gone AS (
+        DELETE FROM conservation c USING doomed WHERE c.id = doomed.id RETURNING c.id
+    )
+    SELECT
+        (SELECT count(*) FROM gone) AS conversations,
+        -- Read from the statement's snapshot, i.e. before the cascade ran.
+        (SELECT count(*) FROM conservation_detail d JOIN doomed ON d.conversation_id = doomed.id) AS messages
+"""
+
+
+def count_expired(db: Session, cutoff: datetime) -> Dict[str, int]:
+    """How many conversations and messages a purge with ``cutoff`` would delete."""
+    expired = select(Conservation.id).where(Conservation.last_update < cutoff)
+    conversations = db.execute(select(func.count()).select_from(expired.subquery())).scalar_one()
+    messages = db.execute(
+        select(func.count()).where(ConservationDetail.conversation_id.in_(expired))
+    ).scalar_one()
+    return {"conversations": conversations, "messages": messages}
+
+
+class RetentionJob(BackgroundRefresher):
+    """Deletes expired conversations in throttled batches, periodically in the background."""
+
+    thread_name = "retention"
+    lock_name = "retention"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        days: int = RETENTION_DAYS,
+        interval_seconds: float = RETENTION_INTERVAL_SECONDS,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        pause_seconds: float = RETENTION_PAUSE_SECONDS,
+        lock_timeout_ms: int = RETENTION_LOCK_TIMEOUT_MS,
+    ) -> None:
+        super().__init__(interval_seconds)
+        self.session_factory = session_factory
+        self.days = days
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.lock_timeout_ms = lock_timeout_ms
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.progress: Optional[Dict[str, Any]] = None
+        self._run_lock = threading.Lock()
+
+    def cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(days=self.days)
+
+    def _purge_batch(self, cutoff: datetime) -> Dict[str, int]:
+        with self.session_factory() as db:
+            # SET LOCAL lasts until this transaction ends.
+            db.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+            row = db.execute(text(PURGE_BATCH_SQL), {"cutoff": cutoff, "batch": self.batch_size}).one()
+            db.commit()
+        return {"conversations": row.conversations, "messages": row.messages}
+
+    def purge(self, cutoff: Optional[datetime] = None) -> Dict[str, Any]:
+        """Delete everything older than ``cutoff`` batch by batch; returns the run's totals."""
+        if not self._run_lock.acquire(blocking=False):
+            raise RuntimeError("retention purge already running")
+        cutoff = cutoff or self.cutoff()
+        progress: Dict[str, Any] = {
+            "cutoff": cutoff,
+            "started_at": datetime.now(timezone.utc),
+            "finished_at": None,
+            "batches": 0,
+            "conversations": 0,
+            "messages": 0,
+            "lock_timeouts": 0,
+            "compacted_archives": 0,
+        }
+        self.progress = progress
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    deleted = self._purge_batch(cutoff)
+                except OperationalError as exc:
+                    # lock_timeout hit (e.g. a long transaction on a user row); back off and retry.
+                    if "lock timeout" not in str(exc.orig).lower():
+                        raise
+                    progress["lock_timeouts"] += 1
+                    self._stop.wait(self.pause_seconds * 4)
+                    continue
+                if not deleted["conversations"]:
+                    break
+                progress["batches"] += 1
+                progress["conversations"] += deleted["conversations"]
+                progress["messages"] += deleted["messages"]
+                if progress["batches"] % 50 == 0:
+                    logger.info(
+                        "retention: %d conversations / %d messages deleted so far",
+                        progress["conversations"], progress["messages"],
+                    )
+                self._stop.wait(self.pause_seconds)
+            if progress["conversations"]:
+                try:
+                    progress["compacted_archives"] = len(compact_archives(stop=self._stop))
+                except Exception as exc:
+                    # The purge itself is done; the partition maintainer retries the compaction next cycle.
+                    logger.warning("retention: archive compaction failed: %r", exc)
+            progress["finished_at"] = datetime.now(timezone.utc)
+            progress["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+            self.last_run = progress
+            if progress["conversations"]:
+                logger.info(
+                    "retention: deleted %d conversations / %d messages older than %s in %.1fs",
+                    progress["conversations"], progress["messages"], cutoff.isoformat(),
+                    progress["elapsed_seconds"],
+                )
+            return progress
+        finally:
+            self.progress = None
+            self._run_lock.release()
+
+    def refresh(self) -> None:
+        try:
+            self.purge()
+            self.last_error = None
+        except Exception as exc:
+            self.last_error = repr(exc)
+            logger.warning("retention purge failed: %r", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "days": self.days,
+            "batch_size": self.batch_size,
+            "running": self.progress,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete conversations older than the retention period.")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=RETENTION_PAUSE_SECONDS, help="seconds between batches")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be deleted")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    job = RetentionJob(days=args.days, batch_size=args.batch_size, pause_seconds=args.pause)
+    if args.dry_run:
+        with SessionLocal() as db:
+            print(count_expired(db, job.cutoff()))
+        return
+    print(job.purge())
+
+
+if __name__ == "__main__":
+    main()
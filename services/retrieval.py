@@ -0,0 +1,600 @@
+"""Local passage retrieval over descriptive graph text.
+
+Passages (InfoSection, AboutInfo, EligibilityRequirement, SettlementPage) are
+embedded with a local, pluggable embedder and stored in a memory-mapped float32
+matrix. Small corpora are searched exactly; past ``RETRIEVAL_IVF_MIN_PASSAGES``
+an inverted-file (IVF) coarse index limits each query to the rows of its
+``nprobe`` nearest centroids, which keeps search in single-digit milliseconds
+at a million passages.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from neo4j import READ_ACCESS, Driver
+
+from .background import BackgroundRefresher
+from .neo4j_exec import NEO4J_DATABASE, NEO4J_FETCH_SIZE, quote_identifier, read_graph_version
+from .text_normalize import tokenize
+
+try:  # POSIX only; elsewhere syncs are not guarded across processes
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "true").lower() in {"1", "true", "yes"}
+RETRIEVAL_DIR = Path(os.getenv("RETRIEVAL_DIR") or Path(__file__).resolve().parent.parent / "data" / "retrieval")
+RETRIEVAL_EMBEDDER = os.getenv("RETRIEVAL_EMBEDDER", "hashing")
+RETRIEVAL_DIM = int(os.getenv("RETRIEVAL_DIM", "384"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.2"))
+# Below this many passages search is exact; above it the IVF index is used.
+RETRIEVAL_IVF_MIN_PASSAGES = int(os.getenv("RETRIEVAL_IVF_MIN_PASSAGES", "50000"))
+# IVF lists (0 = 4 * sqrt(passages)) and lists scanned per query.
+RETRIEVAL_NLIST = int(os.getenv("RETRIEVAL_NLIST", "0"))
+RETRIEVAL_NPROBE = int(os.getenv("RETRIEVAL_NPROBE", "8"))
+RETRIEVAL_REFRESH_SECONDS = float(os.getenv("RETRIEVAL_REFRESH_SECONDS", "600"))
+RETRIEVAL_LABELS: Tuple[str, ...] = tuple(
+    label.strip()
+    for label in os.getenv("RETRIEVAL_LABELS", "InfoSection,AboutInfo,EligibilityRequirement,SettlementPage").split(",")
+    if label.strip()
+)
+# Passages embedded and upserted per batch while a sync streams a label.
+RETRIEVAL_SYNC_PAGE_SIZE = 5000
+# Rows scored per block in exact search; bounds memory to queries x block floats.
+EXACT_SEARCH_BLOCK_ROWS = 65536
+# Passage text is truncated to this before it is embedded and stored for prompting.
+PASSAGE_TEXT_MAX_CHARS = 1200
+
+
+def build_passages_query(label: str) -> str:
+    # Property names differ per label; coalesce over the ones the graph uses.
+    # Read in one streamed pass: elementId is not indexed, so cursor pages would each scan and sort the label.
+    return f"""
+MATCH (n:{quote_identifier(label)})
+RETURN elementId(n) AS id,
+       toString(coalesce(n.title, n.heading, n.field, n.key, n.name, '')) AS title,
+       toString(coalesce(n.content, n.text, n.description, n.summary, '')) AS text,
+       n.url AS url
+"""
+
+
+class Embedder(Protocol):
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return L2-normalized float32 vectors, shape ``(len(texts), dim)``."""
+
+
+class HashingEmbedder:
+    """Feature-hashed unigrams and bigrams over accent-folded tokens.
+
+    Needs no vocabulary or model files, so any process embeds identically and
+    new passages never invalidate existing vectors.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = RETRIEVAL_DIM) -> None:
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            for gram in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = zlib.crc32(gram.encode("utf-8"))
+                # The top bit picks the sign so collisions tend to cancel out.
+                out[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        np.copyto(out, np.sign(out) * np.log1p(np.abs(out)))
+        return _normalize(out)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder}
+
+
+def get_embedder(name: str = RETRIEVAL_EMBEDDER, dim: int = RETRIEVAL_DIM) -> Embedder:
+    try:
+        return EMBEDDERS[name](dim)
+    except KeyError:
+        raise ValueError(f"Unknown retrieval embedder {name!r}; available: {sorted(EMBEDDERS)}") from None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+    if scores.shape[0] <= k:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+def _kmeans(sample: np.ndarray, nlist: int, iterations: int = 8, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        for j in range(nlist):
+            members = order[bounds[j]:bounds[j + 1]]
+            # Empty lists are reseeded from a random sample vector.
+            centroids[j] = sample[members].sum(axis=0) if len(members) else sample[rng.integers(len(sample))]
+        _normalize(centroids)
+    return centroids
+
+
+@dataclass(frozen=True)
+class Passage:
+    id: str
+    label: str
+    title: str
+    text: str
+    url: Optional[str] = None
+    digest: str = ""
+
+    @classmethod
+    def from_record(cls, label: str, record: Dict[str, Any]) -> "Passage":
+        title, text = record.get("title") or "", record.get("text") or ""
+        digest = hashlib.sha1(f"{title}\n{text}".encode("utf-8")).hexdigest()[:16]
+        return cls(
+            id=record["id"],
+            label=label,
+            title=title,
+            text=text[:PASSAGE_TEXT_MAX_CHARS],
+            url=record.get("url"),
+            digest=digest,
+        )
+
+    @property
+    def embed_text(self) -> str:
+        return f"{self.title}\n{self.text}"
+
+
+class VectorStore:
+    """
+    Passage vectors in ``vectors.f32`` (a memory-mapped ``capacity x dim`` matrix),
+    passage rows in a SQLite side file, a small JSON manifest of header fields
+    and an optional IVF index.
+
+    Rows of deleted passages are zeroed and reused; ``assign[row]`` is the row's
+    IVF list, or -1 for a free row. Only ids and digests are held in memory;
+    passage text is read from SQLite for the rows a search returns, and a sync
+    writes only the passages it changed.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    PASSAGES_FILE = "passages.sqlite3"
+    MANIFEST_FILE = "manifest.json"
+    ASSIGN_FILE = "assign.npy"
+    IVF_FILE = "ivf.npy"
+    LOCK_FILE = "sync.lock"
+    _PASSAGE_COLUMNS = ("id", "label", "title", "text", "url", "digest")
+
+    def __init__(self, directory: Path, dim: int, embedder_name: str) -> None:
+        self.directory = Path(directory)
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self.rows: Dict[str, int] = {}
+        self.digests: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self.ivf_built_for = 0
+        self._lists: Optional[List[np.ndarray]] = None
+        self.graph_version: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    @contextmanager
+    def sync_lock(self) -> Iterator[bool]:
+        """Non-blocking exclusive lock on the store's files; yields False if another process holds it."""
+        if fcntl is None:
+            yield True
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(self.LOCK_FILE), "a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _passages_db(self) -> sqlite3.Connection:
+        # Callers serialize access (RetrievalIndex holds its lock), so one connection is shared across threads.
+        if self._db is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self._path(self.PASSAGES_FILE), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS passages (row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+                "label TEXT, title TEXT, text TEXT, url TEXT, digest TEXT)"
+            )
+        return self._db
+
+    def _write_passages(self, rows: Sequence[int], passages: Sequence[Passage]) -> None:
+        self._passages_db().executemany(
+            "INSERT OR REPLACE INTO passages (row, id, label, title, text, url, digest) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(row, p.id, p.label, p.title, p.text, p.url, p.digest) for row, p in zip(rows, passages)],
+        )
+
+    def passages_at(self, rows: Iterable[int]) -> Dict[int, Passage]:
+        """Passages stored at ``rows`` (free rows are left out)."""
+        rows = sorted(set(rows))
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        cursor = self._passages_db().execute(
+            f"SELECT row, {', '.join(self._PASSAGE_COLUMNS)} FROM passages WHERE row IN ({placeholders})", rows
+        )
+        return {record[0]: Passage(**dict(zip(self._PASSAGE_COLUMNS, record[1:]))) for record in cursor}
+
+    def load(self) -> bool:
+        """Open an existing store; returns False (leaving it empty) if none matches this embedder."""
+        manifest_path = self._path(self.MANIFEST_FILE)
+        if not manifest_path.exists():
+            return False
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("dim") != self.dim or manifest.get("embedder") != self.embedder_name:
+            logger.info("Retrieval store at %s was built with another embedder; rebuilding", self.directory)
+            return False
+        self.capacity = manifest["capacity"]
+        self.vectors = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        self.assign = np.load(self._path(self.ASSIGN_FILE))
+        self.graph_version = manifest.get("graph_version")
+        self.ivf_built_for = manifest.get("ivf_built_for", 0)
+        ivf_path = self._path(self.IVF_FILE)
+        self.centroids = np.load(ivf_path) if ivf_path.exists() and self.ivf_built_for else None
+        self._lists = None
+        self.rows, self.digests = {}, {}
+        for row, pid, digest in self._passages_db().execute("SELECT row, id, digest FROM passages"):
+            self.rows[pid] = row
+            self.digests[pid] = digest
+        return True
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.vectors is not None:
+            self.vectors.flush()
+        np.save(self._path(self.ASSIGN_FILE), self.assign)
+        if self.centroids is not None:
+            np.save(self._path(self.IVF_FILE), self.centroids)
+        self._passages_db().commit()
+        manifest = {
+            "dim": self.dim,
+            "embedder": self.embedder_name,
+            "capacity": self.capacity,
+            "graph_version": self.graph_version,
+            "ivf_built_for": self.ivf_built_for if self.centroids is not None else 0,
+        }
+        tmp = self._path(self.MANIFEST_FILE + ".tmp")
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, self._path(self.MANIFEST_FILE))
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(self.VECTORS_FILE + ".tmp")
+        grown = np.memmap(tmp, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        if self.vectors is not None:
+            grown[: self.capacity] = self.vectors
+            del self.vectors
+        grown.flush()
+        del grown
+        os.replace(tmp, self._path(self.VECTORS_FILE))
+        self.vectors = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.assign = np.concatenate([self.assign, np.full(capacity - self.capacity, -1, dtype=np.int32)])
+        self.capacity = capacity
+
+    def _nearest_list(self, vectors: np.ndarray) -> np.ndarray:
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def upsert(self, passages: Sequence[Passage], vectors: np.ndarray) -> None:
+        new = sum(1 for p in passages if p.id not in self.rows)
+        free = np.flatnonzero(self.assign < 0)
+        if new > len(free):
+            self._grow(self.capacity + new - len(free))
+            free = np.flatnonzero(self.assign < 0)
+        free_iter = iter(free.tolist())
+        rows = np.array([self.rows[p.id] if p.id in self.rows else next(free_iter) for p in passages], dtype=np.int64)
+        self.vectors[rows] = vectors
+        self.assign[rows] = self._nearest_list(vectors)
+        self._write_passages(rows.tolist(), passages)
+        for row, passage in zip(rows.tolist(), passages):
+            self.rows[passage.id] = row
+            self.digests[passage.id] = passage.digest
+        self._lists = None
+
+    def delete(self, ids: Iterable[str]) -> int:
+        ids = [pid for pid in ids if pid in self.rows]
+        rows = [self.rows.pop(pid) for pid in ids]
+        if rows:
+            self.vectors[rows] = 0.0
+            self.assign[rows] = -1
+            self._passages_db().executemany("DELETE FROM passages WHERE row = ?", [(row,) for row in rows])
+            for pid in ids:
+                del self.digests[pid]
+            self._lists = None
+        return len(rows)
+
+    def build_ivf(self, nlist: int = RETRIEVAL_NLIST, sample_size: int = 100_000) -> None:
+        live = np.flatnonzero(self.assign >= 0)
+        if len(live) < RETRIEVAL_IVF_MIN_PASSAGES:
+            self.centroids = None
+            self.assign[live] = 0
+        else:
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(live, size=min(sample_size, len(live)), replace=False))
+            nlist = min(nlist or int(4 * math.sqrt(len(live))), len(sample_rows))
+            self.centroids = _kmeans(np.asarray(self.vectors[sample_rows]), nlist)
+            for start in range(0, len(live), 65536):
+                chunk = live[start:start + 65536]
+                self.assign[chunk] = self._nearest_list(np.asarray(self.vectors[chunk]))
+        self.ivf_built_for = len(live)
+        self._lists = None
+        self.warm()
+
+    def needs_ivf_rebuild(self) -> bool:
+        if self.size < RETRIEVAL_IVF_MIN_PASSAGES:
+            return self.centroids is not None
+        # Centroids drift as the corpus changes; retrain once it has doubled.
+        return self.centroids is None or self.size > 2 * self.ivf_built_for
+
+    def warm(self) -> None:
+        """Rebuild the inverted lists now so the next search doesn't pay for it."""
+        if self.centroids is not None:
+            self._inverted_lists()
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        lists = self._lists
+        if lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            lists = [order[bounds[j]:bounds[j + 1]] for j in range(len(self.centroids))]
+            self._lists = lists
+        return lists
+
+    def _exact_search(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """Score the whole batch against one block of rows at a time, keeping a running top-k."""
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.capacity, EXACT_SEARCH_BLOCK_ROWS):
+            stop = min(start + EXACT_SEARCH_BLOCK_ROWS, self.capacity)
+            scores = queries @ np.asarray(self.vectors[start:stop]).T
+            scores[:, self.assign[start:stop] < 0] = -np.inf
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), (len(queries), stop - start))], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                rows = np.take_along_axis(rows, keep, axis=1)
+            best_scores, best_rows = scores, rows
+        results = []
+        for row_scores, row_ids in zip(best_scores, best_rows):
+            order = np.argsort(-row_scores)
+            results.append([(int(row_ids[i]), float(row_scores[i])) for i in order if np.isfinite(row_scores[i])])
+        return results
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int = RETRIEVAL_NPROBE) -> List[List[Tuple[int, float]]]:
+        """Top-``k`` ``(row, score)`` pairs per query row (dot product of unit vectors)."""
+        if not self.rows:
+            return [[] for _ in range(len(queries))]
+        if self.centroids is None:
+            return self._exact_search(queries, k)
+
+        lists = self._inverted_lists()
+        nprobe = min(nprobe, len(lists))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results = []
+        for query, probe in zip(queries, probes):
+            rows = np.sort(np.concatenate([lists[j] for j in probe]))
+            if not len(rows):
+                results.append([])
+                continue
+            scores = np.asarray(self.vectors[rows]) @ query
+            top = _top_k(scores, k)
+            results.append([(int(rows[i]), float(scores[i])) for i in top])
+        return results
+
+
+class RetrievalIndex(BackgroundRefresher):
+    """Keeps the passage store in sync with Neo4j and answers text queries.
+
+    A daemon thread re-syncs when the graph version changes; syncing only
+    re-embeds passages whose content digest changed. The version moves on
+    every graph write (see ``read_graph_version``), so an edited passage is
+    re-embedded within one ``refresh_seconds``. API processes share the
+    store directory: one syncs under ``VectorStore.sync_lock`` and the others
+    reload its files instead of syncing again.
+    """
+
+    thread_name = "retrieval-sync"
+    refresh_on_start = True
+
+    def __init__(
+        self,
+        driver: Optional[Driver],
+        directory: Path = RETRIEVAL_DIR,
+        embedder: Optional[Embedder] = None,
+        labels: Sequence[str] = RETRIEVAL_LABELS,
+        refresh_seconds: float = RETRIEVAL_REFRESH_SECONDS,
+    ) -> None:
+        super().__init__(refresh_seconds)
+        self.driver = driver
+        self.embedder = embedder or get_embedder()
+        self.labels = tuple(labels)
+        self.refresh_seconds = refresh_seconds
+        self.store = VectorStore(directory, self.embedder.dim, self.embedder.name)
+        self._lock = threading.RLock()
+        self.last_sync: Optional[Dict[str, Any]] = None
+
+    def load(self) -> int:
+        with self._lock:
+            self.store.load()
+            return self.store.size
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K, min_score: float = RETRIEVAL_MIN_SCORE) -> List[Dict[str, Any]]:
+        return self.search_many([query], k, min_score)[0]
+
+    def search_many(
+        self, queries: Sequence[str], k: int = RETRIEVAL_TOP_K, min_score: float = RETRIEVAL_MIN_SCORE
+    ) -> List[List[Dict[str, Any]]]:
+        vectors = self.embedder.embed(queries)
+        with self._lock:
+            hits = self.store.search(vectors, k)
+            passages = self.store.passages_at(
+                row for query_hits in hits for row, score in query_hits if score >= min_score
+            )
+            return [
+                [
+                    {**asdict(passages[row]), "score": round(score, 4)}
+                    for row, score in query_hits
+                    if score >= min_score and row in passages
+                ]
+                for query_hits in hits
+            ]
+
+    def upsert(self, passages: Sequence[Passage], warm: bool = True) -> int:
+        """Embed and store ``passages`` whose digest differs from the stored copy."""
+        with self._lock:
+            changed = [p for p in passages if self.store.digests.get(p.id) != p.digest]
+        if changed:
+            # Embedding runs outside the lock so searches continue meanwhile.
+            vectors = self.embedder.embed([p.embed_text for p in changed])
+            with self._lock:
+                self.store.upsert(changed, vectors)
+                if warm:
+                    self.store.warm()
+        return len(changed)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            removed = self.store.delete(ids)
+            self.store.warm()
+            return removed
+
+    def _read_passages(self, label: str) -> Iterable[Passage]:
+        # Auto-commit read so records stream fetch_size at a time while sync embeds earlier batches.
+        session = self.driver.session(
+            database=NEO4J_DATABASE, default_access_mode=READ_ACCESS, fetch_size=NEO4J_FETCH_SIZE
+        )
+        with session:
+            for record in session.run(build_passages_query(label)):
+                row = record.data()
+                if row["title"] or row["text"]:
+                    yield Passage.from_record(label, row)
+
+    def sync(self, graph_version: Optional[str] = None) -> Dict[str, Any]:
+        """Diff every configured label against the store and apply the changes."""
+        start = time.perf_counter()
+        seen: set = set()
+        updated = 0
+        for label in self.labels:
+            batch: List[Passage] = []
+            for passage in self._read_passages(label):
+                seen.add(passage.id)
+                batch.append(passage)
+                if len(batch) >= RETRIEVAL_SYNC_PAGE_SIZE:
+                    updated += self.upsert(batch, warm=False)
+                    batch = []
+            updated += self.upsert(batch, warm=False)
+        with self._lock:
+            removed = self.store.delete([pid for pid in list(self.store.rows) if pid not in seen])
+            if self.store.needs_ivf_rebuild():
+                self.store.build_ivf()
+            self.store.warm()
+            self.store.graph_version = graph_version
+            self.store.save()
+            size = self.store.size
+        self.last_sync = {
+            "passages": size,
+            "updated": updated,
+            "deleted": removed,
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+        logger.info("retrieval sync: %s", self.last_sync)
+        return self.last_sync
+
+    def refresh_if_changed(self) -> bool:
+        if not self.driver:
+            return False
+        try:
+            version = read_graph_version(self.driver)
+            if version is not None and version == self.store.graph_version:
+                return False
+            with self.store.sync_lock() as acquired:
+                if not acquired:
+                    return False  # another process is syncing; adopt its result next cycle
+                # Another process may already have synced this version to disk.
+                with self._lock:
+                    self.store.load()
+                if version is None or version != self.store.graph_version:
+                    self.sync(version)
+            self.last_error = None
+            return True
+        except Exception as exc:
+            self.last_error = repr(exc)
+            logger.warning("retrieval sync failed, keeping previous index: %r", exc)
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            store = self.store
+            return {
+                "embedder": self.embedder.name,
+                "dim": self.embedder.dim,
+                "passages": store.size,
+                "capacity": store.capacity,
+                "mode": "ivf" if store.centroids is not None else "exact",
+                "nlist": 0 if store.centroids is None else len(store.centroids),
+                "nprobe": RETRIEVAL_NPROBE,
+                "graph_version": store.graph_version,
+                "last_sync": self.last_sync,
+                "last_error": self.last_error,
+            }
+
+    def refresh(self) -> None:
+        self.refresh_if_changed()
+
+    def can_start(self) -> bool:
+        return self.driver is not None
@@ -1,19 +1,158 @@
 from __future__ import annotations
-from typing import Optional
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 from neo4j import Driver
 
-DEFAULT_SCHEMA = (
-"Labels: Person(name, born), Movie(title, released), Genre(name); "
-"Relationships: (Person)-[:ACTED_IN]->(Movie), (Person)-[:DIRECTED]->(Movie), (Movie)-[:IN_GENRE]->(Genre)"
-)
+from .background import BackgroundRefresher
+from .neo4j_exec import execute_read, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schema.txt"
+# Nodes / relationships sampled per label / type; keeps introspection cheap on large graphs.
+SCHEMA_SAMPLE_SIZE = int(os.getenv("SCHEMA_SAMPLE_SIZE", "200"))
+SCHEMA_REFRESH_SECONDS = float(os.getenv("SCHEMA_REFRESH_SECONDS", "900"))
+
+
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    """(label)-[TYPE]->(label) triples plus per-label property keys."""
+
+    triples: Tuple[Tuple[str, str, str], ...]
+    properties: Dict[str, Tuple[str, ...]]
+    source: str = "live"
+    generated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash; stable across refreshes while the schema is unchanged."""
+        canonical = json.dumps(
+            {"triples": sorted(self.triples), "properties": {k: sorted(v) for k, v in sorted(self.properties.items())}},
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    def to_text(self) -> str:
+        lines = [f"{src} -[{rel}]-> {dst}" for src, rel, dst in sorted(self.triples)]
+        if self.properties:
+            lines.append("")
+            lines.extend(f"{label}({', '.join(sorted(props))})" for label, props in sorted(self.properties.items()))
+        return "\n".join(lines)
+
+
+def _static_schema() -> SchemaSnapshot:
+    """Parse the bundled schema.txt (``A -[T]-> B`` per line) as the offline fallback."""
+    triples: List[Tuple[str, str, str]] = []
+    if SCHEMA_PATH.exists():
+        for line in SCHEMA_PATH.read_text(encoding="utf-8").splitlines():
+            src, sep, rest = line.partition(" -[")
+            rel, sep2, dst = rest.partition("]-> ")
+            if sep and sep2:
+                triples.append((src.strip(), rel.strip(), dst.strip()))
+    return SchemaSnapshot(triples=tuple(triples), properties={}, source="static")
+
+
+def _union(parts: List[str]) -> str:
+    return "\nUNION ALL\n".join(parts)
+
+
+def introspect_schema(driver: Driver, sample_size: int = SCHEMA_SAMPLE_SIZE) -> SchemaSnapshot:
+    """Derive schema triples and properties from the live graph by sampling."""
+    labels = sorted(row["label"] for row in execute_read(driver, "CALL db.labels()"))
+    rel_types = sorted(row["relationshipType"] for row in execute_read(driver, "CALL db.relationshipTypes()"))
+
+    properties: Dict[str, set] = {label: set() for label in labels}
+    if labels:
+        cypher = _union([
+            f"MATCH (n:{quote_identifier(label)}) WITH n LIMIT $sample "
+            f"UNWIND keys(n) AS key RETURN DISTINCT $label_{i} AS label, key"
+            for i, label in enumerate(labels)
+        ])
+        params = {"sample": sample_size, **{f"label_{i}": label for i, label in enumerate(labels)}}
+        for row in execute_read(driver, cypher, params):
+            properties[row["label"]].add(row["key"])
+
+    triples: set = set()
+    if rel_types:
+        cypher = _union([
+            f"MATCH (a)-[r:{quote_identifier(rel_type)}]->(b) WITH a, b LIMIT $sample "
+            f"UNWIND labels(a) AS src UNWIND labels(b) AS dst RETURN DISTINCT src, $type_{i} AS rel, dst"
+            for i, rel_type in enumerate(rel_types)
+        ])
+        params = {"sample": sample_size, **{f"type_{i}": rel_type for i, rel_type in enumerate(rel_types)}}
+        for row in execute_read(driver, cypher, params):
+            triples.add((row["src"], row["rel"], row["dst"]))
+
+    return SchemaSnapshot(
+        triples=tuple(sorted(triples)),
+        properties={label: tuple(sorted(keys)) for label, keys in properties.items()},
+    )
+
+
+class SchemaIntrospector(BackgroundRefresher):
+    """Caches the live schema snapshot and refreshes it on a background thread.
+
+    ``fingerprint`` changes only when the schema content changes, so it can key
+    downstream prompt and generated-query caches.
+    """
+
+    thread_name = "schema-introspection"
+
+    def __init__(self, driver: Optional[Driver], refresh_seconds: float = SCHEMA_REFRESH_SECONDS) -> None:
+        super().__init__(refresh_seconds)
+        self.driver = driver
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> SchemaSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    @property
+    def fingerprint(self) -> str:
+        return self.snapshot.fingerprint
+
+    @property
+    def text(self) -> str:
+        return self.snapshot.to_text()
+
+    def refresh(self) -> SchemaSnapshot:
+        with self._lock:
+            if not self.driver:
+                snapshot = _static_schema()
+            else:
+                try:
+                    snapshot = introspect_schema(self.driver)
+                    self.last_error = None
+                except Exception as exc:
+                    self.last_error = repr(exc)
+                    logger.warning("schema introspection failed, keeping previous snapshot: %r", exc)
+                    snapshot = self._snapshot or _static_schema()
+            previous = self._snapshot
+            if previous is not None and previous.fingerprint == snapshot.fingerprint:
+                return previous
+            self._snapshot = snapshot
+            return snapshot
+
+    def can_start(self) -> bool:
+        return self.driver is not None
+
 
 def read_schema_snapshot(driver: Optional[Driver]) -> str:
-    """Create a short, human-readable schema snapshot. Avoid heavy introspection for speed."""
+    """Create a human-readable schema snapshot from the live graph (schema.txt if unavailable)."""
     if not driver:
-        return DEFAULT_SCHEMA
-
-    with driver.session() as sess:
-        labels = ", ".join(sorted(sess.run("CALL db.labels()").value()))
-        rel_types = ", ".join(sorted(sess.run("CALL db.relationshipTypes()").value()))
-        props = ", ".join(sorted(sess.run("CALL db.propertyKeys()").value()))
-    return f"Labels: {labels}; Relationships: {rel_types}; Properties: {props}"
\ No newline at end of file
+        return _static_schema().to_text()
+    return introspect_schema(driver).to_text()
@@ -0,0 +1,53 @@
+"""Additive, idempotent DDL for tables that already exist.
+
+``Base.metadata.create_all`` only creates missing tables; columns and indexes
+added to existing tables are listed here and applied by ``init_db`` on every
+start. Each statement must be safe to re-run.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+SCHEMA_UPGRADES: List[str] = [
+    # chat analytics: per-turn analysis and latency on assistant messages
+    "ALTER TABLE conservation_detail ADD COLUMN IF NOT EXISTS analysis JSONB",
+    "ALTER TABLE conservation_detail ADD COLUMN IF NOT EXISTS latency_ms INTEGER",
+    # message search: accent-folded tsvector; NULL rows are filled by `python -m services.message_search backfill`
+    "ALTER TABLE conservation_detail ADD COLUMN IF NOT EXISTS search_vector TSVECTOR",
+    "CREATE INDEX IF NOT EXISTS ix_conservation_detail_search_vector ON conservation_detail USING gin (search_vector)",
+    # Only rows still waiting for the backfill; empty once it has run, so the startup check is an index probe.
+    """
+    CREATE INDEX IF NOT EXISTS ix_conservation_detail_search_vector_missing
+    ON conservation_detail (id) WHERE search_vector IS NULL
+    """,
+    # retention: messages cascade with their conversation; expired conversations are found by last_update
+    """
+    DO $$
+    DECLARE fk text;
+    BEGIN
+        SELECT conname INTO fk FROM pg_constraint
+        WHERE conrelid = 'conservation_detail'::regclass AND contype = 'f'
+          AND confrelid = 'conservation'::regclass AND confdeltype <> 'c';
+        IF fk IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE conservation_detail DROP CONSTRAINT %I', fk);
+            ALTER TABLE conservation_detail ADD CONSTRAINT conservation_detail_conversation_id_fkey
+                FOREIGN KEY (conversation_id) REFERENCES conservation (id) ON DELETE CASCADE NOT VALID;
+            ALTER TABLE conservation_detail VALIDATE CONSTRAINT conservation_detail_conversation_id_fkey;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_conservation_last_update ON conservation (last_update)",
+    # Compaction looks up an archive's live members by partition.
+    "CREATE INDEX IF NOT EXISTS ix_archived_conversation_partition_name ON archived_conversation (partition_name)",
+]
+
+
+def apply_schema_upgrades(bind: Engine) -> None:
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as conn:
+        for ddl in SCHEMA_UPGRADES:
+            conn.execute(text(ddl))
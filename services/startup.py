@@ -0,0 +1,117 @@
+"""Startup orchestration helpers: timed steps, readiness state and warm-up."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from neo4j import Driver
+
+from .database import DB_POOL_SIZE, engine
+from .neo4j_exec import NEO4J_DATABASE
+
+logger = logging.getLogger(__name__)
+
+# Initialize dependencies in a background thread after the server starts listening.
+APP_LAZY_INIT = os.getenv("APP_LAZY_INIT", "false").lower() in {"1", "true", "yes"}
+# Pre-open pool connections during startup so the first requests don't pay for them.
+APP_WARMUP = os.getenv("APP_WARMUP", "false").lower() in {"1", "true", "yes"}
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+NEO4J_WARMUP_SESSIONS = int(os.getenv("NEO4J_WARMUP_SESSIONS", "4"))
+
+
+@dataclass
+class StartupStep:
+    name: str
+    started_ms: float
+    duration_ms: float
+    ok: bool
+    error: Optional[str] = None
+
+
+class StartupReport:
+    """Collects per-step timings; ``started_ms`` is relative to the report's origin."""
+
+    def __init__(self, origin: Optional[float] = None) -> None:
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.steps: List[StartupStep] = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.ready_ms: Optional[float] = None
+
+    def _elapsed_ms(self, since: Optional[float] = None) -> float:
+        return round((time.perf_counter() - (self.origin if since is None else since)) * 1000, 2)
+
+    def record(self, name: str, start: float, ok: bool = True, error: Optional[str] = None) -> None:
+        step = StartupStep(
+            name=name,
+            started_ms=round((start - self.origin) * 1000, 2),
+            duration_ms=self._elapsed_ms(start),
+            ok=ok,
+            error=error,
+        )
+        with self._lock:
+            self.steps.append(step)
+        logger.info("[startup] %s %s in %.1f ms", name, "ok" if ok else "FAILED", step.duration_ms)
+
+    def run(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn`` as a named step; failures are recorded and return None."""
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            self.record(name, start, ok=False, error=repr(exc))
+            print(f"[startup] {name} failed: {exc!r}")
+            return None
+        self.record(name, start)
+        return result
+
+    def failed(self, name: str) -> bool:
+        with self._lock:
+            return any(step.name == name and not step.ok for step in self.steps)
+
+    def mark_ready(self) -> None:
+        self.ready_ms = self._elapsed_ms()
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = sorted((asdict(step) for step in self.steps), key=lambda s: s["started_ms"])
+        return {"ready": self.ready, "ready_ms": self.ready_ms, "steps": steps}
+
+
+def warm_db_pool(connections: int = DB_WARMUP_CONNECTIONS) -> int:
+    """Open ``connections`` pooled connections concurrently and return them to the pool."""
+    def _open(_: int) -> None:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            # Hold the connection briefly so the others can't reuse it.
+            time.sleep(0.05)
+
+    with ThreadPoolExecutor(max_workers=max(connections, 1)) as pool:
+        list(pool.map(_open, range(connections)))
+    return connections
+
+
+def warm_neo4j(driver: Optional[Driver], sessions: int = NEO4J_WARMUP_SESSIONS) -> int:
+    """Verify connectivity and open a few sessions so the driver pool has live connections."""
+    if not driver:
+        return 0
+
+    def _ping(_: int) -> None:
+        with driver.session(database=NEO4J_DATABASE) as session:
+            session.run("RETURN 1").consume()
+            time.sleep(0.05)
+
+    driver.verify_connectivity()
+    with ThreadPoolExecutor(max_workers=max(sessions, 1)) as pool:
+        list(pool.map(_ping, range(sessions)))
+    return sessions
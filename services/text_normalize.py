@@ -0,0 +1,27 @@
+"""Accent-insensitive text normalization for Vietnamese/English search."""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_diacritics(text: str) -> str:
+    """Lowercase and strip diacritics: "Định cư Úc" -> "dinh cu uc".
+
+    "đ" is a separate letter rather than a combining mark, so NFD leaves it
+    alone; it is mapped to "d" explicitly.
+    """
+    decomposed = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold_diacritics(text))
+
+
+def normalize_question(text: str) -> str:
+    """Key for recurring questions: folded tokens, so case, accents and punctuation don't split counts."""
+    return " ".join(tokenize(text))
@@ -0,0 +1,257 @@
+"""Bulk user import from CSV or NDJSON.
+
+Rows are validated with the same ``UserCreate`` model as registration, then
+checked for duplicates (within the file and against ``users``) with one
+set-based query, hashed across the bcrypt process pool and inserted in
+chunks. On PostgreSQL each chunk is COPYed into a temporary table and moved
+over with ``INSERT ... ON CONFLICT DO NOTHING``, so an account registered
+concurrently is reported for its row instead of failing the whole chunk.
+
+CLI::
+
+    python -m services.user_import users.csv [--format csv|ndjson] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from models.user import UserCreate
+from .database import SessionLocal
+from .hashing_pool import hashing_pool
+from .models import User
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "20000"))
+USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "1000"))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+_COLUMNS = ("email", "username", "full_name", "role", "hashed_password")
+
+
+class UserImportError(ValueError):
+    """The payload can't be imported at all (bad format, too many rows)."""
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    return "csv"
+
+
+def _iter_rows(data: str, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, raw row)``; a raw row that isn't a dict is a parse error."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or "email" not in reader.fieldnames:
+            raise UserImportError("CSV header must include email, username and password")
+        for row in reader:
+            if any(row.values()):
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, "")}
+        return
+    if fmt != "ndjson":
+        raise UserImportError(f"Unsupported format {fmt!r}; expected one of {', '.join(IMPORT_FORMATS)}")
+    for line_no, line in enumerate(data.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, f"invalid JSON: {exc.msg}"
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def parse_users(data: str, fmt: str) -> Tuple[List[Tuple[int, UserCreate]], List[Dict[str, Any]]]:
+    """Validate every row; returns the valid users and one error entry per rejected row."""
+    valid: List[Tuple[int, UserCreate]] = []
+    errors: List[Dict[str, Any]] = []
+    for line_no, raw in _iter_rows(data, fmt):
+        if len(valid) + len(errors) >= USER_IMPORT_MAX_ROWS:
+            raise UserImportError(f"Too many rows; at most {USER_IMPORT_MAX_ROWS} per import")
+        if not isinstance(raw, dict):
+            errors.append({"line": line_no, "error": raw if isinstance(raw, str) else "row must be an object"})
+            continue
+        try:
+            user = UserCreate(**raw)
+        except ValidationError as exc:
+            errors.append({"line": line_no, "email": raw.get("email"), "error": _validation_message(exc)})
+            continue
+        if len(user.password.encode("utf-8")) > 72:
+            errors.append({"line": line_no, "email": user.email, "error": "password: at most 72 bytes in UTF-8"})
+            continue
+        valid.append((line_no, user))
+    return valid, errors
+
+
+def _reject_duplicates(
+    db: Session, users: List[Tuple[int, UserCreate]], errors: List[Dict[str, Any]]
+) -> List[Tuple[int, UserCreate]]:
+    """Drop rows whose email/username repeats earlier in the file or already exists."""
+    emails = {user.email for _, user in users}
+    usernames = {user.username for _, user in users}
+    taken_emails: set = set()
+    taken_usernames: set = set()
+    if users:
+        for email, username in db.execute(
+            select(User.email, User.username).where(or_(User.email.in_(emails), User.username.in_(usernames)))
+        ):
+            taken_emails.add(email)
+            taken_usernames.add(username)
+    seen_emails: set = set()
+    seen_usernames: set = set()
+    kept = []
+    for line_no, user in users:
+        if user.email in taken_emails:
+            error = "Email already exists"
+        elif user.username in taken_usernames:
+            error = "Username already exists"
+        elif user.email in seen_emails:
+            error = "Duplicate email in file"
+        elif user.username in seen_usernames:
+            error = "Duplicate username in file"
+        else:
+            error = None
+        seen_emails.add(user.email)
+        seen_usernames.add(user.username)
+        if error:
+            errors.append({"line": line_no, "email": user.email, "error": error})
+        else:
+            kept.append((line_no, user))
+    return kept
+
+
+def _copy_chunk(db: Session, rows: List[Dict[str, Any]]) -> set:
+    """COPY a chunk into a temp table and insert what doesn't conflict; returns inserted emails."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] if row[column] is not None else "" for column in _COLUMNS])
+    buffer.seek(0)
+    columns = ", ".join(_COLUMNS)
+    # Dropped at commit, so it never outlives the chunk's transaction.
+    db.execute(
+        text(
+            "CREATE TEMP TABLE user_import_stage "
+            "(email text, username text, full_name text, role text, hashed_password text) ON COMMIT DROP"
+        )
+    )
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY user_import_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    inserted = db.execute(
+        text(
+            f"INSERT INTO users ({columns}, is_active) "
+            f"SELECT email, username, full_name, role, hashed_password, true FROM user_import_stage "
+            "ON CONFLICT DO NOTHING RETURNING email"
+        )
+    ).scalars()
+    return set(inserted)
+
+
+def _insert_chunk(db: Session, rows: List[Dict[str, Any]]) -> set:
+    """Multi-row INSERT for backends without COPY; the whole chunk fails on a conflict."""
+    db.execute(insert(User).values([{**row, "is_active": True} for row in rows]))
+    return {row["email"] for row in rows}
+
+
+def import_users(
+    db: Session,
+    data: str,
+    fmt: str = "csv",
+    dry_run: bool = False,
+    chunk_size: int = USER_IMPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Import users from ``data``; every rejected row is listed with its line number and reason."""
+    started = time.perf_counter()
+    users, errors = parse_users(data, fmt)
+    total = len(users) + len(errors)
+    users = _reject_duplicates(db, users, errors)
+    created = 0
+    hash_ms = 0.0
+    if users and not dry_run:
+        use_copy = db.get_bind().dialect.driver == "psycopg2"
+        for start in range(0, len(users), chunk_size):
+            chunk = users[start:start + chunk_size]
+            hash_started = time.perf_counter()
+            hashes = hashing_pool.hash_many([user.password for _, user in chunk])
+            hash_ms += (time.perf_counter() - hash_started) * 1000
+            rows = [
+                {
+                    "email": user.email,
+                    "username": user.username,
+                    "full_name": user.full_name,
+                    "role": user.role,
+                    "hashed_password": hashed,
+                }
+                for (_, user), hashed in zip(chunk, hashes)
+            ]
+            inserted = (_copy_chunk if use_copy else _insert_chunk)(db, rows)
+            db.commit()
+            created += len(inserted)
+            for line_no, user in chunk:
+                if user.email not in inserted:
+                    errors.append({"line": line_no, "email": user.email, "error": "Email or username already exists"})
+    errors.sort(key=lambda entry: entry["line"])
+    report = {
+        "format": fmt,
+        "dry_run": dry_run,
+        "total": total,
+        "valid": len(users),
+        "created": created,
+        "failed": len(errors),
+        "errors": errors,
+        "hash_ms": round(hash_ms, 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        "user import: %d rows, %d created, %d failed in %.0f ms",
+        total, created, len(errors), report["elapsed_ms"],
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-create users from a CSV or NDJSON file.")
+    parser.add_argument("path", help="CSV (email,username,password[,full_name,role]) or NDJSON file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check duplicates only")
+    parser.add_argument("--chunk-size", type=int, default=USER_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    with open(args.path, encoding="utf-8-sig") as fh:
+        data = fh.read()
+    fmt = args.format or detect_format(args.path)
+    try:
+        with SessionLocal() as db:
+            report = import_users(db, data, fmt, dry_run=args.dry_run, chunk_size=args.chunk_size)
+    finally:
+        hashing_pool.shutdown()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
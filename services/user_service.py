@@ -4,11 +4,13 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select
 
 from .models import User
-from .auth import hash_password, verify_password
+from .hashing_pool import hashing_pool
+from .principal import invalidate_principal
 from models.user import UserCreate, UserUpdate
 
 
@@ -30,7 +32,7 @@ class UserService:
             username=user.username,
             full_name=user.full_name,
             role=user.role,
-            hashed_password=hash_password(user.password),
+            hashed_password=hashing_pool.hash(user.password),
             is_active=True,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
@@ -61,8 +63,15 @@ class UserService:
         user = UserService.get_user_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        ok, new_hash = hashing_pool.verify_and_rehash(password, user.hashed_password)
+        if not ok:
             return None
+        if new_hash:
+            # Transparently upgrade hashes created with an older bcrypt cost.
+            user.hashed_password = new_hash
+            db.add(user)
+            db.commit()
+            db.refresh(user)
         return user
 
     @staticmethod
@@ -92,7 +101,7 @@ class UserService:
         if user_update.full_name:
             user.full_name = user_update.full_name
         if user_update.password:
-            user.hashed_password = hash_password(user_update.password)
+            user.hashed_password = hashing_pool.hash(user_update.password)
         if user_update.role:
             user.role = user_update.role
 
@@ -100,6 +109,7 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_principal(user.id)
         return user
 
     @staticmethod
@@ -113,6 +123,7 @@ class UserService:
             return False
         db.delete(user)
         db.commit()
+        invalidate_principal(uid)
         return True
 
     @staticmethod
@@ -135,6 +146,7 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_principal(user.id)
         return user
 
     @staticmethod
@@ -151,4 +163,148 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_principal(user.id)
         return user
+
+
+class AsyncUserService:
+    """AsyncSession counterpart of :class:`UserService`; hashing is awaited off-loop."""
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user: UserCreate) -> User:
+        # Check duplicates
+        existing = (await db.execute(select(User).filter_by(email=user.email))).scalar_one_or_none()
+        if existing:
+            raise ValueError("Email already exists")
+        existing = (await db.execute(select(User).filter_by(username=user.username))).scalar_one_or_none()
+        if existing:
+            raise ValueError("Username already exists")
+
+        db_user = User(
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            role=user.role,
+            hashed_password=await hashing_pool.ahash(user.password),
+            is_active=True,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        return (await db.execute(select(User).filter_by(email=email))).scalar_one_or_none()
+
+    @staticmethod
+    async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+        return (await db.execute(select(User).filter_by(username=username))).scalar_one_or_none()
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
+        try:
+            uid = int(user_id)
+        except Exception:
+            return None
+        return await db.get(User, uid)
+
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        user = await AsyncUserService.get_user_by_email(db, email)
+        if not user:
+            return None
+        ok, new_hash = await hashing_pool.averify_and_rehash(password, user.hashed_password)
+        if not ok:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        return user
+
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: str, user_update: UserUpdate) -> Optional[User]:
+        try:
+            uid = int(user_id)
+        except Exception:
+            return None
+        user = await db.get(User, uid)
+        if not user:
+            return None
+
+        # Duplicates
+        if user_update.email and user_update.email != user.email:
+            existing = (await db.execute(select(User).filter_by(email=user_update.email))).scalar_one_or_none()
+            if existing and existing.id != user.id:
+                raise ValueError("Email already exists")
+        if user_update.username and user_update.username != user.username:
+            existing = (await db.execute(select(User).filter_by(username=user_update.username))).scalar_one_or_none()
+            if existing and existing.id != user.id:
+                raise ValueError("Username already exists")
+
+        if user_update.email:
+            user.email = user_update.email
+        if user_update.username:
+            user.username = user_update.username
+        if user_update.full_name:
+            user.full_name = user_update.full_name
+        if user_update.password:
+            user.hashed_password = await hashing_pool.ahash(user_update.password)
+        if user_update.role:
+            user.role = user_update.role
+
+        user.updated_at = datetime.utcnow()
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_principal(user.id)
+        return user
+
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: str) -> bool:
+        try:
+            uid = int(user_id)
+        except Exception:
+            return False
+        # Loading the conversations lets the ORM null out their user_id without lazy IO.
+        user = await db.get(User, uid, options=[selectinload(User.conservations)])
+        if not user:
+            return False
+        await db.delete(user)
+        await db.commit()
+        invalidate_principal(uid)
+        return True
+
+    @staticmethod
+    async def list_users(db: AsyncSession, skip: int = 0, limit: int = 10) -> list[User]:
+        stmt = select(User).offset(skip).limit(limit)
+        return (await db.execute(stmt)).scalars().all()
+
+    @staticmethod
+    async def set_active(db: AsyncSession, user_id: str, is_active: bool) -> Optional[User]:
+        try:
+            uid = int(user_id)
+        except Exception:
+            return None
+        user = await db.get(User, uid)
+        if not user:
+            return None
+        user.is_active = is_active
+        user.updated_at = datetime.utcnow()
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_principal(user.id)
+        return user
+
+    @staticmethod
+    async def deactivate_user(db: AsyncSession, user_id: str) -> Optional[User]:
+        return await AsyncUserService.set_active(db, user_id, False)
+
+    @staticmethod
+    async def activate_user(db: AsyncSession, user_id: str) -> Optional[User]:
+        return await AsyncUserService.set_active(db, user_id, True)